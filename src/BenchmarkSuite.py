@@ -0,0 +1,294 @@
+import json
+import os
+import pickle
+import platform
+import tempfile
+import time
+import numpy as np
+
+
+def timeCall(function, repeats: int = 10, warmupRepeats: int = 1) -> dict:
+    """
+    Times repeated calls of a function
+
+    :param function: Function taking no arguments
+    :param repeats: Number of timed calls
+    :param warmupRepeats: Number of untimed calls made first, absorbing tracing and caching
+    :return: Dictionary of the median, minimum and 90th percentile call time in seconds
+    """
+    for _ in range(warmupRepeats):
+        function()
+
+    timings = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "seconds": float(np.median(timings)),
+        "minSeconds": float(np.min(timings)),
+        "p90Seconds": float(np.percentile(timings, 90))
+    }
+
+
+def createRandomModel(directory: str,
+                      imageSize: int,
+                      greyScale: bool = False,
+                      dictionaryLength: int = 200,
+                      batchSize: int = 8,
+                      sentenceLength: int = None) -> str:
+    """
+    Saves the weights of a freshly initialized model, with the parameters file CryptoNet expects,
+    so that benchmarks run without trained weights
+
+    :param directory: Directory to save the weights to
+    :param imageSize: Size of the model's images
+    :param greyScale: Whether or not the model works on greyscale images
+    :param dictionaryLength: Number of distinct characters. Sentences may only use codes below
+                             0.8 * dictionaryLength, so lowercase ASCII needs at least 160
+    :param batchSize: Batch size recorded in the parameters file
+    :param sentenceLength: Number of characters embedded per image. Defaults to imageSize
+    :return: Path to the weights
+    """
+    from ModelGenerator import ModelGenerator
+
+    modelParameters = {
+        "imageSize": imageSize,
+        "greyScale": greyScale,
+        "sentenceLength": sentenceLength if sentenceLength is not None else imageSize,
+        "dictionaryLength": dictionaryLength,
+        "batchSize": batchSize,
+        "sparseTargets": False,
+        "decoderUnits": None
+    }
+
+    weightsFilePath = os.path.join(directory, f"random{imageSize}.h5")
+    model, _, _ = ModelGenerator.fromParameters(modelParameters=modelParameters).getModel(compileModel=False)
+    model.save_weights(weightsFilePath)
+
+    with open(f"{weightsFilePath}.p", "wb") as file:
+        pickle.dump(obj=modelParameters, file=file)
+
+    return weightsFilePath
+
+
+def getEnvironment() -> dict:
+    """
+    :return: Dictionary describing the machine and library versions the benchmarks ran with
+    """
+    import tensorflow as tf
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpuCount": os.cpu_count(),
+        "numpy": np.__version__,
+        "tensorflow": tf.__version__
+    }
+
+
+def runBenchmarks(imageSizes: tuple = (32, 64),
+                  batchSizes: tuple = (1, 8),
+                  proportionsToCorrupt: tuple = (0.1, 0.5),
+                  repeats: int = 10,
+                  seed: int = 0) -> dict:
+    """
+    Benchmarks each stage of the pipeline on small randomly initialized models: data generation,
+    sentence and image pre-processing, the encoder and decoder, image corruption, and a full
+    encrypt then decrypt round trip. Timings are keyed by benchmark name and parameters.
+
+    :param imageSizes: Model image sizes to benchmark
+    :param batchSizes: Batch sizes to benchmark the data generator, encoder and decoder at
+    :param proportionsToCorrupt: Corruption proportions to benchmark the corruptor at
+    :param repeats: Number of timed calls per benchmark
+    :param seed: Seed for the generated data
+    :return: Dictionary holding the environment and a dictionary of results
+    """
+    from CryptoNet import CryptoNet
+    from DataGenerator import DataGenerator
+    from ImageCorruptor import ImageCorruptor
+    from ImageIO import writeImage
+
+    rng = np.random.default_rng(seed)
+    results = {}
+
+    def record(name: str, timing: dict, itemsPerCall: int = 1) -> None:
+        timing["perSecond"] = itemsPerCall / timing["seconds"] if timing["seconds"] > 0 else None
+        results[name] = timing
+
+    with tempfile.TemporaryDirectory() as directory:
+        for imageSize in imageSizes:
+            weightsFilePath = createRandomModel(directory=directory, imageSize=imageSize, batchSize=max(batchSizes))
+            cryptoNet = CryptoNet(weightsFilePath=weightsFilePath, seed=seed)
+            sentence = "Hello there - General Kenobi"[:cryptoNet.sentenceLength]
+
+            imageFilePath = os.path.join(directory, f"carrier{imageSize}.png")
+            writeImage(imageFilePath=imageFilePath, image=rng.random(size=cryptoNet.imageSize, dtype=np.float32))
+
+            record(
+                f"preprocessSentence[imageSize={imageSize}]",
+                timeCall(lambda: cryptoNet.preprocessSentence(sentence=sentence), repeats=repeats)
+            )
+            record(
+                f"preprocessImage[imageSize={imageSize}]",
+                timeCall(lambda: cryptoNet.preprocessImage(imageFilePath=imageFilePath), repeats=repeats)
+            )
+
+            for batchSize in batchSizes:
+                dataGenerator = DataGenerator(
+                    imageSize=imageSize,
+                    greyScale=False,
+                    dictionaryLength=cryptoNet.dictionaryLength,
+                    seed=seed
+                ).generateData(batchSize=batchSize, vectorized=True)
+
+                images = rng.random(size=(batchSize, *cryptoNet.imageSize), dtype=np.float32)
+                sentences = cryptoNet.preprocessSentences(sentences=[sentence] * batchSize)
+
+                record(
+                    f"generateData[imageSize={imageSize},batchSize={batchSize}]",
+                    timeCall(lambda: next(dataGenerator), repeats=repeats)
+                )
+                record(
+                    f"encoder[imageSize={imageSize},batchSize={batchSize}]",
+                    timeCall(lambda: cryptoNet.encodeBatch(images=images, sentences=sentences), repeats=repeats),
+                    itemsPerCall=batchSize
+                )
+                record(
+                    f"decoder[imageSize={imageSize},batchSize={batchSize}]",
+                    timeCall(lambda: cryptoNet.decodeBatch(images=images), repeats=repeats),
+                    itemsPerCall=batchSize
+                )
+
+            for proportionToCorrupt in proportionsToCorrupt:
+                corruptor = ImageCorruptor(greyScale=False, useRandomColors=True, seed=seed)
+
+                record(
+                    f"corruptImage[imageSize={imageSize},proportion={proportionToCorrupt}]",
+                    timeCall(
+                        lambda: corruptor.corruptImage(
+                            proportionToCorrupt=proportionToCorrupt,
+                            imageFilePath=imageFilePath,
+                            saveOutput=False
+                        ),
+                        repeats=repeats
+                    )
+                )
+
+            embeddedFilePath = os.path.join(directory, f"embedded{imageSize}.png")
+            preProcessedFilePath = os.path.join(directory, f"preprocessed{imageSize}.png")
+
+            def roundTrip():
+                cryptoNet.encrypt(
+                    imageFilePath=imageFilePath,
+                    sentence=sentence,
+                    saveOutput=True,
+                    embeddedOutputPath=embeddedFilePath,
+                    preProcessedOutputPath=preProcessedFilePath
+                )
+                cryptoNet.decrypt(img=embeddedFilePath)
+
+            record(f"encryptDecrypt[imageSize={imageSize}]", timeCall(roundTrip, repeats=repeats))
+
+    return {"environment": getEnvironment(), "results": results}
+
+
+def saveBaseline(benchmarks: dict, baselineFilePath: str) -> None:
+    """
+    Stores benchmark results as a baseline for later comparison
+
+    :param benchmarks: Dictionary returned by runBenchmarks
+    :param baselineFilePath: Path of the JSON file to write
+    """
+    with open(baselineFilePath, "w") as file:
+        json.dump(benchmarks, file, indent=2)
+
+
+def loadBaseline(baselineFilePath: str) -> dict:
+    """
+    Loads a baseline stored by saveBaseline
+
+    :param baselineFilePath: Path of the JSON file to read
+    :return: Dictionary in the format returned by runBenchmarks
+    """
+    with open(baselineFilePath, "r") as file:
+        return json.load(file)
+
+
+def compareBenchmarks(baseline: dict, current: dict, tolerance: float = 0.1) -> list:
+    """
+    Compares the median time of each benchmark against a baseline. A benchmark regressed when it
+    is more than tolerance slower, and improved when it is more than tolerance faster.
+
+    :param baseline: Dictionary returned by runBenchmarks or loadBaseline
+    :param current: Dictionary returned by runBenchmarks
+    :param tolerance: Relative change treated as noise
+    :return: List of dictionaries holding each benchmark's times, ratio and status
+    """
+    baselineResults = baseline["results"]
+    currentResults = current["results"]
+    rows = []
+
+    for name in sorted(set(baselineResults) | set(currentResults)):
+        before = baselineResults.get(name, {}).get("seconds")
+        after = currentResults.get(name, {}).get("seconds")
+
+        if before is None:
+            ratio, status = None, "new"
+        elif after is None:
+            ratio, status = None, "missing"
+        else:
+            ratio = after / before if before > 0 else None
+
+            if ratio is None:
+                status = "ok"
+            elif ratio > 1 + tolerance:
+                status = "regression"
+            elif ratio < 1 - tolerance:
+                status = "improvement"
+            else:
+                status = "ok"
+
+        rows.append({"name": name, "baselineSeconds": before, "currentSeconds": after, "ratio": ratio, "status": status})
+
+    return rows
+
+
+def formatComparison(rows: list, baselineEnvironment: dict = None, currentEnvironment: dict = None) -> str:
+    """
+    Formats a comparison returned by compareBenchmarks for printing
+
+    :param rows: Comparison rows
+    :param baselineEnvironment: Optional environment of the baseline, reported when it differs
+    :param currentEnvironment: Optional environment of the current run
+    :return: Human readable report
+    """
+    def seconds(value):
+        return "n/a" if value is None else f"{1000 * value:.3f}ms"
+
+    width = max([len(row["name"]) for row in rows] + [len("benchmark")])
+    lines = [f"{'benchmark':<{width}}  {'baseline':>12}  {'current':>12}  {'ratio':>7}  status"]
+
+    for row in rows:
+        ratio = "n/a" if row["ratio"] is None else f"{row['ratio']:.2f}x"
+        lines.append(
+            f"{row['name']:<{width}}  {seconds(row['baselineSeconds']):>12}  {seconds(row['currentSeconds']):>12}  {ratio:>7}  {row['status']}"
+        )
+
+    counts = {status: sum(row["status"] == status for row in rows) for status in ("regression", "improvement", "ok", "new", "missing")}
+    lines.append(", ".join(f"{count} {status}" for status, count in counts.items()))
+
+    if baselineEnvironment is not None and currentEnvironment is not None and baselineEnvironment != currentEnvironment:
+        lines.append("Warning: the baseline was recorded in a different environment.")
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    benchmarks = runBenchmarks()
+
+    for name, timing in benchmarks["results"].items():
+        print(f"{name:<50} {1000 * timing['seconds']:.3f}ms")
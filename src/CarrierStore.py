@@ -0,0 +1,201 @@
+import json
+import os
+import numpy as np
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+
+STORE_VERSION = 1
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+
+def loadCarrier(imageFilePath: str, imageSize: int, greyScale: bool) -> np.array:
+    """
+    Decodes an image and resizes it to a square carrier
+
+    :param imageFilePath: File path to the image
+    :param imageSize: Side length to resize the image to
+    :param greyScale: Whether or not to convert the image to greyscale
+    :return: Uint8 numpy array of shape (imageSize, imageSize, channels)
+    """
+    with Image.open(imageFilePath) as image:
+        image = image.convert("L" if greyScale else "RGB").resize((imageSize, imageSize), Image.BILINEAR)
+        img = np.asarray(image, dtype=np.uint8)
+
+    if img.ndim == 2:
+        img = np.expand_dims(img, axis=-1)
+
+    return img
+
+
+def ingestImages(sourceDirectory: str,
+                 storeDirectory: str,
+                 imageSize: int,
+                 greyScale: bool = False,
+                 shardSize: int = 4096,
+                 numWorkers: int = 8) -> dict:
+    """
+    Resizes every image under sourceDirectory and packs them into uint8 .npy shards of at most
+    shardSize images, alongside an index.json describing the shards. Images are decoded on a thread
+    pool, at most 2 * numWorkers ahead of the writer, and written straight into memory-mapped
+    shards, so memory use is bounded by the pool. The last shard is sized to the images left.
+    Images that cannot be decoded are skipped and listed in the index.
+
+    :param sourceDirectory: Directory to search recursively for images
+    :param storeDirectory: Directory to write the shards and index to
+    :param imageSize: Side length to resize the images to
+    :param greyScale: Whether or not to store the images in greyscale
+    :param shardSize: Maximum number of images per shard
+    :param numWorkers: Number of threads decoding images
+    :return: The index dictionary
+    """
+    imageFilePaths = sorted(
+        os.path.join(directory, fileName)
+        for directory, _, fileNames in os.walk(sourceDirectory)
+        for fileName in fileNames
+        if fileName.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+    if not imageFilePaths:
+        raise ValueError(f"No images found in {sourceDirectory}.")
+
+    os.makedirs(storeDirectory, exist_ok=True)
+    imageShape = (imageSize, imageSize, 1 if greyScale else 3)
+
+    def tryLoadCarrier(imageFilePath):
+        try:
+            return loadCarrier(imageFilePath=imageFilePath, imageSize=imageSize, greyScale=greyScale)
+        except OSError:
+            return None
+
+    def loadInOrder(executor):
+        # At most 2 * numWorkers images are decoding or waiting to be written at any time
+        pending = deque()
+
+        for imageFilePath in imageFilePaths:
+            pending.append((imageFilePath, executor.submit(tryLoadCarrier, imageFilePath)))
+
+            if len(pending) >= 2 * numWorkers:
+                yield pending.popleft()
+
+        while pending:
+            yield pending.popleft()
+
+    shards, skipped = [], []
+    shard, count = None, 0
+
+    def closeShard():
+        nonlocal shard
+
+        shard.flush()
+        shards[-1]["count"] = count
+
+        # Images that could not be decoded leave the end of the shard unused; rewrite it without them
+        if count < len(shard):
+            compacted = np.array(shard[:count])
+            shard = None
+            np.save(os.path.join(storeDirectory, shards[-1]["file"]), compacted)
+
+        shard = None
+
+    with ThreadPoolExecutor(max_workers=numWorkers) as executor:
+        for position, (imageFilePath, future) in enumerate(loadInOrder(executor)):
+            img = future.result()
+
+            if img is None:
+                skipped.append(imageFilePath)
+                continue
+
+            if shard is not None and count == len(shard):
+                closeShard()
+
+            if shard is None:
+                fileName = f"shard-{len(shards):05d}.npy"
+                shard = np.lib.format.open_memmap(
+                    os.path.join(storeDirectory, fileName),
+                    mode="w+",
+                    dtype=np.uint8,
+                    shape=(min(shardSize, len(imageFilePaths) - position), *imageShape)
+                )
+                shards.append({"file": fileName, "count": 0})
+                count = 0
+
+            shard[count] = img
+            count += 1
+
+    if shard is None:
+        raise ValueError(f"None of the images in {sourceDirectory} could be decoded.")
+
+    closeShard()
+
+    index = {
+        "version": STORE_VERSION,
+        "imageShape": list(imageShape),
+        "count": sum(entry["count"] for entry in shards),
+        "shards": shards,
+        "skipped": skipped
+    }
+
+    with open(os.path.join(storeDirectory, "index.json"), "w") as file:
+        json.dump(index, file, indent=2)
+
+    return index
+
+
+class CarrierStore(object):
+    def __init__(self, storeDirectory: str):
+        """
+        This class samples batches of carrier images from a store written by ingestImages. The
+        shards are memory mapped, so only the pages holding sampled images are read, and the
+        operating system rather than the process decides how much of the store stays in memory.
+
+        :param storeDirectory: Directory holding index.json and the shards
+        """
+        with open(os.path.join(storeDirectory, "index.json"), "r") as file:
+            index = json.load(file)
+
+        if index.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported carrier store version {index.get('version')}.")
+
+        self.storeDirectory = storeDirectory
+        self.imageShape = tuple(index["imageShape"])
+        self.count = index["count"]
+        self.shards = [
+            np.load(os.path.join(storeDirectory, entry["file"]), mmap_mode="r")[:entry["count"]]
+            for entry in index["shards"]
+        ]
+        self.offsets = np.cumsum([0] + [entry["count"] for entry in index["shards"]])
+
+    def __len__(self) -> int:
+        return self.count
+
+    def sampleBatch(self, rng: np.random.Generator, out: np.array) -> np.array:
+        """
+        Fills out with randomly sampled images scaled to [0, 1]. Indices are sorted before reading
+        so that each shard is read in a single forward pass; batch order carries no meaning when
+        sampling at random.
+
+        :param rng: Generator to sample indices with
+        :param out: Float array of shape (batchSize, *imageShape) to write into
+        :return: out
+        """
+        indices = np.sort(rng.integers(low=0, high=self.count, size=out.shape[0]))
+        shardIndices = np.searchsorted(self.offsets, indices, side="right") - 1
+        boundaries = np.flatnonzero(np.diff(shardIndices)) + 1
+
+        for start, end in zip(np.concatenate(([0], boundaries)), np.concatenate((boundaries, [len(indices)]))):
+            shardIndex = shardIndices[start]
+            np.multiply(
+                self.shards[shardIndex][indices[start:end] - self.offsets[shardIndex]],
+                out.dtype.type(1 / 255.0),
+                out=out[start:end]
+            )
+
+        return out
+
+
+if __name__ == "__main__":
+    index = ingestImages(sourceDirectory="../img", storeDirectory="../data/CarrierStore", imageSize=100)
+    print(f"Packed {index['count']} images into {len(index['shards'])} shards, skipped {len(index['skipped'])}")
@@ -0,0 +1,231 @@
+import json
+import os
+import queue
+import threading
+import numpy as np
+
+from tensorflow import keras
+from tensorflow.keras.callbacks import Callback
+
+
+MANIFEST_VERSION = 1
+
+
+def getOptimizerVariables(optimizer) -> list:
+    """
+    Returns the variables holding an optimizer's state, for both the legacy and the current Keras
+    optimizer APIs
+
+    :param optimizer: Keras optimizer
+    :return: List of variables
+    """
+    variables = optimizer.variables
+
+    return list(variables() if callable(variables) else variables)
+
+
+def buildOptimizer(optimizer, trainableVariables: list) -> None:
+    """
+    Creates an optimizer's state variables ahead of the first training step so that they can be restored
+
+    :param optimizer: Keras optimizer
+    :param trainableVariables: Variables the optimizer updates
+    """
+    if hasattr(optimizer, "build"):
+        optimizer.build(trainableVariables)
+    else:
+        optimizer._create_all_weights(trainableVariables)
+
+
+def loadManifest(checkpointDirectory: str) -> dict:
+    """
+    Loads the manifest of a checkpoint directory
+
+    :param checkpointDirectory: Directory written by BackgroundCheckpoint
+    :return: Manifest dictionary, or None if the directory has no manifest
+    """
+    manifestPath = os.path.join(checkpointDirectory, "manifest.json")
+
+    if not os.path.exists(manifestPath):
+        return None
+
+    with open(manifestPath, "r") as file:
+        manifest = json.load(file)
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported checkpoint manifest version {manifest.get('version')}.")
+
+    return manifest
+
+
+def restoreCheckpoint(model, checkpointDirectory: str) -> dict:
+    """
+    Restores the weights and optimizer state of the latest checkpoint in a directory
+
+    :param model: Compiled model to restore into
+    :param checkpointDirectory: Directory written by BackgroundCheckpoint
+    :return: The manifest entry of the restored checkpoint, or None if there is nothing to restore
+    """
+    manifest = loadManifest(checkpointDirectory=checkpointDirectory)
+
+    if manifest is None or not manifest["checkpoints"]:
+        return None
+
+    latest = manifest["checkpoints"][-1]
+
+    with np.load(os.path.join(checkpointDirectory, latest["file"])) as snapshot:
+        model.set_weights([snapshot[f"weight_{idx}"] for idx in range(latest["weightCount"])])
+
+        buildOptimizer(model.optimizer, model.trainable_variables)
+        for idx, variable in enumerate(getOptimizerVariables(model.optimizer)):
+            variable.assign(snapshot[f"optimizer_{idx}"])
+
+    return latest
+
+
+class BackgroundCheckpoint(Callback):
+    def __init__(self,
+                 checkpointDirectory: str,
+                 modelParameters: dict,
+                 bestWeightsPath: str = None,
+                 keep: int = 3,
+                 monitor: str = "imageReconstruction_loss",
+                 getRngState=None):
+        """
+        This class is a Keras callback that checkpoints training without stalling it. At the end of
+        each epoch the weights and optimizer state are copied to memory, and a background thread
+        writes them to disk, keeping the last keep checkpoints. A versioned manifest records the
+        model parameters, and for each checkpoint its epoch, monitored metric, and RNG state, so an
+        interrupted run can resume exactly where it stopped with restoreCheckpoint.
+
+        When bestWeightsPath is given, the weights are also written there in the usual h5 format
+        whenever the monitored metric improves, replacing ModelCheckpoint.
+
+        :param checkpointDirectory: Directory to write the checkpoints and manifest to
+        :param modelParameters: Model parameters to record in the manifest
+        :param bestWeightsPath: Optional path to save the best weights to
+        :param keep: Number of checkpoints to keep
+        :param monitor: Metric deciding which weights are best. Lower is better
+        :param getRngState: Optional function returning a JSON serializable RNG state to record
+        """
+        super(BackgroundCheckpoint, self).__init__()
+
+        if keep < 1:
+            raise ValueError("Parameter keep must be at least 1.")
+
+        self.checkpointDirectory = checkpointDirectory
+        self.modelParameters = modelParameters
+        self.bestWeightsPath = bestWeightsPath
+        self.keep = keep
+        self.monitor = monitor
+        self.getRngState = getRngState
+
+        os.makedirs(self.checkpointDirectory, exist_ok=True)
+        manifest = loadManifest(checkpointDirectory=self.checkpointDirectory)
+
+        self.checkpoints = manifest["checkpoints"] if manifest is not None else []
+        self.best = manifest["best"] if manifest is not None else None
+        self.writeQueue = queue.Queue(maxsize=2)
+        self.writer = None
+        self.shadowModel = None
+        self.errors = []
+
+    def on_train_begin(self, logs=None):
+        if self.bestWeightsPath is not None:
+            # The h5 writer needs a model; a copy lets the background thread save without touching the live one
+            self.shadowModel = keras.models.clone_model(self.model)
+
+        self.writer = threading.Thread(target=self.writeCheckpoints, daemon=True)
+        self.writer.start()
+
+    def on_epoch_end(self, epoch, logs=None):
+        if self.errors:
+            raise self.errors[0]
+
+        metric = (logs or {}).get(self.monitor)
+
+        self.writeQueue.put({
+            "epoch": epoch,
+            "metric": None if metric is None else float(metric),
+            "weights": self.model.get_weights(),
+            "optimizer": [variable.numpy() for variable in getOptimizerVariables(self.model.optimizer)],
+            "rngState": self.getRngState() if self.getRngState is not None else None
+        })
+
+    def on_train_end(self, logs=None):
+        self.writeQueue.put(None)
+        self.writer.join()
+
+        if self.errors:
+            raise self.errors[0]
+
+    def writeCheckpoints(self) -> None:
+        """
+        Writes queued snapshots until told to stop
+        """
+        while True:
+            snapshot = self.writeQueue.get()
+
+            if snapshot is None:
+                return
+
+            try:
+                self.writeCheckpoint(snapshot=snapshot)
+            except Exception as error:
+                self.errors.append(error)
+
+    def writeCheckpoint(self, snapshot: dict) -> None:
+        """
+        Writes a single snapshot, updates the manifest, and removes checkpoints beyond keep
+
+        :param snapshot: Snapshot queued by on_epoch_end
+        """
+        fileName = f"checkpoint-{snapshot['epoch']:05d}.npz"
+        arrays = {f"weight_{idx}": weight for idx, weight in enumerate(snapshot["weights"])}
+        arrays.update({f"optimizer_{idx}": variable for idx, variable in enumerate(snapshot["optimizer"])})
+
+        temporaryPath = os.path.join(self.checkpointDirectory, f".{fileName}")
+        with open(temporaryPath, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(temporaryPath, os.path.join(self.checkpointDirectory, fileName))
+
+        entry = {
+            "epoch": snapshot["epoch"],
+            "file": fileName,
+            "metric": snapshot["metric"],
+            "weightCount": len(snapshot["weights"]),
+            "rngState": snapshot["rngState"]
+        }
+        self.checkpoints.append(entry)
+
+        if snapshot["metric"] is not None and (self.best is None or snapshot["metric"] < self.best["metric"]):
+            self.best = {"epoch": snapshot["epoch"], "metric": snapshot["metric"]}
+
+            if self.shadowModel is not None:
+                self.shadowModel.set_weights(snapshot["weights"])
+                self.shadowModel.save_weights(self.bestWeightsPath)
+
+        for expired in self.checkpoints[:-self.keep]:
+            expiredPath = os.path.join(self.checkpointDirectory, expired["file"])
+
+            if os.path.exists(expiredPath):
+                os.remove(expiredPath)
+
+        self.checkpoints = self.checkpoints[-self.keep:]
+        self.writeManifest()
+
+    def writeManifest(self) -> None:
+        """
+        Atomically replaces the manifest
+        """
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "modelParameters": self.modelParameters,
+            "best": self.best,
+            "checkpoints": self.checkpoints
+        }
+
+        temporaryPath = os.path.join(self.checkpointDirectory, ".manifest.json")
+        with open(temporaryPath, "w") as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(temporaryPath, os.path.join(self.checkpointDirectory, "manifest.json"))
@@ -0,0 +1,549 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def encryptCommand(args: argparse.Namespace) -> None:
+    """
+    Embeds a sentence within an image
+    """
+    from CryptoNet import CryptoNet
+    from ImageIO import AsyncImageWriter
+
+    # Both outputs are compressed in parallel
+    with AsyncImageWriter(compressLevel=args.compressLevel) as imageWriter:
+        cryptoNet = CryptoNet(weightsFilePath=args.weights, seed=args.seed, imageWriter=imageWriter)
+        cryptoNet.encrypt(
+            imageFilePath=args.image,
+            sentence=args.sentence,
+            saveOutput=True,
+            embeddedOutputPath=args.output,
+            preProcessedOutputPath=args.preprocessedOutput
+        )
+
+
+def decryptCommand(args: argparse.Namespace) -> None:
+    """
+    Prints the sentence embedded within each image, one tab separated line per image
+    """
+    from CryptoNet import CryptoNet
+
+    cryptoNet = CryptoNet(weightsFilePath=args.weights)
+    source = args.images[0] if len(args.images) == 1 else args.images
+
+    for imageFilePath, sentence in cryptoNet.decryptStream(source=source, batchSize=args.batchSize):
+        print(f"{imageFilePath}\t{sentence}")
+
+
+def corruptCommand(args: argparse.Namespace) -> None:
+    """
+    Corrupts a proportion of the pixels of an image
+    """
+    from ImageCorruptor import ImageCorruptor
+
+    fillValues = {"black": (0.0, 0.0, 0.0), "white": (1.0, 1.0, 1.0), "random": (0.0, 0.0, 0.0)}
+
+    corruptor = ImageCorruptor(
+        greyScale=args.greyScale,
+        corruptValue=fillValues[args.fill],
+        useRandomColors=args.fill == "random",
+        seed=args.seed
+    )
+    corruptor.corruptImage(
+        proportionToCorrupt=args.proportion,
+        imageFilePath=args.image,
+        saveOutput=True,
+        outputFilePath=args.output
+    )
+
+
+def launchLocalWorkers(argv: list, numWorkers: int, basePort: int) -> None:
+    """
+    Runs the train command as numWorkers local processes forming one multi-worker cluster. Each
+    process gets its own TF_CONFIG describing the cluster and its index within it.
+
+    :param argv: Arguments of the train command, without --local-workers
+    :param numWorkers: Number of worker processes
+    :param basePort: Port of the first worker; the rest use the following ports
+    """
+    cluster = {"worker": [f"localhost:{basePort + idx}" for idx in range(numWorkers)]}
+    processes = []
+
+    for idx in range(numWorkers):
+        environment = dict(os.environ)
+        environment["TF_CONFIG"] = json.dumps({"cluster": cluster, "task": {"type": "worker", "index": idx}})
+        processes.append(subprocess.Popen([sys.executable, os.path.abspath(__file__), *argv], env=environment))
+
+    exitCodes = [process.wait() for process in processes]
+
+    if any(exitCodes):
+        raise SystemExit(f"Worker exit codes: {exitCodes}")
+
+
+def trainCommand(args: argparse.Namespace) -> None:
+    """
+    Trains a model
+    """
+    if args.localWorkers > 1:
+        argv = []
+        skipNext = False
+
+        # Forward every argument except --local-workers itself to the workers
+        for argument in args.argv:
+            if skipNext:
+                skipNext = False
+            elif argument == "--local-workers":
+                skipNext = True
+            elif not argument.startswith("--local-workers="):
+                argv.append(argument)
+
+        launchLocalWorkers(
+            argv=argv + ["--distributed"],
+            numWorkers=args.localWorkers,
+            basePort=args.basePort
+        )
+        return
+
+    if args.tfConfig is not None:
+        with open(args.tfConfig, "r") as file:
+            os.environ["TF_CONFIG"] = json.dumps(json.load(file))
+
+    from ModelTrainer import ModelTrainer
+
+    trainer = ModelTrainer(
+        modelSavePath=args.savePath,
+        imageSize=args.imageSize,
+        greyScale=args.greyScale,
+        dictionaryLength=args.dictionaryLength,
+        batchSize=args.batchSize,
+        loadExistingModel=args.loadExisting,
+        seed=args.seed,
+        sparseTargets=args.sparseTargets,
+        mixedPrecision=args.mixedPrecision,
+        jitCompile=args.jitCompile,
+        sentenceLength=args.sentenceLength,
+        decoderUnits=args.decoderUnits,
+        carrierStorePath=args.carrierStore
+    )
+    trainer.trainModels(
+        epochs=args.epochs,
+        stepsPerEpoch=args.stepsPerEpoch,
+        threshold=args.threshold,
+        useDataset=args.shards > 0,
+        numShards=max(args.shards, 1),
+        cacheEpoch=args.cacheEpoch,
+        distributed=args.distributed or args.tfConfig is not None,
+        instrumentationLogPath=args.instrumentationLog,
+        profileSteps=tuple(args.profileSteps) if args.profileSteps is not None else None,
+        checkpointDirectory=args.checkpointDir,
+        keepCheckpoints=args.keepCheckpoints,
+        resume=args.resume
+    )
+
+
+def evaluateCommand(args: argparse.Namespace) -> None:
+    """
+    Runs a corruption robustness sweep and regenerates the Levenshtein plots
+    """
+    import numpy as np
+
+    from CorruptionEvaluator import CorruptionEvaluator
+    from CryptoNet import CryptoNet
+
+    evaluator = CorruptionEvaluator(
+        cryptoNet=CryptoNet(weightsFilePath=args.weights),
+        seed=args.seed,
+        numProcesses=args.processes
+    )
+    results = evaluator.evaluate(
+        imageFilePath=args.image,
+        sentences=args.sentences,
+        proportionsToCorrupt=np.linspace(0, 1, args.proportions),
+        fillModes=tuple(args.fillModes),
+        trials=args.trials
+    )
+
+    evaluator.writeResults(rows=results, outputDirectory=args.resultsDirectory)
+    evaluator.plotResults(rows=results, outputDirectory=args.plotsDirectory)
+
+
+def ingestCommand(args: argparse.Namespace) -> None:
+    """
+    Packs a directory of carrier images into a memory-mapped store
+    """
+    from CarrierStore import ingestImages
+
+    index = ingestImages(
+        sourceDirectory=args.source,
+        storeDirectory=args.store,
+        imageSize=args.imageSize,
+        greyScale=args.greyScale,
+        shardSize=args.shardSize,
+        numWorkers=args.workers
+    )
+
+    print(f"Packed {index['count']} images into {len(index['shards'])} shards, skipped {len(index['skipped'])}")
+
+
+def quantizeCommand(args: argparse.Namespace) -> None:
+    """
+    Exports int8 quantized models, optionally reporting how they compare with the float model
+    """
+    from CryptoNet import CryptoNet
+
+    CryptoNet(weightsFilePath=args.weights).exportQuantized(quantizedModelPath=args.output)
+
+    if args.reportImage is None:
+        return
+
+    from CorruptionEvaluator import CorruptionEvaluator
+    from QuantizedEngine import compareQuantized
+
+    rows = compareQuantized(
+        weightsFilePath=args.weights,
+        quantizedModelPath=args.output,
+        imageFilePath=args.reportImage,
+        sentences=args.sentences
+    )
+
+    for row in rows:
+        print(", ".join(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}" for key, value in row.items()))
+
+    if args.resultsDirectory is not None:
+        CorruptionEvaluator.writeResults(rows=rows, outputDirectory=args.resultsDirectory, fileName="QuantizationReport")
+
+
+def benchmarkCommand(args: argparse.Namespace) -> None:
+    """
+    Benchmarks the pipeline, optionally storing a baseline or comparing against one
+    """
+    from BenchmarkSuite import compareBenchmarks
+    from BenchmarkSuite import formatComparison
+    from BenchmarkSuite import loadBaseline
+    from BenchmarkSuite import runBenchmarks
+    from BenchmarkSuite import saveBaseline
+
+    benchmarks = runBenchmarks(
+        imageSizes=tuple(args.imageSizes),
+        batchSizes=tuple(args.batchSizes),
+        proportionsToCorrupt=tuple(args.proportions),
+        repeats=args.repeats
+    )
+
+    if args.saveBaseline is not None:
+        saveBaseline(benchmarks=benchmarks, baselineFilePath=args.saveBaseline)
+
+    if args.baseline is None:
+        for name, timing in benchmarks["results"].items():
+            print(f"{name:<50} {1000 * timing['seconds']:.3f}ms")
+        return
+
+    baseline = loadBaseline(baselineFilePath=args.baseline)
+    rows = compareBenchmarks(baseline=baseline, current=benchmarks, tolerance=args.tolerance)
+
+    print(formatComparison(rows=rows, baselineEnvironment=baseline.get("environment"), currentEnvironment=benchmarks["environment"]))
+
+    if any(row["status"] == "regression" for row in rows):
+        raise SystemExit(1)
+
+
+def sweepCommand(args: argparse.Namespace) -> None:
+    """
+    Searches a grid of training configurations with successive halving
+    """
+    from SweepRunner import SweepRunner
+
+    grid = {
+        "imageSize": args.imageSizes,
+        "dictionaryLength": args.dictionaryLengths,
+        "batchSize": args.batchSizes,
+        "sentenceLength": args.sentenceLengths,
+        "decoderUnits": args.decoderUnits,
+        "greyScale": [value == "true" for value in args.greyScale] if args.greyScale is not None else None,
+        "threshold": args.thresholds
+    }
+
+    runner = SweepRunner(
+        sweepDirectory=args.directory,
+        grid={name: values for name, values in grid.items() if values is not None},
+        stepsPerEpoch=args.stepsPerEpoch,
+        minEpochs=args.minEpochs,
+        maxEpochs=args.maxEpochs,
+        reductionFactor=args.reductionFactor,
+        numProcesses=args.processes,
+        useDataset=args.useDataset,
+        seed=args.seed
+    )
+
+    for row in runner.run():
+        if row["status"] == "best":
+            print(f"Best trial: {row}")
+
+    print(f"Results written to {os.path.join(args.directory, 'results.csv')}")
+
+
+def summarizeCommand(args: argparse.Namespace) -> None:
+    """
+    Reports where training time went according to an instrumentation log
+    """
+    from TrainingLog import formatSummary
+    from TrainingLog import summarizeTrainingLog
+
+    print(formatSummary(summarizeTrainingLog(logFilePath=args.log)))
+
+
+def serveCommand(args: argparse.Namespace) -> None:
+    """
+    Serves encrypt and decrypt requests with micro-batching
+    """
+    from CryptoNet import CryptoNet
+    from InferenceServer import InferenceServer
+
+    server = InferenceServer(
+        cryptoNet=CryptoNet(weightsFilePath=args.weights, profile=args.profile),
+        maxBatchSize=args.maxBatchSize,
+        maxWaitMs=args.maxWaitMs,
+        host=args.host,
+        port=args.port,
+        unixSocketPath=args.unixSocket
+    )
+    server.run()
+
+
+def importTimeCommand(args: argparse.Namespace) -> None:
+    """
+    Measures the wall time of importing each module, and of printing the help text, in fresh interpreters
+    """
+    targets = [(f"import {module}", [sys.executable, "-c", f"import {module}"]) for module in args.modules]
+    targets.append(("CommandLine --help", [sys.executable, __file__, "--help"]))
+
+    for label, command in targets:
+        timings = []
+
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+            timings.append(time.perf_counter() - start)
+
+        print(f"{label:<30} best {min(timings):.3f}s  mean {sum(timings) / len(timings):.3f}s")
+
+
+def getParser() -> argparse.ArgumentParser:
+    """
+    Builds the argument parser. Only the standard library is imported until a command runs.
+
+    :return: The argument parser
+    """
+    parser = argparse.ArgumentParser(description="Embed text within images and recover it with a neural net.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    encryptParser = subparsers.add_parser("encrypt", help="Embed a sentence within an image.")
+    encryptParser.add_argument("--weights", required=True, help="Path to the model weights.")
+    encryptParser.add_argument("--image", required=True, help="Path to the carrier image.")
+    encryptParser.add_argument("--sentence", required=True, help="Sentence to embed.")
+    encryptParser.add_argument("--output", required=True, help="Path to save the image with embedded text.")
+    encryptParser.add_argument("--preprocessed-output", dest="preprocessedOutput", required=True,
+                               help="Path to save the pre-processed image.")
+    encryptParser.add_argument("--seed", type=int, default=None, help="Seed used when peppering the sentence.")
+    encryptParser.add_argument("--compress-level", dest="compressLevel", type=int, default=None, choices=range(10),
+                               metavar="0-9", help="PNG compression level. Lower is faster and larger.")
+    encryptParser.set_defaults(func=encryptCommand)
+
+    decryptParser = subparsers.add_parser("decrypt", help="Recover the sentences embedded within images.")
+    decryptParser.add_argument("--weights", required=True, help="Path to the model weights.")
+    decryptParser.add_argument("images", nargs="+", help="Image paths, a directory, or a glob pattern.")
+    decryptParser.add_argument("--batch-size", dest="batchSize", type=int, default=None,
+                               help="Images per decoder call. Defaults to the model's batch size.")
+    decryptParser.set_defaults(func=decryptCommand)
+
+    corruptParser = subparsers.add_parser("corrupt", help="Corrupt a proportion of an image's pixels.")
+    corruptParser.add_argument("--image", required=True, help="Path to the image to corrupt.")
+    corruptParser.add_argument("--output", required=True, help="Path to save the corrupted image.")
+    corruptParser.add_argument("--proportion", type=float, required=True, help="Proportion of pixels to corrupt.")
+    corruptParser.add_argument("--fill", choices=["black", "white", "random"], default="black",
+                               help="Value to fill corrupted pixels with.")
+    corruptParser.add_argument("--grey-scale", dest="greyScale", action="store_true", help="Image is grey scale.")
+    corruptParser.add_argument("--seed", type=int, default=None, help="Seed for the pixels corrupted.")
+    corruptParser.set_defaults(func=corruptCommand)
+
+    trainParser = subparsers.add_parser("train", help="Train a model.")
+    trainParser.add_argument("--save-path", dest="savePath", required=True, help="Path to save the model weights.")
+    trainParser.add_argument("--image-size", dest="imageSize", type=int, default=100, help="Size of the images.")
+    trainParser.add_argument("--grey-scale", dest="greyScale", action="store_true", help="Train on grey scale images.")
+    trainParser.add_argument("--dictionary-length", dest="dictionaryLength", type=int, default=200,
+                             help="Number of distinct characters.")
+    trainParser.add_argument("--sentence-length", dest="sentenceLength", type=int, default=None,
+                             help="Characters embedded per image. Must divide the number of pixels. "
+                                  "Defaults to the image size.")
+    trainParser.add_argument("--decoder-units", dest="decoderUnits", type=int, default=None,
+                             help="Width of the decoder's hidden layer per character.")
+    trainParser.add_argument("--batch-size", dest="batchSize", type=int, default=32, help="Batch size.")
+    trainParser.add_argument("--epochs", type=int, required=True, help="Number of epochs.")
+    trainParser.add_argument("--steps-per-epoch", dest="stepsPerEpoch", type=int, required=True,
+                             help="Number of steps per epoch.")
+    trainParser.add_argument("--threshold", type=float, default=0.01,
+                             help="Image reconstruction loss at which training stops.")
+    trainParser.add_argument("--load-existing", dest="loadExisting", action="store_true",
+                             help="Continue training the weights at the save path.")
+    trainParser.add_argument("--sparse-targets", dest="sparseTargets", action="store_true",
+                             help="Train against integer sentence labels.")
+    trainParser.add_argument("--mixed-precision", dest="mixedPrecision", action="store_true",
+                             help="Train with a mixed precision policy (bfloat16 on CPUs).")
+    trainParser.add_argument("--jit-compile", dest="jitCompile", action="store_true",
+                             help="Compile the training step with XLA.")
+    trainParser.add_argument("--shards", type=int, default=0,
+                             help="Number of parallel DataGenerator shards in the tf.data pipeline. 0 feeds a plain generator.")
+    trainParser.add_argument("--cache-epoch", dest="cacheEpoch", action="store_true",
+                             help="Cache one fixed epoch of data in memory. Requires --shards.")
+    trainParser.add_argument("--seed", type=int, default=None, help="Seed for the generated data.")
+    trainParser.add_argument("--instrumentation-log", dest="instrumentationLog", default=None,
+                             help="JSON lines file to record step timings and resource use to.")
+    trainParser.add_argument("--profile-steps", dest="profileSteps", type=int, nargs=2, default=None,
+                             metavar=("FIRST", "LAST"), help="Global steps to capture a profiler trace of.")
+    trainParser.add_argument("--checkpoint-dir", dest="checkpointDir", default=None,
+                             help="Directory to write background checkpoints with optimizer and RNG state to.")
+    trainParser.add_argument("--keep-checkpoints", dest="keepCheckpoints", type=int, default=3,
+                             help="Number of background checkpoints to keep.")
+    trainParser.add_argument("--resume", action="store_true",
+                             help="Resume from the latest checkpoint in --checkpoint-dir.")
+    trainParser.add_argument("--carrier-store", dest="carrierStore", default=None,
+                             help="Carrier store written by ingest to train on instead of noise.")
+    trainParser.add_argument("--distributed", action="store_true",
+                             help="Train data parallel across the cluster described by TF_CONFIG.")
+    trainParser.add_argument("--tf-config", dest="tfConfig", default=None,
+                             help="JSON file holding the TF_CONFIG for this worker. Implies --distributed.")
+    trainParser.add_argument("--local-workers", dest="localWorkers", type=int, default=1,
+                             help="Launch this many local worker processes as one cluster.")
+    trainParser.add_argument("--base-port", dest="basePort", type=int, default=20000,
+                             help="Port of the first local worker.")
+    trainParser.set_defaults(func=trainCommand)
+
+    evaluateParser = subparsers.add_parser("evaluate", help="Measure robustness to image corruption.")
+    evaluateParser.add_argument("--weights", required=True, help="Path to the model weights.")
+    evaluateParser.add_argument("--image", required=True, help="Path to the carrier image.")
+    evaluateParser.add_argument("--sentence", dest="sentences", action="append", required=True,
+                                help="Sentence to embed. May be given several times.")
+    evaluateParser.add_argument("--proportions", type=int, default=101,
+                                help="Number of evenly spaced corruption proportions between 0 and 1.")
+    evaluateParser.add_argument("--fill-modes", dest="fillModes", nargs="+", default=["black", "white", "random"],
+                                choices=["black", "white", "random"], help="Fill modes to corrupt with.")
+    evaluateParser.add_argument("--trials", type=int, default=1, help="Corrupted copies per proportion.")
+    evaluateParser.add_argument("--processes", type=int, default=None, help="Processes used for scoring.")
+    evaluateParser.add_argument("--results-dir", dest="resultsDirectory", default="../data/Evaluation",
+                                help="Directory to write the CSV/JSON results to.")
+    evaluateParser.add_argument("--plots-dir", dest="plotsDirectory", default="../img/Plots",
+                                help="Directory to write the plots to.")
+    evaluateParser.add_argument("--seed", type=int, default=None, help="Seed for the pixels corrupted.")
+    evaluateParser.set_defaults(func=evaluateCommand)
+
+    ingestParser = subparsers.add_parser("ingest", help="Pack carrier images into a memory-mapped store.")
+    ingestParser.add_argument("source", help="Directory to search recursively for images.")
+    ingestParser.add_argument("store", help="Directory to write the store to.")
+    ingestParser.add_argument("--image-size", dest="imageSize", type=int, required=True,
+                              help="Side length to resize the images to.")
+    ingestParser.add_argument("--grey-scale", dest="greyScale", action="store_true", help="Store greyscale images.")
+    ingestParser.add_argument("--shard-size", dest="shardSize", type=int, default=4096,
+                              help="Maximum number of images per shard.")
+    ingestParser.add_argument("--workers", type=int, default=8, help="Number of threads decoding images.")
+    ingestParser.set_defaults(func=ingestCommand)
+
+    quantizeParser = subparsers.add_parser("quantize", help="Export int8 quantized models for CPU inference.")
+    quantizeParser.add_argument("--weights", required=True, help="Path to the float model weights.")
+    quantizeParser.add_argument("--output", required=True, help="Directory to write the quantized models to.")
+    quantizeParser.add_argument("--report-image", dest="reportImage", default=None,
+                                help="Carrier image to compare latency, size and recovery against the float model with.")
+    quantizeParser.add_argument("--sentences", nargs="+", default=["Hello there - General Kenobi"],
+                                help="Sentences to embed for the report.")
+    quantizeParser.add_argument("--results-directory", dest="resultsDirectory", default=None,
+                                help="Directory to write the report to as CSV and JSON.")
+    quantizeParser.set_defaults(func=quantizeCommand)
+
+    benchmarkParser = subparsers.add_parser("benchmark", help="Benchmark the pipeline on randomly initialized models.")
+    benchmarkParser.add_argument("--image-sizes", dest="imageSizes", type=int, nargs="+", default=[32, 64],
+                                 help="Model image sizes to benchmark.")
+    benchmarkParser.add_argument("--batch-sizes", dest="batchSizes", type=int, nargs="+", default=[1, 8],
+                                 help="Batch sizes to benchmark.")
+    benchmarkParser.add_argument("--proportions", type=float, nargs="+", default=[0.1, 0.5],
+                                 help="Corruption proportions to benchmark.")
+    benchmarkParser.add_argument("--repeats", type=int, default=10, help="Timed calls per benchmark.")
+    benchmarkParser.add_argument("--save-baseline", dest="saveBaseline", default=None,
+                                 help="JSON file to store the results in as a baseline.")
+    benchmarkParser.add_argument("--baseline", default=None,
+                                 help="Baseline to compare against. Exits with status 1 on a regression.")
+    benchmarkParser.add_argument("--tolerance", type=float, default=0.1,
+                                 help="Relative slowdown tolerated before reporting a regression.")
+    benchmarkParser.set_defaults(func=benchmarkCommand)
+
+    sweepParser = subparsers.add_parser("sweep", help="Search training configurations with successive halving.")
+    sweepParser.add_argument("directory", help="Directory to write the trials and results table to.")
+    sweepParser.add_argument("--image-sizes", dest="imageSizes", type=int, nargs="+", default=[100])
+    sweepParser.add_argument("--dictionary-lengths", dest="dictionaryLengths", type=int, nargs="+", default=[200])
+    sweepParser.add_argument("--batch-sizes", dest="batchSizes", type=int, nargs="+", default=[32])
+    sweepParser.add_argument("--sentence-lengths", dest="sentenceLengths", type=int, nargs="+", default=None,
+                             help="Characters embedded per image. Each must divide the image size squared.")
+    sweepParser.add_argument("--decoder-units", dest="decoderUnits", type=int, nargs="+", default=None,
+                             help="Widths of the decoder's hidden layer.")
+    sweepParser.add_argument("--grey-scale", dest="greyScale", nargs="+", default=None, choices=("true", "false"),
+                             help="Whether to train on grey scale images. Pass both to sweep over it.")
+    sweepParser.add_argument("--thresholds", type=float, nargs="+", default=None,
+                             help="Early stopping thresholds on image reconstruction loss.")
+    sweepParser.add_argument("--steps-per-epoch", dest="stepsPerEpoch", type=int, default=100)
+    sweepParser.add_argument("--min-epochs", dest="minEpochs", type=int, default=1,
+                             help="Epochs every configuration trains for.")
+    sweepParser.add_argument("--max-epochs", dest="maxEpochs", type=int, default=9,
+                             help="Epochs the surviving configurations train for.")
+    sweepParser.add_argument("--reduction-factor", dest="reductionFactor", type=int, default=3,
+                             help="Factor by which trials are cut and epochs grow per rung.")
+    sweepParser.add_argument("--processes", type=int, default=None,
+                             help="Trials trained at once. CPU cores are split evenly between them.")
+    sweepParser.add_argument("--use-dataset", dest="useDataset", action="store_true",
+                             help="Feed the models through the tf.data pipeline.")
+    sweepParser.add_argument("--seed", type=int, default=0, help="Seed for the data each trial trains on.")
+    sweepParser.set_defaults(func=sweepCommand)
+
+    summarizeParser = subparsers.add_parser("summarize", help="Report where training time went.")
+    summarizeParser.add_argument("log", help="Instrumentation log written by train --instrumentation-log.")
+    summarizeParser.set_defaults(func=summarizeCommand)
+
+    serveParser = subparsers.add_parser("serve", help="Serve encrypt/decrypt requests with micro-batching.")
+    serveParser.add_argument("--weights", required=True, help="Path to the model weights.")
+    serveParser.add_argument("--max-batch-size", dest="maxBatchSize", type=int, default=None,
+                             help="Maximum requests per model call. Defaults to the model's batch size.")
+    serveParser.add_argument("--max-wait-ms", dest="maxWaitMs", type=float, default=5.0,
+                             help="Maximum milliseconds to wait for a batch to fill.")
+    serveParser.add_argument("--host", default="127.0.0.1", help="Host to listen on.")
+    serveParser.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    serveParser.add_argument("--unix-socket", dest="unixSocket", default=None,
+                             help="Listen on this Unix socket instead of host and port.")
+    serveParser.add_argument("--profile", action="store_true",
+                             help="Time each pipeline stage and serve the histograms from /metrics.")
+    serveParser.set_defaults(func=serveCommand)
+
+    importTimeParser = subparsers.add_parser("importtime", help="Benchmark module import times.")
+    importTimeParser.add_argument("--modules", nargs="+",
+                                  default=["ImageIO", "ImageCorruptor", "CryptoNet", "ModelGenerator"],
+                                  help="Modules to import.")
+    importTimeParser.add_argument("--repeats", type=int, default=5, help="Number of fresh interpreters per module.")
+    importTimeParser.set_defaults(func=importTimeCommand)
+
+    return parser
+
+
+def main(argv: list = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+
+    args = getParser().parse_args(argv)
+
+    # Kept so that train --local-workers can forward the arguments it was given to its workers
+    args.argv = list(argv)
+    args.func(args)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
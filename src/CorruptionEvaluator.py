@@ -0,0 +1,226 @@
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from CryptoNet import CryptoNet
+from ImageCorruptor import ImageCorruptor
+from Levenshtein.StringMatcher import distance
+from Levenshtein.StringMatcher import ratio
+from matplotlib.figure import Figure
+
+
+FILL_MODES = {
+    "black": dict(corruptValue=(0.0, 0.0, 0.0), useRandomColors=False),
+    "white": dict(corruptValue=(1.0, 1.0, 1.0), useRandomColors=False),
+    "random": dict(corruptValue=(0.0, 0.0, 0.0), useRandomColors=True)
+}
+
+# Columns of each result row, in the order they are written
+RESULT_FIELDS = ("fillMode", "sentenceIndex", "proportionToCorrupt", "trial", "decryptedSentence", "levenshteinDistance", "levenshteinRatio")
+
+
+def scoreDecryption(pair: tuple) -> tuple:
+    """
+    Computes the Levenshtein distance and ratio between an original and a decrypted sentence.
+    Defined at module level so that it can be shipped to worker processes.
+
+    :param pair: Tuple of (original sentence, decrypted sentence)
+    :return: Tuple of (Levenshtein distance, Levenshtein ratio)
+    """
+    original, decrypted = pair
+
+    return distance(original, decrypted), ratio(original, decrypted)
+
+
+class CorruptionEvaluator(object):
+    def __init__(self, cryptoNet: CryptoNet, seed: int = None, numProcesses: int = None, quantize: bool = True):
+        """
+        This class measures how well sentences survive corruption of the images they are embedded
+        within. Everything happens in memory: each sentence is encrypted once, and the corrupted
+        copies for every sentence, proportion and trial are produced and decrypted in full batches
+        of the model's batchSize, then scored with a process pool.
+
+        :param cryptoNet: CryptoNet used to encrypt and decrypt
+        :param seed: Seed for the pixels corrupted and the random colors used
+        :param numProcesses: Number of processes used to compute Levenshtein metrics. Defaults to the CPU count
+        :param quantize: Whether or not to round embedded images to 8 bit levels, mimicking a save to PNG
+        """
+        self.cryptoNet = cryptoNet
+        self.seed = seed
+        self.numProcesses = numProcesses
+        self.quantize = quantize
+
+    def embed(self, imageFilePath: str, sentences: list) -> np.array:
+        """
+        Embeds each sentence within the image
+
+        :param imageFilePath: File path to the carrier image
+        :param sentences: Sentences to embed
+        :return: Numpy array of the embedded images, one per sentence
+        """
+        embeddedImages = np.stack([
+            imageWithEmbeddedText
+            for _, imageWithEmbeddedText in self.cryptoNet.encryptBatch(
+                pairs=((imageFilePath, sentence) for sentence in sentences)
+            )
+        ])
+        embeddedImages = np.clip(embeddedImages, a_min=0.0, a_max=1.0)
+
+        if self.quantize:
+            embeddedImages = np.round(embeddedImages * 255.0) / 255.0
+
+        return embeddedImages.astype(np.float32)
+
+    def evaluate(self,
+                 imageFilePath: str,
+                 sentences: list,
+                 proportionsToCorrupt: np.array = None,
+                 fillModes: tuple = ("black", "white", "random"),
+                 trials: int = 1) -> list:
+        """
+        Runs the corruption sweep
+
+        :param imageFilePath: File path to the carrier image
+        :param sentences: Sentences to embed
+        :param proportionsToCorrupt: Proportions of pixels to corrupt. Defaults to 0%, 1%, ..., 100%
+        :param fillModes: Fill modes to corrupt with. Any of black, white and random
+        :param trials: Number of independently corrupted copies per sentence, fill mode and proportion
+        :return: List of result rows, one per sentence, fill mode, proportion and trial
+        """
+        if proportionsToCorrupt is None:
+            proportionsToCorrupt = np.linspace(0, 1, 101)
+
+        for fillMode in fillModes:
+            if fillMode not in FILL_MODES:
+                raise ValueError(f"Fill mode must be one of {', '.join(FILL_MODES)}.")
+
+        embeddedImages = self.embed(imageFilePath=imageFilePath, sentences=sentences)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(fillModes))
+
+        rows = []
+        pairs = []
+        batchSize = self.cryptoNet.batchSize
+
+        for fillMode, seed in zip(fillModes, seeds):
+            corruptor = ImageCorruptor(greyScale=self.cryptoNet.greyScale, seed=seed, **FILL_MODES[fillMode])
+            copies = [
+                (sentenceIdx, float(proportionToCorrupt), trial)
+                for sentenceIdx in range(len(sentences))
+                for proportionToCorrupt in proportionsToCorrupt
+                for trial in range(trials)
+            ]
+
+            # Full batches of copies are decrypted at a time, however they fall across sentences and proportions
+            for start in range(0, len(copies), batchSize):
+                batch = copies[start:start + batchSize]
+                corruptedImages = embeddedImages[[sentenceIdx for sentenceIdx, _, _ in batch]]
+                offset = 0
+
+                for proportionToCorrupt, group in itertools.groupby(batch, key=lambda copy: copy[1]):
+                    count = len(list(group))
+                    corruptor.corruptImages(
+                        images=corruptedImages[offset:offset + count],
+                        proportionToCorrupt=proportionToCorrupt,
+                        inPlace=True
+                    )
+                    offset += count
+
+                decryptedSentences = self.cryptoNet.decodeBatch(corruptedImages)
+
+                for (sentenceIdx, proportionToCorrupt, trial), decryptedSentence in zip(batch, decryptedSentences):
+                    rows.append({
+                        "fillMode": fillMode,
+                        "sentenceIndex": sentenceIdx,
+                        "proportionToCorrupt": proportionToCorrupt,
+                        "trial": trial,
+                        "decryptedSentence": decryptedSentence
+                    })
+                    pairs.append((sentences[sentenceIdx], decryptedSentence))
+
+        numProcesses = self.numProcesses if self.numProcesses is not None else (os.cpu_count() or 1)
+
+        # Spawned rather than forked, since the parent has TensorFlow loaded
+        with ProcessPoolExecutor(max_workers=numProcesses, mp_context=multiprocessing.get_context("spawn")) as pool:
+            scores = pool.map(scoreDecryption, pairs, chunksize=max(1, len(pairs) // (4 * numProcesses)))
+
+            for row, (levenshteinDistance, levenshteinRatio) in zip(rows, scores):
+                row["levenshteinDistance"] = levenshteinDistance
+                row["levenshteinRatio"] = levenshteinRatio
+
+        return rows
+
+    @staticmethod
+    def writeResults(rows: list, outputDirectory: str, fileName: str = "LevenshteinResults") -> None:
+        """
+        Writes the results of a sweep as both CSV and JSON
+
+        :param rows: Result rows returned by evaluate
+        :param outputDirectory: Directory to write the results to
+        :param fileName: Name of the files to write, without extension
+        """
+        os.makedirs(outputDirectory, exist_ok=True)
+
+        with open(os.path.join(outputDirectory, f"{fileName}.csv"), "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=list(RESULT_FIELDS))
+            writer.writeheader()
+            writer.writerows(rows)
+
+        with open(os.path.join(outputDirectory, f"{fileName}.json"), "w", encoding="utf-8") as file:
+            json.dump(rows, file, indent=2)
+
+    @staticmethod
+    def loadResults(resultsFilePath: str) -> list:
+        """
+        Loads results previously written by writeResults
+
+        :param resultsFilePath: Path to the JSON results file
+        :return: List of result rows
+        """
+        with open(resultsFilePath, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    @staticmethod
+    def plotResults(rows: list, outputDirectory: str) -> None:
+        """
+        Regenerates the LevenshteinDistance<FillMode>.png and LevenshteinRatio<FillMode>.png plots,
+        averaging over sentences and trials at each proportion
+
+        :param rows: Result rows returned by evaluate or loadResults
+        :param outputDirectory: Directory to save the plots to
+        """
+        os.makedirs(outputDirectory, exist_ok=True)
+
+        for fillMode in sorted({row["fillMode"] for row in rows}):
+            modeRows = [row for row in rows if row["fillMode"] == fillMode]
+            proportions = np.array(sorted({row["proportionToCorrupt"] for row in modeRows}))
+
+            for metric, label in (("levenshteinDistance", "Levenshtein Distance"), ("levenshteinRatio", "Levenshtein Ratio")):
+                means = np.array([
+                    np.mean([row[metric] for row in modeRows if row["proportionToCorrupt"] == proportion])
+                    for proportion in proportions
+                ])
+
+                fig = Figure(figsize=(10, 10))
+                ax = fig.subplots()
+                ax.plot(100 * proportions, means)
+                ax.set_xlabel("Percent of Pixels Corrupted", fontsize=24)
+                ax.set_ylabel(label, fontsize=24)
+                ax.set_title(f"{label} ({fillMode.capitalize()} Pixels)", fontsize=28)
+                ax.tick_params(labelsize=22)
+                fig.savefig(os.path.join(outputDirectory, f"{label.replace(' ', '')}{fillMode.capitalize()}.png"))
+
+
+if __name__ == "__main__":
+    testSentence = "A black hole really is an object with very rich structure, just like Earth has a rich structure of mountains, valleys, oceans, and so forth. Its warped space whirls around the central singularity like air in a tornado."
+
+    cryptoNet = CryptoNet(weightsFilePath="../data/ModelWeights/pickup.h5")
+    evaluator = CorruptionEvaluator(cryptoNet=cryptoNet, seed=0)
+
+    results = evaluator.evaluate(imageFilePath="../img/Raw/twister.png", sentences=[testSentence])
+
+    evaluator.writeResults(rows=results, outputDirectory="../data/Evaluation")
+    evaluator.plotResults(rows=results, outputDirectory="../img/Plots")
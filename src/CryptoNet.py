@@ -1,17 +1,39 @@
-import matplotlib.pyplot as plt
+import glob
+import os
 import pickle
+import queue
+import threading
 import numpy as np
 
-from ModelGenerator import ModelGenerator
-from ImageCorruptor import ImageCorruptor
-from matplotlib.image import imread
-from matplotlib.image import imsave
-from Levenshtein.StringMatcher import distance
-from Levenshtein.StringMatcher import ratio
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from ImageIO import AsyncImageWriter
+from ImageIO import readImage
+from ImageIO import readImageInto
+from ImageIO import writeImage
+from ModelRegistry import ModelRegistry
+from StageProfiler import NULL_STAGE
+from StageProfiler import StageProfiler
+from TextCodec import TextCodec
+from TextCodec import decodeMessage
+from TextCodec import encodeMessage
+
+
+# Each tile's sentence starts with two base pepperStart digits for the tile index and two for the chunk length
+TILE_HEADER_LENGTH = 4
 
 
 class CryptoNet(object):
-    def __init__(self, weightsFilePath: str):
+    def __init__(self,
+                 weightsFilePath: str,
+                 seed: int = None,
+                 registry: ModelRegistry = None,
+                 useCompiledInference: bool = False,
+                 jitCompile: bool = False,
+                 imageWriter: AsyncImageWriter = None,
+                 profile: bool = False,
+                 traceModelCalls: bool = False):
         """
         This class is designed with the purpose of encrypting text into an image and decrypting the
         message from the image.
@@ -20,43 +42,197 @@ class CryptoNet(object):
         have the same name (including .h5) that holds the information regarding the imageSize, greyScale,
         sentenceLength, dictionaryLength, and batchSize.
 
+        weightsFilePath may also be a SavedModel directory written by exportSavedModel, in which case
+        the compiled signatures are loaded directly rather than rebuilding the model, or a directory
+        written by exportQuantized, in which case the int8 TensorFlow Lite models are run.
+
 
         :param weightsFilePath: Fully qualified path to the file in which the model weights are stores
+        :param seed: Seed for the positions and characters used when peppering sentences
+        :param registry: Optional ModelRegistry to share built models between instances
+        :param useCompiledInference: Whether or not to run the encoder and decoder through fixed shape
+                                     tf.function signatures rather than Keras predict
+        :param jitCompile: Whether or not to compile those signatures with XLA
+        :param imageWriter: Optional AsyncImageWriter that saved outputs are queued on instead of being
+                            written before returning. Call flush before reading the outputs back
+        :param profile: Whether or not to time each pipeline stage. See stats and prometheusText
+        :param traceModelCalls: Whether or not to also annotate encoder and decoder calls in TensorFlow
+                                profiler traces. Implies profile
         """
         file = open(f"{weightsFilePath}.p", "rb")
         modelParameters = pickle.load(file=file)
         file.close()
 
+        self.modelParameters = modelParameters
+
         self.imageSize = modelParameters["imageSize"]
         self.greyScale = modelParameters["greyScale"]
         self.sentenceLength = modelParameters["sentenceLength"]
         self.dictionaryLength = modelParameters["dictionaryLength"]
         self.batchSize = modelParameters["batchSize"]
-        self.pepper = [chr(idx) for idx in range(int(0.8 * self.dictionaryLength), self.dictionaryLength)]
+        self.pepperStart = int(0.8 * self.dictionaryLength)
+        self.codec = TextCodec(dictionaryLength=self.dictionaryLength, pepperStart=self.pepperStart)
+        self.rng = np.random.default_rng(seed)
+        self.imageWriter = imageWriter
+        self.profiler = StageProfiler(traceModelCalls=traceModelCalls) if profile or traceModelCalls else None
+
+        self.engine = None
+
+        if os.path.isdir(weightsFilePath):
+            from InferenceEngine import InferenceEngine
+            from QuantizedEngine import QuantizedEngine
+            from QuantizedEngine import isQuantizedModel
+
+            self.model, self.encoder, self.decoder = None, None, None
+
+            if isQuantizedModel(path=weightsFilePath):
+                self.engine = QuantizedEngine(quantizedModelPath=weightsFilePath)
+            else:
+                self.engine = InferenceEngine.load(savedModelPath=weightsFilePath)
+        elif registry is not None:
+            self.model, self.encoder, self.decoder = registry.getModels(
+                weightsFilePath=weightsFilePath,
+                modelParameters=modelParameters
+            )
+        else:
+            # Deferred so that importing this module does not pull in TensorFlow
+            from ModelGenerator import ModelGenerator
+
+            modelGenerator = ModelGenerator.fromParameters(modelParameters=modelParameters)
 
-        modelGenerator = ModelGenerator(
-            imageSize=self.imageSize,
-            greyScale=self.greyScale,
-            dictionaryLength=self.dictionaryLength
-        )
+            self.model, self.encoder, self.decoder = modelGenerator.getModel(compileModel=False)
+            self.model.load_weights(filepath=weightsFilePath)
 
         if self.greyScale:
             self.imageSize = (self.imageSize, self.imageSize, 1)
         else:
             self.imageSize = (self.imageSize, self.imageSize, 3)
 
-        self.model, self.encoder, self.decoder = modelGenerator.getModel()
-        self.model.load_weights(filepath=weightsFilePath)
+        if useCompiledInference and self.engine is None:
+            from InferenceEngine import InferenceEngine
+
+            self.engine = InferenceEngine.fromModels(
+                encoder=self.encoder,
+                decoder=self.decoder,
+                imageSize=self.imageSize,
+                sentenceLength=self.sentenceLength,
+                jitCompile=jitCompile
+            )
+
+    @property
+    def pepper(self) -> list:
+        """
+        :return: Characters reserved for peppering sentences, taken from the codec
+        """
+        return [chr(code) for code in range(self.codec.pepperStart, self.codec.dictionaryLength)]
+
+    def exportSavedModel(self, savedModelPath: str, jitCompile: bool = False) -> None:
+        """
+        This method exports the encoder and decoder as a SavedModel with fixed shape signatures,
+        along with the usual parameters file, so that CryptoNet(savedModelPath) can load it without
+        rebuilding the model.
+
+        :param savedModelPath: Directory to write the SavedModel to
+        :param jitCompile: Whether or not the exported signatures are compiled with XLA
+        """
+        from InferenceEngine import InferenceEngine
+
+        if self.encoder is None:
+            engine = self.engine
+        else:
+            engine = InferenceEngine.fromModels(
+                encoder=self.encoder,
+                decoder=self.decoder,
+                imageSize=self.imageSize,
+                sentenceLength=self.sentenceLength,
+                jitCompile=jitCompile
+            )
+
+        engine.export(savedModelPath=savedModelPath)
+
+        file = open(f"{savedModelPath}.p", "wb")
+        pickle.dump(obj=self.modelParameters, file=file)
+        file.close()
+
+    def stage(self, name: str):
+        """
+        This method times a pipeline stage when profiling is enabled
+
+        :param name: Stage name
+        :return: Context manager wrapping the stage
+        """
+        return self.profiler.stage(name=name) if self.profiler is not None else NULL_STAGE
+
+    def modelStage(self, name: str):
+        """
+        This method times an encoder or decoder call when profiling is enabled
+
+        :param name: Stage name
+        :return: Context manager wrapping the call
+        """
+        return self.profiler.modelStage(name=name) if self.profiler is not None else NULL_STAGE
+
+    def stats(self) -> dict:
+        """
+        This method reports the count and latency histogram of each pipeline stage: readImage,
+        cropPad, pepperSentences, encode, clip, writeImage, decode, and stripPepper
+
+        :return: Dictionary of statistics per stage. Empty when profiling is disabled
+        """
+        return self.profiler.stats() if self.profiler is not None else {}
+
+    def prometheusText(self) -> str:
+        """
+        :return: The stage latency histograms in the Prometheus text exposition format
+        """
+        return self.profiler.prometheusText() if self.profiler is not None else ""
+
+    def saveImage(self, imageFilePath: str, image: np.array) -> None:
+        """
+        This method saves an output image, on the image writer's threads when one was given
+
+        :param imageFilePath: Location to save the image
+        :param image: Image to save. Must not be modified afterwards when an image writer is used
+        """
+        # With an image writer the write is timed on its thread; queueWrite only covers waiting for a slot
+        if self.imageWriter is not None:
+            with self.stage("queueWrite"):
+                self.imageWriter.submit(imageFilePath=imageFilePath, image=image, profiler=self.profiler)
+        else:
+            with self.stage("writeImage"):
+                writeImage(imageFilePath=imageFilePath, image=image)
+
+    def flush(self) -> None:
+        """
+        This method waits for every output queued on the image writer to be written
+        """
+        if self.imageWriter is not None:
+            self.imageWriter.flush()
+
+    def exportQuantized(self, quantizedModelPath: str) -> None:
+        """
+        This method exports int8 weight quantized versions of the encoder and decoder, along with
+        the usual parameters file, so that CryptoNet(quantizedModelPath) runs them. See
+        QuantizedEngine.compareQuantized for checking how well sentences are recovered with them.
+
+        :param quantizedModelPath: Directory to write the quantized models to
+        """
+        from QuantizedEngine import exportQuantized
+
+        if self.encoder is None:
+            raise ValueError("Quantized models can only be exported from float weights.")
+
+        exportQuantized(cryptoNet=self, quantizedModelPath=quantizedModelPath)
 
     @staticmethod
     def messageEncode(message: str) -> np.array:
         """
-        This method takes a string and converts it to a numpy array using ord
+        This method takes a string and converts it to a numpy array of character codes
 
         :param message: String to be converted to a numpy array
         :return: Numpy array
         """
-        return np.array([ord(char) for char in message])
+        return encodeMessage(message=message)
 
     @staticmethod
     def messageDecode(message: np.array) -> str:
@@ -66,7 +242,7 @@ class CryptoNet(object):
         :param message: Numpy array to be decoded
         :return: Decoded message string
         """
-        return "".join(chr(codePoint) for codePoint in message)
+        return decodeMessage(codes=message)
 
     def preprocessSentence(self, sentence: str) -> np.array:
         """
@@ -77,61 +253,173 @@ class CryptoNet(object):
         :param sentence: String to be embedded into the image
         :return: The pre-processed string, now ready to be embedded into an image
         """
+        return self.preprocessSentences(sentences=[sentence])
 
-        if not 0 < len(sentence) <= self.sentenceLength:
-            raise ValueError(f"Length of string must be between 0 and {self.sentenceLength + 1}.")
+    def preprocessSentences(self, sentences: list) -> np.array:
+        """
+        This method pre-processes many sentences at once into a single matrix. Rather than inserting
+        pepper characters one at a time, every row starts out as random pepper and the characters of
+        each sentence are scattered, in order, into randomly chosen positions.
+
+        :param sentences: Strings to be embedded into images
+        :return: Int32 matrix of shape (len(sentences), sentenceLength) holding the pre-processed sentences
+        """
+        if len(sentences) == 0:
+            return np.empty(shape=(0, self.sentenceLength), dtype=np.int32)
 
-        characters = set(sentence)
-        if any(character in self.pepper for character in characters):
-            raise ValueError(f"String contains invalid characters.")
+        with self.stage("pepperSentences"):
+            codes, lengths = self.codec.encodeBatch(sentences=sentences, maxLength=self.sentenceLength)
 
-        pepperedSentence = sentence
-        count = 0
-        while len(pepperedSentence) < self.sentenceLength:
-            count += 1
-            idx = np.random.randint(low=0, high=len(pepperedSentence) + 1)
-            character = np.random.choice(self.pepper)
-            pepperedSentence = pepperedSentence[:idx] + character + pepperedSentence[idx:]
+            pepperedSentences = self.rng.integers(
+                low=self.pepperStart,
+                high=self.dictionaryLength,
+                size=(len(sentences), self.sentenceLength),
+                dtype=np.int32
+            )
 
-        encodedSentence = np.expand_dims(self.messageEncode(pepperedSentence), axis=0)
+            # The first length positions of a random permutation of each row hold that row's sentence.
+            # Boolean indexing walks the mask in row-major order, which keeps the characters in order.
+            # permuted shuffles each row in linear time, unlike argsorting random keys.
+            positions = self.rng.permuted(np.broadcast_to(np.arange(self.sentenceLength), pepperedSentences.shape), axis=1)
+            sentenceMask = np.zeros(shape=pepperedSentences.shape, dtype=bool)
+            np.put_along_axis(sentenceMask, positions, np.arange(self.sentenceLength) < lengths[:, np.newaxis], axis=1)
 
-        return encodedSentence
+            pepperedSentences[sentenceMask] = codes
 
-    def preprocessImage(self, imageFilePath: str) -> np.array:
+        return pepperedSentences
+
+    def preprocessImage(self, imageFilePath: any([np.array, str])) -> np.array:
         """
         This method is responsible for pre-processing the image. It naively crops the image in any
         dimension that is too large, and appends the average pixel color to spatial dimensions that
         are too short.
 
-        :param imageFilePath: File path to the image being used
+        :param imageFilePath: File path to the image being used, or a numpy array representing it
         :return: The pre-processed image, now ready to have text embedded within it
         """
-        img = imread(imageFilePath)
+        if type(imageFilePath) == str:
+            with self.stage("readImage"):
+                img = readImage(imageFilePath=imageFilePath)
+        else:
+            img = np.asarray(imageFilePath)
 
-        # Crop
-        if img.shape[0] > self.imageSize[0]:
-            img = img[:self.imageSize[0], :, :]
+        with self.stage("cropPad"):
+            # Crop
+            if img.shape[0] > self.imageSize[0]:
+                img = img[:self.imageSize[0], :, :]
 
-        if img.shape[1] > self.imageSize[1]:
-            img = img[:, :self.imageSize[1], :]
+            if img.shape[1] > self.imageSize[1]:
+                img = img[:, :self.imageSize[1], :]
 
-        if img.shape[2] > self.imageSize[2]:
-            img = img[:, :, :self.imageSize[2]]
+            if img.shape[2] > self.imageSize[2]:
+                img = img[:, :, :self.imageSize[2]]
 
-        # Pad
-        averageColor = img.mean(axis=1).mean(axis=0)
-        paddedImage = np.full(shape=self.imageSize, fill_value=averageColor)
-        imgWidthOffset = (self.imageSize[0] - img.shape[0]) // 2
-        imgHeightOffset = (self.imageSize[1] - img.shape[1]) // 2
+            # Pad
+            averageColor = img.mean(axis=1).mean(axis=0)
+            paddedImage = np.full(shape=self.imageSize, fill_value=averageColor)
+            imgWidthOffset = (self.imageSize[0] - img.shape[0]) // 2
+            imgHeightOffset = (self.imageSize[1] - img.shape[1]) // 2
 
-        paddedImage[
-            imgWidthOffset:imgWidthOffset + img.shape[0],
-            imgHeightOffset:imgHeightOffset + img.shape[1],
-            :
-        ] = img
+            paddedImage[
+                imgWidthOffset:imgWidthOffset + img.shape[0],
+                imgHeightOffset:imgHeightOffset + img.shape[1],
+                :
+            ] = img
 
         return np.expand_dims(paddedImage, axis=0)
 
+    @staticmethod
+    def getOutputPaths(imageFilePath: any([np.array, str]), embeddedOutputPath: str = None, preProcessedOutputPath: str = None) -> tuple:
+        """
+        This method determines where the embedded and pre-processed images are saved. Paths not
+        supplied are derived from imageFilePath by swapping img/Raw/ for img/Embedded/ and
+        img/PreProcessed/ respectively.
+
+        :param imageFilePath: File path of the image text is embedded within
+        :param embeddedOutputPath: Location to save the image with embedded text
+        :param preProcessedOutputPath: Location to save the pre-processed image
+        :return: Tuple of (embeddedOutputPath, preProcessedOutputPath)
+        """
+        if (embeddedOutputPath is None or preProcessedOutputPath is None) and type(imageFilePath) != str:
+            raise ValueError("Output paths must be specified when saving output for images passed as arrays.")
+
+        if embeddedOutputPath is None:
+            embeddedOutputPath = imageFilePath.replace(r"img/Raw/", r"img/Embedded/")
+
+        if preProcessedOutputPath is None:
+            preProcessedOutputPath = imageFilePath.replace(r"img/Raw/", r"img/PreProcessed/")
+
+        return embeddedOutputPath, preProcessedOutputPath
+
+    def encodeBatch(self, images: np.array, sentences: np.array) -> np.array:
+        """
+        This method runs the encoder on a batch of pre-processed images and sentences in a single call
+
+        :param images: Pre-processed images stacked along the first axis
+        :param sentences: Pre-processed sentences stacked along the first axis
+        :return: The images with the sentences embedded within them
+        """
+        with self.modelStage("encode"):
+            if self.engine is not None:
+                return self.engine.encode(images=images, sentences=sentences)
+
+            return np.asarray(self.encoder.predict_on_batch([images, sentences]))
+
+    def encryptBatch(self, pairs, saveOutput: bool = False, outputPaths=None, batchSize: int = None):
+        """
+        This method encrypts many sentences at once. Images and sentences are pre-processed and
+        stacked, then run through the encoder batchSize at a time. Results are yielded in the
+        order the pairs were given. When saving output, the images of one batch are written on
+        background threads while the next batch is encoded, through the instance's image writer
+        or a temporary one holding at most two batches of outstanding writes.
+
+        :param pairs: Iterable of (image, sentence) pairs. Each image is a file path or a numpy array
+        :param saveOutput: Whether or not to save the output
+        :param outputPaths: Optional iterable of (embeddedOutputPath, preProcessedOutputPath) tuples
+                            aligned with pairs. Required when saving output for array images
+        :param batchSize: Number of pairs per encoder call. Defaults to the model's batchSize
+        :return: Generator of (pre-processed image, image with embedded text) tuples
+        """
+        if batchSize is None:
+            batchSize = self.batchSize
+
+        pairs = iter(pairs)
+
+        if outputPaths is not None:
+            outputPaths = iter(outputPaths)
+
+        writer = self.imageWriter if self.imageWriter is not None else AsyncImageWriter(maxPending=4 * batchSize)
+
+        try:
+            while True:
+                chunk = list(islice(pairs, batchSize))
+
+                if not chunk:
+                    break
+
+                images = np.concatenate([self.preprocessImage(imageFilePath=image) for image, _ in chunk])
+                sentences = self.preprocessSentences(sentences=[sentence for _, sentence in chunk])
+                imagesWithEmbeddedText = self.encodeBatch(images=images, sentences=sentences)
+
+                for idx, (image, _) in enumerate(chunk):
+                    if saveOutput:
+                        paths = next(outputPaths) if outputPaths is not None else (None, None)
+                        embeddedOutputPath, preProcessedOutputPath = self.getOutputPaths(image, *paths)
+
+                        with self.stage("clip"):
+                            clippedImage = np.clip(imagesWithEmbeddedText[idx], a_min=0.0, a_max=1.0)
+
+                        with self.stage("queueWrite"):
+                            writer.submit(imageFilePath=preProcessedOutputPath, image=images[idx], profiler=self.profiler)
+                            writer.submit(imageFilePath=embeddedOutputPath, image=clippedImage, profiler=self.profiler)
+
+                    yield images[idx], imagesWithEmbeddedText[idx]
+
+            writer.flush()
+        finally:
+            if writer is not self.imageWriter:
+                writer.close()
+
     def encrypt(self, imageFilePath: str, sentence: str, saveOutput: bool = False, embeddedOutputPath: str = None, preProcessedOutputPath: str = None):
         """
         This method takes an image and sentence and encrypts the sentence by embedding it
@@ -145,11 +433,12 @@ class CryptoNet(object):
         :param preProcessedOutputPath: Location to save the pre-processed image
         :return: The pre-procsessed image and the image with the sentence embedded within it
         """
-        if saveOutput and embeddedOutputPath is None:
-            embeddedOutputPath = imageFilePath.replace(r"img/Raw/", r"img/Embedded/")
-
-        if saveOutput and preProcessedOutputPath is None:
-            preProcessedOutputPath = imageFilePath.replace(r"img/Raw/", r"img/PreProcessed/")
+        if saveOutput:
+            embeddedOutputPath, preProcessedOutputPath = self.getOutputPaths(
+                imageFilePath=imageFilePath,
+                embeddedOutputPath=embeddedOutputPath,
+                preProcessedOutputPath=preProcessedOutputPath
+            )
 
         # Pad the sentence appropriately
         encodedSentence = self.preprocessSentence(sentence=sentence)
@@ -157,14 +446,56 @@ class CryptoNet(object):
         # Adjust image size as necessary
         img = self.preprocessImage(imageFilePath=imageFilePath)
 
-        imageWithEmbeddedText = self.encoder.predict([img, encodedSentence])[0]
+        imageWithEmbeddedText = self.encodeBatch(images=img, sentences=encodedSentence)[0]
 
         if saveOutput:
-            imsave(fname=preProcessedOutputPath, arr=img[0])
-            imsave(fname=embeddedOutputPath, arr=np.clip(imageWithEmbeddedText, a_min=0.0, a_max=1.0))
+            with self.stage("clip"):
+                clippedImage = np.clip(imageWithEmbeddedText, a_min=0.0, a_max=1.0)
+
+            self.saveImage(imageFilePath=preProcessedOutputPath, image=img[0])
+            self.saveImage(imageFilePath=embeddedOutputPath, image=clippedImage)
 
         return img[0], imageWithEmbeddedText
 
+    def readImage(self, imageFilePath: str) -> np.array:
+        """
+        This method reads an image with embedded text from disk, keeping only the channels the model expects
+
+        :param imageFilePath: File path to the image
+        :return: Numpy array representing the image
+        """
+        with self.stage("readImage"):
+            if self.greyScale:
+                return readImage(imageFilePath=imageFilePath)[:, :, :1]
+            else:
+                return readImage(imageFilePath=imageFilePath)[:, :, :3]
+
+    def decodeCodes(self, images: np.array) -> np.array:
+        """
+        This method runs the decoder on a batch of images in a single call
+
+        :param images: Images with embedded text stacked along the first axis
+        :return: Array of the most likely character code at each sentence position of each image
+        """
+        with self.modelStage("decode"):
+            if self.engine is not None:
+                return self.engine.decode(images=images)
+
+            return np.asarray(self.decoder.predict_on_batch(images)).argmax(-1)
+
+    def decodeBatch(self, images: np.array) -> list:
+        """
+        This method runs the decoder on a batch of images in a single call and strips the pepper
+        from every decoded sentence at once
+
+        :param images: Images with embedded text stacked along the first axis
+        :return: List of the sentences embedded within each image
+        """
+        codes = self.decodeCodes(images=images)
+
+        with self.stage("stripPepper"):
+            return self.codec.decodeBatch(codes=codes)
+
     def decrypt(self, img: any([np.array, str])) -> str:
         """
         This method takes in an image (as an array or a filepath) and extracts the
@@ -175,18 +506,258 @@ class CryptoNet(object):
         :return: String information that was embedded within the image
         """
         if type(img) == str:
-            if self.greyScale:
-                img = imread(img)[:, :, :1]
+            img = self.readImage(imageFilePath=img)
+
+        return self.decodeBatch(np.expand_dims(img, axis=0))[0]
+
+    def decryptStream(self, source, batchSize: int = None, numWorkers: int = 4, queueDepth: int = None):
+        """
+        This method decrypts a stream of images. Files are decoded on a thread pool straight into
+        a small ring of preallocated batch buffers, tracked through a bounded queue, and the decoder
+        is run on full batches, so memory use is bounded by the queue depth rather than the number
+        of images.
+
+        :param source: A directory, a glob pattern, or an iterable of file paths and/or numpy arrays
+        :param batchSize: Number of images per decoder call. Defaults to the model's batchSize
+        :param numWorkers: Number of threads used to read images
+        :param queueDepth: Maximum number of images read ahead of the decoder. Defaults to twice batchSize
+        :return: Generator of (source, sentence) tuples in input order. The source is the file path,
+                 or the position in the iterable for images passed as arrays
+        """
+        if batchSize is None:
+            batchSize = self.batchSize
+
+        if queueDepth is None:
+            queueDepth = 2 * batchSize
+
+        if type(source) == str:
+            if os.path.isdir(source):
+                source = sorted(
+                    os.path.join(source, fileName)
+                    for fileName in os.listdir(source)
+                    if os.path.isfile(os.path.join(source, fileName))
+                )
+            elif os.path.exists(source):
+                # A file name may itself contain glob characters such as [ and ]
+                source = [source]
+            else:
+                source = sorted(glob.glob(source))
+
+        readQueue = queue.Queue(maxsize=queueDepth)
+        stop = threading.Event()
+        endOfStream = object()
+        producerErrors = []
+
+        # The producer runs at most queueDepth images ahead of the batch being gathered, so a batch
+        # buffer is only reused once the decoder is done with it
+        buffers = np.empty(shape=(queueDepth // batchSize + 3, batchSize, *self.imageSize), dtype=np.float32)
+
+        def readImageOrArray(item, out):
+            if type(item) == str:
+                readImageInto(imageFilePath=item, out=out)
             else:
-                img = imread(img)[:, :, :3]
+                out[...] = np.asarray(item)
+
+        def produce(pool):
+            try:
+                for idx, item in enumerate(source):
+                    if stop.is_set():
+                        break
+
+                    label = item if type(item) == str else idx
+                    out = buffers[(idx // batchSize) % len(buffers), idx % batchSize]
+                    readQueue.put((label, pool.submit(readImageOrArray, item, out)))
+            except Exception as error:
+                producerErrors.append(error)
+            finally:
+                readQueue.put((None, endOfStream))
+
+        with ThreadPoolExecutor(max_workers=numWorkers) as pool:
+            producer = threading.Thread(target=produce, args=(pool, ), daemon=True)
+            producer.start()
+
+            try:
+                finished = False
+                batchIndex = 0
+
+                while not finished:
+                    labels = []
+                    futures = []
+
+                    while len(futures) < batchSize:
+                        label, future = readQueue.get()
+
+                        if future is endOfStream:
+                            finished = True
+                            break
 
-        decodedArray = self.decoder.predict(np.expand_dims(img, axis=0))[0].argmax(-1)
-        decodedSentence = self.messageDecode(decodedArray)
+                        labels.append(label)
+                        futures.append(future)
 
-        return "".join([char for char in decodedSentence if char not in self.pepper])
+                    if not futures:
+                        break
+
+                    for future in futures:
+                        future.result()
+
+                    images = buffers[batchIndex % len(buffers), :len(futures)]
+                    batchIndex += 1
+
+                    for label, sentence in zip(labels, self.decodeBatch(images)):
+                        yield label, sentence
+
+                if producerErrors:
+                    raise producerErrors[0]
+            finally:
+                stop.set()
+
+                # Unblock the producer if the consumer stopped early
+                while producer.is_alive():
+                    try:
+                        readQueue.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+
+    def encodeTileHeader(self, tileIndex: int, chunkLength: int) -> str:
+        """
+        This method builds the header prefixed to the sentence of each tile. Digits are drawn from
+        the non-pepper part of the dictionary so they survive pepper stripping.
+
+        :param tileIndex: Position of the tile within the image
+        :param chunkLength: Number of message characters carried by the tile
+        :return: Header string
+        """
+        base = self.pepperStart
+
+        if max(tileIndex, chunkLength) >= base ** 2:
+            raise ValueError(f"Tile index and chunk length must be less than {base ** 2}.")
+
+        return "".join(chr(digit) for digit in (tileIndex // base, tileIndex % base, chunkLength // base, chunkLength % base))
+
+    def decodeTileHeader(self, codes: np.array) -> tuple:
+        """
+        This method reads the header of a tile's decoded, pepper-stripped character codes
+
+        :param codes: Decoded character codes of a tile with the pepper removed
+        :return: Tuple of (tile index, chunk length)
+        """
+        base = self.pepperStart
+        digits = [int(code) for code in codes[:TILE_HEADER_LENGTH]] + [0] * (TILE_HEADER_LENGTH - len(codes))
+
+        return digits[0] * base + digits[1], digits[2] * base + digits[3]
+
+    def splitTiles(self, img: np.array) -> np.array:
+        """
+        This method splits an image whose sides are multiples of the model's image size into tiles
+
+        :param img: Numpy array of shape (rows * tileSize, columns * tileSize, channels)
+        :return: Numpy array of shape (rows * columns, tileSize, tileSize, channels), in row-major tile order
+        """
+        tileSize = self.imageSize[0]
+        rows, columns = img.shape[0] // tileSize, img.shape[1] // tileSize
+
+        return img.reshape(rows, tileSize, columns, tileSize, img.shape[2]) \
+            .transpose(0, 2, 1, 3, 4) \
+            .reshape(rows * columns, tileSize, tileSize, img.shape[2])
+
+    def encryptTiled(self, imageFilePath: any([np.array, str]), sentence: str, saveOutput: bool = False, embeddedOutputPath: str = None):
+        """
+        This method embeds a sentence of any length within an image larger than the model's image
+        size. Rather than cropping, the image is split into as many whole model sized tiles as fit,
+        the sentence is spread over the tiles behind a small per tile header holding the tile index
+        and chunk length, and every tile is encoded in batches.
+
+        The returned image keeps the original size. Strips along the bottom and right edges too
+        narrow for a whole tile carry nothing and are left untouched.
+
+        :param imageFilePath: File path of the image to embed text within, or a numpy array representing it
+        :param sentence: Sentence to embed within the image
+        :param saveOutput: Whether or not to save the output
+        :param embeddedOutputPath: Location to save the image with embedded text
+        :return: The image and the image with the sentence embedded within it
+        """
+        if type(imageFilePath) == str:
+            with self.stage("readImage"):
+                img = readImage(imageFilePath=imageFilePath)
+        else:
+            img = np.asarray(imageFilePath)
+
+        img = img[:, :, :self.imageSize[2]].astype(np.float32)
+        tileSize = self.imageSize[0]
+        rows, columns = img.shape[0] // tileSize, img.shape[1] // tileSize
+
+        if rows * columns == 0:
+            raise ValueError(f"Image of shape {img.shape[:2]} is smaller than one {tileSize}x{tileSize} tile. Use encrypt instead.")
+
+        capacity = self.sentenceLength - TILE_HEADER_LENGTH
+        chunks = [sentence[start:start + capacity] for start in range(0, len(sentence), capacity)]
+
+        if len(chunks) > rows * columns:
+            raise ValueError(f"Sentence is too long for this image. At most {rows * columns * capacity} characters fit.")
+
+        chunks += [""] * (rows * columns - len(chunks))
+        tileSentences = [self.encodeTileHeader(tileIndex=idx, chunkLength=len(chunk)) + chunk for idx, chunk in enumerate(chunks)]
+
+        tiles = self.splitTiles(img[:rows * tileSize, :columns * tileSize])
+        encodedSentences = self.preprocessSentences(sentences=tileSentences)
+        embeddedTiles = np.concatenate([
+            self.encodeBatch(images=tiles[start:start + self.batchSize], sentences=encodedSentences[start:start + self.batchSize])
+            for start in range(0, len(tiles), self.batchSize)
+        ])
+
+        imageWithEmbeddedText = img.copy()
+        imageWithEmbeddedText[:rows * tileSize, :columns * tileSize] = embeddedTiles \
+            .reshape(rows, columns, tileSize, tileSize, embeddedTiles.shape[-1]) \
+            .transpose(0, 2, 1, 3, 4) \
+            .reshape(rows * tileSize, columns * tileSize, embeddedTiles.shape[-1])
+
+        if saveOutput:
+            if embeddedOutputPath is None:
+                embeddedOutputPath, _ = self.getOutputPaths(imageFilePath=imageFilePath, preProcessedOutputPath="")
+
+            self.saveImage(imageFilePath=embeddedOutputPath, image=np.clip(imageWithEmbeddedText, a_min=0.0, a_max=1.0))
+
+        return img, imageWithEmbeddedText
+
+    def decryptTiled(self, img: any([np.array, str])) -> str:
+        """
+        This method extracts a sentence embedded with encryptTiled. Every tile is decoded in batches
+        and the chunks are reassembled in tile index order.
+
+        :param img: Numpy array representing image with embedded text or
+                    filepath to this image
+        :return: String information that was embedded within the image
+        """
+        if type(img) == str:
+            img = self.readImage(imageFilePath=img)
+
+        tileSize = self.imageSize[0]
+
+        if img.shape[0] < tileSize or img.shape[1] < tileSize:
+            raise ValueError(f"Image of shape {img.shape[:2]} is smaller than one {tileSize}x{tileSize} tile. Use decrypt instead.")
+
+        img = img[:img.shape[0] // tileSize * tileSize, :img.shape[1] // tileSize * tileSize, :self.imageSize[2]]
+        tiles = self.splitTiles(img)
+
+        decodedArrays = np.concatenate([
+            self.decodeCodes(images=tiles[start:start + self.batchSize])
+            for start in range(0, len(tiles), self.batchSize)
+        ])
+
+        chunks = {}
+        for decodedArray in decodedArrays:
+            codes = decodedArray[decodedArray < self.pepperStart]
+            tileIndex, chunkLength = self.decodeTileHeader(codes=codes)
+            chunks[tileIndex] = self.messageDecode(codes[TILE_HEADER_LENGTH:TILE_HEADER_LENGTH + chunkLength])
+
+        return "".join(chunks[tileIndex] for tileIndex in sorted(chunks))
 
 
 if __name__ == "__main__":
+    from ImageCorruptor import ImageCorruptor
+    from Levenshtein.StringMatcher import distance
+    from Levenshtein.StringMatcher import ratio
+
     # testSentence = "Gandalf? Yes... that was what they used to call me. Gandalf the Gray. That was my name." \
     #                " I am Gandalf the White. And I come back to you now - at the turn of the tide."
 
@@ -1,13 +1,18 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import os
-import random
 
-from matplotlib.image import imsave
+from TextCodec import decodeMessage
+from TextCodec import encodeMessage
 
 
 class DataGenerator(object):
-    def __init__(self, imageSize: int = 100, greyScale: bool = True, dictionaryLength: int = 200):
+    def __init__(self,
+                 imageSize: int = 100,
+                 greyScale: bool = True,
+                 dictionaryLength: int = 200,
+                 seed: int = None,
+                 sparseTargets: bool = False,
+                 sentenceLength: int = None,
+                 imageSource=None):
         """
         This class is responsible for creating a generator that generates
         random sentences and images.
@@ -15,14 +20,27 @@ class DataGenerator(object):
         :param imageSize: Size of the images to be generated
         :param greyScale: Whether or not the images are greyscale
         :param dictionaryLength: Length of the dictioanry of characters to be used
+        :param seed: Seed (or np.random.SeedSequence) for this instance's random stream. Used by the
+                     vectorized batch generation only
+        :param sparseTargets: Whether or not to output sentence targets as integer labels rather than
+                              one-hot encoded arrays
+        :param sentenceLength: Length of the sentences to be generated. Defaults to imageSize
+        :param imageSource: Optional CarrierStore to sample real images from instead of generating
+                            noise. Used by the vectorized batch generation only
         """
         if greyScale:
             self.imageSize = (imageSize, imageSize, 1)
         else:
             self.imageSize = (imageSize, imageSize, 3)
 
-        self.sentenceLength = imageSize
+        self.sentenceLength = sentenceLength if sentenceLength is not None else imageSize
         self.dictionaryLength = dictionaryLength
+        self.sparseTargets = sparseTargets
+        self.rng = np.random.default_rng(seed)
+        self.imageSource = imageSource
+
+        if self.imageSource is not None and self.imageSource.imageShape != self.imageSize:
+            raise ValueError(f"Image source holds images of shape {self.imageSource.imageShape}, expected {self.imageSize}.")
 
     def generateImage(self) -> np.array:
         """
@@ -55,12 +73,12 @@ class DataGenerator(object):
     @staticmethod
     def messageEncode(message: str) -> np.array:
         """
-        This method takes a string and converts it to a numpy array using ord
+        This method takes a string and converts it to a numpy array of character codes
 
         :param message: String to be converted to a numpy array
         :return: Numpy array
         """
-        return np.array([ord(char) for char in message])
+        return encodeMessage(message=message)
 
     @staticmethod
     def messageDecode(message: np.array) -> str:
@@ -70,35 +88,83 @@ class DataGenerator(object):
         :param message: Numpy array to be decoded
         :return: Decoded message string
         """
-        return "".join(chr(codePoint) for codePoint in message)
+        return decodeMessage(codes=message)
 
-    def generateData(self, batchSize: int = 32):
+    def generateBatch(self, batchSize: int = 32) -> tuple:
+        """
+        Generates an entire batch of random images (or images sampled from imageSource) and
+        sentences with a handful of NumPy calls rather than one sample at a time. Each call returns
+        newly allocated arrays, since Keras and tf.data queue batches ahead of the training step
+        and a reused buffer would be overwritten before it is consumed.
+
+        :param batchSize: Number of images and sentences to create
+        :return: Tuple of (images, sentences, sentence targets). The targets are the sentences
+                 themselves when sparseTargets is set, and one-hot encoded otherwise
+        """
+        Ximage = np.empty(shape=(batchSize, *self.imageSize), dtype=np.float32)
+
+        if self.imageSource is not None:
+            self.imageSource.sampleBatch(rng=self.rng, out=Ximage)
+        else:
+            pixels = self.rng.integers(low=0, high=256, size=Ximage.shape, dtype=np.uint8)
+            np.multiply(pixels, np.float32(1 / 255.0), out=Ximage)
+
+        Xsentence = self.rng.integers(
+            low=0,
+            high=self.dictionaryLength,
+            size=(batchSize, self.sentenceLength),
+            dtype=np.int32
+        )
+
+        if self.sparseTargets:
+            Ysentence = Xsentence
+        else:
+            Ysentence = np.zeros(shape=(batchSize, self.sentenceLength, self.dictionaryLength), dtype=np.float32)
+            np.put_along_axis(Ysentence, Xsentence[..., np.newaxis], 1.0, axis=-1)
+
+        return Ximage, Xsentence, Ysentence
+
+    def generateData(self, batchSize: int = 32, vectorized: bool = False):
         """
         This method is responsible for constructing the data generator.
         The data is output as a tuple of lists. The first list contains
         The random images and the random sentences. The second list contains
-        random images and the one-hot encoded sentences. Each item in each of
+        random images and the one-hot encoded sentences (or the sentences
+        themselves when sparseTargets is set). Each item in each of
         these lists is a numpy array of size batchSize.
 
 
         :param batchSize: Number of images and sentences to create per batch
+        :param vectorized: Whether or not to build each batch with generateBatch
         :return: Generator holding image and sentence data
         """
+        if vectorized:
+            while True:
+                Ximage, Xsentence, Ysentence = self.generateBatch(batchSize=batchSize)
+
+                yield ([Ximage, Xsentence], [Ximage, Ysentence])
+
         while True:
             Ximage = np.zeros(shape=(batchSize, self.imageSize[0], self.imageSize[1], self.imageSize[2]))
             Xsentence = np.zeros(shape=(batchSize, self.sentenceLength))
             Yimage = np.zeros(shape=(batchSize, self.imageSize[0], self.imageSize[1], self.imageSize[2]))
-            Ysentence = np.zeros(shape=(batchSize, self.sentenceLength, self.dictionaryLength))
+            if self.sparseTargets:
+                Ysentence = np.zeros(shape=(batchSize, self.sentenceLength), dtype=np.int32)
+            else:
+                Ysentence = np.zeros(shape=(batchSize, self.sentenceLength, self.dictionaryLength))
 
             for idx in range(batchSize):
                 image = self.generateImage()
                 sentence = self.generateSentence()
-                sentenceOneHot = self.oneHotEncode(sentence)
 
                 Ximage[idx] = image
                 Xsentence[idx] = sentence
                 Yimage[idx] = image
-                Ysentence[idx] = sentenceOneHot
+
+                if self.sparseTargets:
+                    Ysentence[idx] = sentence
+                else:
+                    Ysentence[idx] = self.oneHotEncode(sentence)
 
             yield ([Ximage, Xsentence], [Yimage, Ysentence])
 
@@ -1,21 +1,32 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
-from matplotlib.image import imread
-from matplotlib.image import imsave
+from ImageIO import AsyncImageWriter
+from ImageIO import BatchReader
+from ImageIO import readImage
+from ImageIO import writeImage
 
 
 class ImageCorruptor(object):
-    def __init__(self, greyScale: bool = True, corruptValue: tuple = (0, 0, 0), useRandomColors: bool = False):
+    def __init__(self,
+                 greyScale: bool = True,
+                 corruptValue: tuple = (0, 0, 0),
+                 useRandomColors: bool = False,
+                 seed: int = None,
+                 imageWriter: AsyncImageWriter = None):
         """
         This class will take an image and corrupt random pixels to a supplied value
 
         :param greyScale: Whether or not the image is grey scale
         :param corruptValue: Value to fill corrupt values with. First value is used in the case of greyscale
         :param useRandomColors: Indicates whether or not to fill with random colors
+        :param seed: Seed for choosing which pixels to corrupt and the random colors used
+        :param imageWriter: Optional AsyncImageWriter that saved outputs are queued on instead of being
+                            written before returning
         """
         self.greyScale = greyScale
+        self.imageWriter = imageWriter
         self.useRandomColors = useRandomColors
+        self.rng = np.random.default_rng(seed)
 
         if self.greyScale:
             self.corruptValue = corruptValue[0]
@@ -39,34 +50,133 @@ class ImageCorruptor(object):
         if not 0 <= proportionToCorrupt <= 1:
             raise ValueError("proportionToCorruptX must be between 0 and 1.")
 
-        img = imread(fname=imageFilePath)
+        img = readImage(imageFilePath=imageFilePath)
 
         if self.greyScale:
             img = img[:, :, 0]
         else:
             img = img[:, :, :3]
 
-        corruptImage = img
+        corruptImage = self.corruptImages(
+            images=np.expand_dims(img, axis=0),
+            proportionToCorrupt=proportionToCorrupt,
+            inPlace=True
+        )[0]
 
-        points = np.array([[x, y] for x in range(img.shape[0]) for y in range(img.shape[1])])
-        randomPoints = points[np.random.choice(a=points.shape[0], size=int(proportionToCorrupt * points.shape[0]), replace=False)]
+        if saveOutput:
+            if self.imageWriter is not None:
+                self.imageWriter.submit(imageFilePath=outputFilePath, image=corruptImage)
+            else:
+                writeImage(imageFilePath=outputFilePath, image=corruptImage)
+
+        return corruptImage
+
+    def corruptImageFiles(self,
+                          proportionToCorrupt: float,
+                          imageFilePaths: list,
+                          outputFilePaths: list,
+                          batchSize: int = 32,
+                          numWorkers: int = 4,
+                          compressLevel: int = None) -> None:
+        """
+        This method corrupts many images of the same size. Each batch is decoded on a thread pool
+        into a reused buffer, corrupted in place, and queued for writing, so reading, corrupting and
+        compressing overlap.
+
+        :param proportionToCorrupt: Proportion of each image to corrupt. Must be between 0 and 1
+        :param imageFilePaths: File paths of the images to corrupt
+        :param outputFilePaths: Locations to save the corrupted images, aligned with imageFilePaths
+        :param batchSize: Number of images per batch
+        :param numWorkers: Number of threads decoding images
+        :param compressLevel: Optional PNG compression level for the temporary writer used when the
+                              instance has no image writer
+        """
+        if len(imageFilePaths) != len(outputFilePaths):
+            raise ValueError("Parameters imageFilePaths and outputFilePaths must be the same length.")
+
+        if not imageFilePaths:
+            return
+
+        height, width = readImage(imageFilePath=imageFilePaths[0]).shape[:2]
+        buffer = np.empty(shape=(batchSize, height, width, 1 if self.greyScale else 3), dtype=np.float32)
+        writer = self.imageWriter if self.imageWriter is not None else AsyncImageWriter(compressLevel=compressLevel)
+
+        try:
+            with BatchReader(numWorkers=numWorkers) as reader:
+                for start in range(0, len(imageFilePaths), batchSize):
+                    images = reader.readBatch(imageFilePaths=imageFilePaths[start:start + batchSize], out=buffer)
+
+                    # The batch is copied once so that the buffer can be refilled while it is written
+                    corruptImages = self.corruptImages(
+                        images=images if not self.greyScale else images[..., 0],
+                        proportionToCorrupt=proportionToCorrupt
+                    )
+
+                    for corruptImage, outputFilePath in zip(corruptImages, outputFilePaths[start:start + batchSize]):
+                        writer.submit(imageFilePath=outputFilePath, image=corruptImage)
+
+            writer.flush()
+        finally:
+            if writer is not self.imageWriter:
+                writer.close()
+
+    def corruptImages(self, images: np.array, proportionToCorrupt: float, inPlace: bool = False) -> np.array:
+        """
+        This method corrupts a fixed percentage of the pixels of every image in a batch. The pixels
+        are chosen by sampling flat pixel indices for the whole batch at once and are filled through
+        a single masked assignment.
+
+        :param images: Batch of images of shape (batch, height, width) for greyscale images or
+                       (batch, height, width, channels) otherwise
+        :param proportionToCorrupt: Proportion of each image to corrupt. Must be between 0 and 1
+        :param inPlace: Whether or not to corrupt the passed array itself rather than a copy
+        :return: Numpy array of the corrupted images
+        """
+        if not 0 <= proportionToCorrupt <= 1:
+            raise ValueError("proportionToCorrupt must be between 0 and 1.")
+
+        corruptImages = images if inPlace else images.copy()
+
+        batchSize, height, width = corruptImages.shape[:3]
+        pixelCount = height * width
+        # Rounded rather than truncated, so that e.g. 0.29 of 100 pixels is 29 despite float error
+        corruptCount = int(round(proportionToCorrupt * pixelCount))
+
+        if corruptCount == 0:
+            return corruptImages
+
+        # Choose corruptCount distinct pixels per image: the positions of the smallest random keys
+        randomKeys = self.rng.random(size=(batchSize, pixelCount), dtype=np.float32)
+
+        if corruptCount < pixelCount:
+            corruptIndices = np.argpartition(randomKeys, corruptCount - 1, axis=1)[:, :corruptCount]
+        else:
+            corruptIndices = np.broadcast_to(np.arange(pixelCount), (batchSize, pixelCount))
 
-        for x, y in randomPoints:
-            if self.useRandomColors:
-                if self.greyScale:
-                    corruptImage[x, y] = np.random.rand()
-                else:
-                    corruptImage[x, y] = (np.random.rand(), np.random.rand(), np.random.rand())
+        mask = np.zeros(shape=(batchSize, pixelCount), dtype=bool)
+        np.put_along_axis(mask, corruptIndices, True, axis=1)
+
+        flatImages = corruptImages.reshape(batchSize, pixelCount, *corruptImages.shape[3:])
+
+        if self.useRandomColors:
+            fillShape = (batchSize * corruptCount, *corruptImages.shape[3:])
+
+            if np.issubdtype(corruptImages.dtype, np.integer):
+                flatImages[mask] = self.rng.integers(low=0, high=256, size=fillShape, dtype=corruptImages.dtype)
             else:
-                corruptImage[x, y] = self.corruptValue
+                flatImages[mask] = self.rng.random(size=fillShape)
+        else:
+            flatImages[mask] = self.corruptValue
 
-        if saveOutput:
-            imsave(fname=outputFilePath, arr=corruptImage)
+        if not np.shares_memory(flatImages, corruptImages):
+            corruptImages[...] = flatImages.reshape(corruptImages.shape)
 
-        return corruptImage
+        return corruptImages
 
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
     corruptor = ImageCorruptor(greyScale=False)
 
     corruptedImage = corruptor.corruptImage(
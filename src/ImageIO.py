@@ -0,0 +1,208 @@
+import threading
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from StageProfiler import NULL_STAGE
+from StageProfiler import StageProfiler
+
+
+def decodeImage(imageFilePath: str) -> np.array:
+    """
+    Decodes an image to 8 bits per channel without scaling it
+
+    :param imageFilePath: File path to the image
+    :return: Uint8 numpy array of shape (height, width, channels)
+    """
+    with Image.open(imageFilePath) as image:
+        if image.mode not in {"L", "LA", "RGB", "RGBA"}:
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        img = np.asarray(image, dtype=np.uint8)
+
+    if img.ndim == 2:
+        img = np.expand_dims(img, axis=-1)
+
+    return img
+
+
+def readImage(imageFilePath: str) -> np.array:
+    """
+    Reads an image with Pillow rather than matplotlib so that no plotting backend is loaded.
+    Pixel values are scaled to [0, 1] regardless of the file's bit depth or format, and the
+    result always has a channel axis.
+
+    :param imageFilePath: File path to the image
+    :return: Float32 numpy array of shape (height, width, channels)
+    """
+    return np.multiply(decodeImage(imageFilePath=imageFilePath), np.float32(1 / 255.0), dtype=np.float32)
+
+
+def readImageInto(imageFilePath: str, out: np.array) -> None:
+    """
+    Decodes an image straight into a slot of a batch buffer. Extra channels are dropped, and
+    float buffers receive values scaled to [0, 1] while integer buffers receive the raw 8 bit values.
+
+    :param imageFilePath: File path to the image
+    :param out: Array of shape (height, width, channels) to write into
+    """
+    img = decodeImage(imageFilePath=imageFilePath)
+
+    if img.shape[:2] != out.shape[:2] or img.shape[2] < out.shape[2]:
+        raise ValueError(f"Image {imageFilePath} has shape {img.shape}, expected {out.shape}.")
+
+    if np.issubdtype(out.dtype, np.floating):
+        np.multiply(img[:, :, :out.shape[2]], out.dtype.type(1 / 255.0), out=out)
+    else:
+        out[...] = img[:, :, :out.shape[2]]
+
+
+def writeImage(imageFilePath: str, image: np.array, compressLevel: int = None) -> None:
+    """
+    Writes an image with Pillow. Float images are expected to hold values in [0, 1] and are
+    clipped to that range before being converted to 8 bits.
+
+    :param imageFilePath: File path to write the image to
+    :param image: Numpy array of shape (height, width) or (height, width, channels)
+    :param compressLevel: Optional PNG compression level from 0 to 9. Low levels write intermediate
+                          artifacts several times faster at the cost of larger files
+    """
+    img = np.asarray(image)
+
+    if np.issubdtype(img.dtype, np.floating):
+        img = np.round(np.clip(img, a_min=0.0, a_max=1.0) * 255.0)
+
+    img = img.astype(np.uint8)
+
+    if img.ndim == 3 and img.shape[-1] == 1:
+        img = img[:, :, 0]
+
+    if compressLevel is None:
+        Image.fromarray(img).save(imageFilePath)
+    else:
+        Image.fromarray(img).save(imageFilePath, compress_level=compressLevel)
+
+
+class BatchReader(object):
+    def __init__(self, numWorkers: int = 4):
+        """
+        This class decodes images on a thread pool straight into a preallocated batch buffer.
+        Pillow releases the GIL while decoding, so the threads decode in parallel.
+
+        :param numWorkers: Number of decoding threads
+        """
+        self.executor = ThreadPoolExecutor(max_workers=numWorkers)
+
+    def readBatch(self, imageFilePaths: list, out: np.array) -> np.array:
+        """
+        Decodes len(imageFilePaths) images into the leading slots of out
+
+        :param imageFilePaths: File paths of images that all have the shape of a slot of out
+        :param out: Uint8 or float array of shape (batchSize, height, width, channels)
+        :return: The filled part of out
+        """
+        if len(imageFilePaths) > out.shape[0]:
+            raise ValueError(f"Cannot read {len(imageFilePaths)} images into a buffer of {out.shape[0]}.")
+
+        futures = [
+            self.executor.submit(readImageInto, imageFilePath, out[idx])
+            for idx, imageFilePath in enumerate(imageFilePaths)
+        ]
+
+        for future in futures:
+            future.result()
+
+        return out[:len(imageFilePaths)]
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncImageWriter(object):
+    def __init__(self, maxPending: int = 16, numWorkers: int = 2, compressLevel: int = None):
+        """
+        This class writes images on background threads so that the caller can carry on with the
+        next batch while the previous one is compressed. At most maxPending writes are outstanding;
+        submit blocks beyond that, which bounds the memory held by queued images. Errors are raised
+        from the next submit, flush, or close.
+
+        :param maxPending: Maximum number of outstanding writes
+        :param numWorkers: Number of writing threads
+        :param compressLevel: Optional PNG compression level passed to writeImage
+        """
+        self.executor = ThreadPoolExecutor(max_workers=numWorkers)
+        self.slots = threading.BoundedSemaphore(maxPending)
+        self.compressLevel = compressLevel
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.errors = []
+
+    def submit(self, imageFilePath: str, image: np.array, profiler: StageProfiler = None) -> None:
+        """
+        Queues an image to be written. The image must not be modified until it has been written, so
+        pass a copy of any buffer that is about to be reused.
+
+        :param imageFilePath: File path to write the image to
+        :param image: Numpy array accepted by writeImage
+        :param profiler: Optional StageProfiler to record the write itself on, as the writeImage stage
+        """
+        self.raiseErrors()
+        self.slots.acquire()
+
+        with self.lock:
+            self.pending = {future for future in self.pending if not future.done()}
+            self.pending.add(self.executor.submit(self.write, imageFilePath, image, profiler))
+
+    def write(self, imageFilePath: str, image: np.array, profiler: StageProfiler = None) -> None:
+        """
+        Writes a single image on a background thread, recording any error rather than raising it
+        """
+        try:
+            with profiler.stage(name="writeImage") if profiler is not None else NULL_STAGE:
+                writeImage(imageFilePath=imageFilePath, image=image, compressLevel=self.compressLevel)
+        except Exception as error:
+            with self.lock:
+                self.errors.append(error)
+        finally:
+            self.slots.release()
+
+    def raiseErrors(self) -> None:
+        """
+        Raises the first error recorded by a background write, if any
+        """
+        with self.lock:
+            errors, self.errors = self.errors, []
+
+        if errors:
+            raise errors[0]
+
+    def flush(self) -> None:
+        """
+        Waits for every queued write to finish
+        """
+        with self.lock:
+            pending = list(self.pending)
+
+        for future in pending:
+            future.result()
+
+        self.raiseErrors()
+
+    def close(self) -> None:
+        """
+        Flushes and stops the writing threads
+        """
+        self.executor.shutdown(wait=True)
+        self.raiseErrors()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,364 @@
+import asyncio
+import json
+import time
+import numpy as np
+
+from collections import Counter
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from CryptoNet import CryptoNet
+from ImageIO import writeImage
+
+
+class MicroBatcher(object):
+    def __init__(self, processBatch, maxBatchSize: int, maxWait: float, executor: ThreadPoolExecutor):
+        """
+        This class queues individual requests and hands them to processBatch in groups. A group is
+        dispatched once it holds maxBatchSize requests or maxWait seconds have passed since its
+        first request arrived.
+
+        :param processBatch: Function taking a list of request payloads and returning a list of
+                             results (or exceptions) in the same order. A result may also be a
+                             concurrent.futures.Future, for work finishing off the executor's thread
+        :param maxBatchSize: Maximum number of requests per batch
+        :param maxWait: Maximum number of seconds to wait for a batch to fill
+        :param executor: Executor processBatch is run on, keeping the event loop responsive
+        """
+        self.processBatch = processBatch
+        self.maxBatchSize = maxBatchSize
+        self.maxWait = maxWait
+        self.executor = executor
+        self.queue = asyncio.Queue()
+        self.batchSizes = Counter()
+        self.latencies = deque(maxlen=10000)
+        self.pendingTasks = set()
+
+    async def submit(self, payload: dict):
+        """
+        Queues a request and waits for its result
+
+        :param payload: Request payload
+        :return: Result of processing the request
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((payload, future, time.perf_counter()))
+
+        return await future
+
+    async def run(self) -> None:
+        """
+        Collects and processes batches until cancelled
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.maxWait
+
+            while len(batch) < self.maxBatchSize:
+                timeout = deadline - loop.time()
+
+                if timeout <= 0:
+                    break
+
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self.batchSizes[len(batch)] += 1
+
+            try:
+                results = await loop.run_in_executor(self.executor, self.processBatch, [payload for payload, _, _ in batch])
+            except Exception as error:
+                results = [error] * len(batch)
+
+            for (_, future, enqueueTime), result in zip(batch, results):
+                if isinstance(result, Future):
+                    # Resolved once the work finishes, without holding up the next batch
+                    task = asyncio.create_task(self.settleWhenDone(future, result, enqueueTime))
+                    self.pendingTasks.add(task)
+                    task.add_done_callback(self.pendingTasks.discard)
+                else:
+                    self.settle(future, result, enqueueTime)
+
+    def settle(self, future: asyncio.Future, result, enqueueTime: float) -> None:
+        """
+        Resolves a request with its result, or fails it with its exception, and records its latency
+        """
+        self.latencies.append(time.perf_counter() - enqueueTime)
+
+        if future.done():
+            return
+
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+    async def settleWhenDone(self, future: asyncio.Future, pending: Future, enqueueTime: float) -> None:
+        """
+        Resolves a request once the concurrent future holding its result is done
+        """
+        try:
+            result = await asyncio.wrap_future(pending)
+        except Exception as error:
+            result = error
+
+        self.settle(future, result, enqueueTime)
+
+    def stats(self) -> dict:
+        """
+        :return: Dictionary holding the queue depth, batch size histogram, and p50/p99 latency in seconds
+        """
+        latencies = np.array(self.latencies)
+
+        return {
+            "queueDepth": self.queue.qsize(),
+            "batchSizes": {str(size): count for size, count in sorted(self.batchSizes.items())},
+            "latencyP50": float(np.percentile(latencies, 50)) if latencies.size else None,
+            "latencyP99": float(np.percentile(latencies, 99)) if latencies.size else None
+        }
+
+
+class InferenceServer(object):
+    def __init__(self,
+                 cryptoNet: CryptoNet,
+                 maxBatchSize: int = None,
+                 maxWaitMs: float = 5.0,
+                 host: str = "127.0.0.1",
+                 port: int = 8765,
+                 unixSocketPath: str = None,
+                 numWriteWorkers: int = 2):
+        """
+        This class serves encrypt and decrypt requests over HTTP from a single loaded CryptoNet.
+        Concurrent requests are coalesced into micro-batches so that each batch is a single
+        encoder or decoder call.
+
+        Endpoints:
+            POST /encrypt  {"image": path, "sentence": str, "output": path} -> {"output": path}
+            POST /decrypt  {"image": path} -> {"sentence": str}
+            GET  /stats    -> queue depth, batch size histogram, and p50/p99 latency per endpoint, and
+                              the CryptoNet stage statistics when it was built with profile=True
+            GET  /metrics  -> the CryptoNet stage latency histograms in the Prometheus text format
+
+        :param cryptoNet: CryptoNet to serve
+        :param maxBatchSize: Maximum number of requests per model call. Defaults to the model's batchSize
+        :param maxWaitMs: Maximum number of milliseconds to wait for a batch to fill
+        :param host: Host to listen on
+        :param port: Port to listen on
+        :param unixSocketPath: Path of a Unix socket to listen on instead of host and port
+        :param numWriteWorkers: Number of threads encoding and writing encrypted images, off the
+                                thread driving the model
+        """
+        self.cryptoNet = cryptoNet
+        self.maxBatchSize = maxBatchSize if maxBatchSize is not None else cryptoNet.batchSize
+        self.maxWait = maxWaitMs / 1000.0
+        self.host = host
+        self.port = port
+        self.unixSocketPath = unixSocketPath
+
+        # The model is driven from a single thread; requests are parallelised by batching instead
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.writeExecutor = ThreadPoolExecutor(max_workers=numWriteWorkers)
+        self.batchers = {}
+
+    def encryptBatch(self, payloads: list) -> list:
+        """
+        Encrypts a batch of requests with a single encoder call. The outputs are written on the
+        write executor, so the next batch can be encoded while this one is saved.
+
+        :param payloads: List of encrypt request payloads
+        :return: List of exceptions, or futures of responses resolved once the output is written,
+                 one per payload
+        """
+        results = [None] * len(payloads)
+        images, sentences, valid = [], [], []
+
+        # Pre-process each request separately so that one bad request does not fail the whole batch
+        for idx, payload in enumerate(payloads):
+            try:
+                sentence = self.cryptoNet.preprocessSentence(sentence=payload["sentence"])
+                image = self.cryptoNet.preprocessImage(imageFilePath=payload["image"])
+            except Exception as error:
+                results[idx] = error
+                continue
+
+            images.append(image)
+            sentences.append(sentence)
+            valid.append(idx)
+
+        if not valid:
+            return results
+
+        imagesWithEmbeddedText = self.cryptoNet.encodeBatch(
+            images=np.concatenate(images),
+            sentences=np.concatenate(sentences)
+        )
+
+        for idx, imageWithEmbeddedText in zip(valid, imagesWithEmbeddedText):
+            results[idx] = self.writeExecutor.submit(self.writeOutput, payloads[idx], imageWithEmbeddedText)
+
+        return results
+
+    @staticmethod
+    def writeOutput(payload: dict, image: np.array) -> dict:
+        """
+        Writes the output of an encrypt request
+
+        :param payload: Encrypt request payload
+        :param image: Image with the sentence embedded within it
+        :return: Response to the request
+        """
+        writeImage(imageFilePath=payload["output"], image=image)
+
+        return {"output": payload["output"]}
+
+    def decryptBatch(self, payloads: list) -> list:
+        """
+        Decrypts a batch of requests with a single decoder call
+
+        :param payloads: List of decrypt request payloads
+        :return: List of responses or exceptions, one per payload
+        """
+        results = [None] * len(payloads)
+        images, valid = [], []
+
+        for idx, payload in enumerate(payloads):
+            try:
+                image = self.cryptoNet.readImage(imageFilePath=payload["image"])
+            except Exception as error:
+                results[idx] = error
+                continue
+
+            # A wrongly sized image would fail np.stack, and with it every other request in the batch
+            if image.shape != self.cryptoNet.imageSize:
+                results[idx] = ValueError(f"Image must have shape {self.cryptoNet.imageSize}, not {image.shape}.")
+                continue
+
+            images.append(image)
+            valid.append(idx)
+
+        if valid:
+            for idx, sentence in zip(valid, self.cryptoNet.decodeBatch(np.stack(images))):
+                results[idx] = {"sentence": sentence}
+
+        return results
+
+    def stats(self) -> dict:
+        """
+        :return: Dictionary of statistics for each endpoint
+        """
+        stats = {name: batcher.stats() for name, batcher in self.batchers.items()}
+
+        if self.cryptoNet.profiler is not None:
+            stats["stages"] = self.cryptoNet.stats()
+
+        return stats
+
+    async def handleConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Handles a single HTTP request
+        """
+        try:
+            requestLine = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+
+                if not line:
+                    break
+
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            if len(requestLine) < 2:
+                status, response = 400, {"error": "Malformed request."}
+            else:
+                status, response = await self.route(method=requestLine[0], path=requestLine[1], body=body)
+        except Exception as error:
+            status, response = 500, {"error": str(error)}
+
+        if isinstance(response, str):
+            content, contentType = response.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            content, contentType = json.dumps(response).encode("utf-8"), "application/json"
+
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+        writer.write(
+            f"HTTP/1.1 {status} {reasons[status]}\r\n"
+            f"Content-Type: {contentType}\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + content
+        )
+
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def route(self, method: str, path: str, body: bytes) -> tuple:
+        """
+        Dispatches a request to the appropriate endpoint
+
+        :return: Tuple of (HTTP status, response dictionary, or text for /metrics)
+        """
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+
+        if method == "GET" and path == "/metrics":
+            return 200, self.cryptoNet.prometheusText()
+
+        if method != "POST" or path.lstrip("/") not in self.batchers:
+            return 404, {"error": f"No endpoint {method} {path}."}
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {"error": "Request body must be JSON."}
+
+        if not isinstance(payload, dict):
+            return 400, {"error": "Request body must be a JSON object."}
+
+        try:
+            return 200, await self.batchers[path.lstrip("/")].submit(payload)
+        except (KeyError, ValueError) as error:
+            return 400, {"error": str(error)}
+
+    async def serve(self) -> None:
+        """
+        Starts the batchers and serves requests until cancelled
+        """
+        self.batchers = {
+            "encrypt": MicroBatcher(self.encryptBatch, self.maxBatchSize, self.maxWait, self.executor),
+            "decrypt": MicroBatcher(self.decryptBatch, self.maxBatchSize, self.maxWait, self.executor)
+        }
+        tasks = [asyncio.create_task(batcher.run()) for batcher in self.batchers.values()]
+
+        if self.unixSocketPath is not None:
+            server = await asyncio.start_unix_server(self.handleConnection, path=self.unixSocketPath)
+        else:
+            server = await asyncio.start_server(self.handleConnection, host=self.host, port=self.port)
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def run(self) -> None:
+        """
+        Serves requests until interrupted
+        """
+        asyncio.run(self.serve())
+
+
+if __name__ == "__main__":
+    server = InferenceServer(cryptoNet=CryptoNet(weightsFilePath="../data/ModelWeights/pickup.h5"))
+    server.run()
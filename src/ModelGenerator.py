@@ -18,61 +18,160 @@ from tensorflow.keras.models import Sequential
 
 from tensorflow.keras.losses import categorical_crossentropy
 from tensorflow.keras.losses import mean_absolute_error
+from tensorflow.keras.losses import sparse_categorical_crossentropy
 from tensorflow.keras.metrics import categorical_accuracy
+from tensorflow.keras.metrics import sparse_categorical_accuracy
+from tensorflow.keras.optimizers import Adam
 
 
 class ModelGenerator(object):
     def __init__(self,
                  imageSize: int = 100,
                  greyScale: bool = True,
-                 dictionaryLength: int = 200):
+                 dictionaryLength: int = 200,
+                 sparseTargets: bool = False,
+                 mixedPrecision: bool = False,
+                 jitCompile: bool = False,
+                 sentenceLength: int = None,
+                 decoderUnits: int = None):
         """
         This class is responsible for generating a neural net model capable of
         embedding text information within images and recovering the original text
 
+        Each character of the sentence is assigned imageSize ** 2 / sentenceLength consecutive
+        pixels (in row-major order). With the defaults, each character is one row of the image, which
+        is the layout models trained before sentenceLength was configurable use.
+
         :param imageSize: Size of the images the neural net is to be trained on (will be square images)
         :param greyScale: Whether or not the images will be greyscale
         :param dictionaryLength: Length of the dictionary of characters the neural net will train on
+        :param sparseTargets: Whether or not sentence targets are integer labels rather than one-hot encoded
+        :param mixedPrecision: Whether or not to compute in 16 bit floats (float16 on GPUs, bfloat16
+                               otherwise). The model outputs, and so the losses, remain float32
+        :param jitCompile: Whether or not to compile the training step with XLA
+        :param sentenceLength: Number of characters embedded per image. Must divide imageSize ** 2.
+                               Defaults to imageSize
+        :param decoderUnits: Width of a hidden layer applied to each character's pixels before the
+                             softmax, bounding the decoder's parameters when characters span many pixels.
+                             None decodes each character's pixels directly
         """
         if greyScale:
             self.imageSize = (imageSize, imageSize, 1)
         else:
             self.imageSize = (imageSize, imageSize, 3)
 
-        self.sentenceLength = imageSize
+        if sentenceLength is None:
+            sentenceLength = imageSize
+
+        if (imageSize * imageSize) % sentenceLength != 0:
+            raise ValueError(f"sentenceLength must divide the number of pixels in an image ({imageSize * imageSize}).")
+
+        self.sentenceLength = sentenceLength
+        self.pixelsPerCharacter = imageSize * imageSize // sentenceLength
+        self.decoderUnits = decoderUnits
         self.dictionaryLength = dictionaryLength
+        self.sparseTargets = sparseTargets
+        self.mixedPrecision = mixedPrecision
+        self.jitCompile = jitCompile
+
+    @classmethod
+    def fromParameters(cls, modelParameters: dict, **kwargs):
+        """
+        Creates a ModelGenerator from the parameters stored alongside a model's weights. Parameters
+        files written before sentenceLength and decoderUnits were configurable still load.
+
+        :param modelParameters: Dictionary of model parameters
+        :param kwargs: Additional ModelGenerator arguments
+        :return: ModelGenerator
+        """
+        return cls(
+            imageSize=modelParameters["imageSize"],
+            greyScale=modelParameters["greyScale"],
+            dictionaryLength=modelParameters["dictionaryLength"],
+            sparseTargets=modelParameters.get("sparseTargets", False),
+            sentenceLength=modelParameters.get("sentenceLength", modelParameters["imageSize"]),
+            decoderUnits=modelParameters.get("decoderUnits"),
+            **kwargs
+        )
 
-    def getModel(self) -> tuple:
+    def getPrecisionPolicy(self) -> str:
+        """
+        :return: Name of the Keras dtype policy the model is built with
+        """
+        if not self.mixedPrecision:
+            return "float32"
+
+        if tf.config.list_physical_devices("GPU"):
+            return "mixed_float16"
+
+        return "mixed_bfloat16"
+
+    def getModel(self, compileModel: bool = True) -> tuple:
         """
         This method is responsible for creating the neural net model, as well as the
         encryptor and decryptor segments of the model.
 
+        :param compileModel: Whether or not to compile the full model for training. Inference only
+                             callers can skip this
+        :return: Full model, encoder model, decoder model
+        """
+        # Layers pick up the global policy when constructed, so set it only while building
+        previousPolicy = keras.mixed_precision.global_policy()
+        keras.mixed_precision.set_global_policy(self.getPrecisionPolicy())
+
+        try:
+            return self.buildModel(compileModel=compileModel)
+        finally:
+            keras.mixed_precision.set_global_policy(previousPolicy)
+
+    def buildModel(self, compileModel: bool) -> tuple:
+        """
+        This method builds the models under the current global dtype policy. The image and sentence
+        outputs are always float32 so that the losses and softmax are computed in full precision.
+
+        :param compileModel: Whether or not to compile the full model for training
         :return: Full model, encoder model, decoder model
         """
         # Construct the layers, inputs, and outputs
         inputImage = Input(self.imageSize)
         inputSentence = Input((self.sentenceLength, ))
-        embeddedSentence = Embedding(input_dim=self.dictionaryLength, output_dim=self.sentenceLength)(inputSentence)
+        embeddedSentence = Embedding(input_dim=self.dictionaryLength, output_dim=self.pixelsPerCharacter)(inputSentence)
         embeddedSentence = Flatten()(embeddedSentence)
         embeddedSentence = Reshape(target_shape=(self.imageSize[0], self.imageSize[1], 1))(embeddedSentence)
         convolvedImage = Conv2D(20, 1, activation="relu")(inputImage)
         concatenated = Concatenate(axis=-1)([embeddedSentence, convolvedImage])
-        outputImage = Conv2D(3, 1, activation="relu", name="imageReconstruction")(concatenated)
+        outputImage = Conv2D(3, 1, activation="relu", name="imageReconstruction", dtype="float32")(concatenated)
 
         # Construct the decoder model
         decoderModel = Sequential(name="sentenceReconstruction")
         decoderModel.add(Conv2D(1, 1, input_shape=self.imageSize))
-        decoderModel.add(Reshape((self.sentenceLength, self.sentenceLength)))
-        decoderModel.add(TimeDistributed(Dense(self.dictionaryLength, activation="softmax")))
+        decoderModel.add(Reshape((self.sentenceLength, self.pixelsPerCharacter)))
+
+        if self.decoderUnits is not None:
+            decoderModel.add(TimeDistributed(Dense(self.decoderUnits, activation="relu")))
+
+        decoderModel.add(TimeDistributed(Dense(self.dictionaryLength, activation="softmax", dtype="float32")))
         outputSentence = decoderModel(outputImage)
 
         # Construct the encoder model
         model = Model(inputs=[inputImage, inputSentence], outputs=[outputImage, outputSentence])
-        model.compile(
-            optimizer="adam",
-            loss=[mean_absolute_error, categorical_crossentropy],
-            metrics={"sentenceReconstruction": categorical_accuracy}
-        )
+
+        if compileModel:
+            if self.sparseTargets:
+                sentenceLoss, sentenceMetric = sparse_categorical_crossentropy, sparse_categorical_accuracy
+            else:
+                sentenceLoss, sentenceMetric = categorical_crossentropy, categorical_accuracy
+
+            optimizer = Adam()
+            if self.getPrecisionPolicy() == "mixed_float16":
+                optimizer = keras.mixed_precision.LossScaleOptimizer(optimizer)
+
+            model.compile(
+                optimizer=optimizer,
+                loss=[mean_absolute_error, sentenceLoss],
+                metrics={"sentenceReconstruction": sentenceMetric},
+                jit_compile=self.jitCompile
+            )
 
         encoderModel = Model(inputs=[inputImage, inputSentence], outputs=[outputImage])
 
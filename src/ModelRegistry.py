@@ -0,0 +1,162 @@
+import os
+import pickle
+import threading
+
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ModelRegistry(object):
+    def __init__(self, maxInstances: int = 4, maxBytes: int = None):
+        """
+        This class caches built model, encoder, and decoder triples so that CryptoNet instances
+        pointing at the same weights do not each rebuild the Keras graph and reload the weights.
+        Entries are keyed by weights path, model parameters, and weights file modification time,
+        and the least recently used entries are evicted once the budget is exceeded. Models are
+        built outside the lock, so a cold build only holds up callers waiting for the same key.
+
+        :param maxInstances: Maximum number of models to keep loaded
+        :param maxBytes: Maximum total size of the model weights to keep loaded. None for no limit
+        """
+        if maxInstances < 1:
+            raise ValueError("Parameter maxInstances must be at least 1.")
+
+        self.maxInstances = maxInstances
+        self.maxBytes = maxBytes
+        self.models = OrderedDict()
+        self.modelBytes = {}
+        self.building = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def loadParameters(weightsFilePath: str) -> dict:
+        """
+        Loads the model parameters stored alongside the weights
+
+        :param weightsFilePath: Path to the model weights
+        :return: Dictionary of model parameters
+        """
+        with open(f"{weightsFilePath}.p", "rb") as file:
+            return pickle.load(file=file)
+
+    @staticmethod
+    def getKey(weightsFilePath: str, modelParameters: dict) -> tuple:
+        """
+        Builds the cache key for a set of weights
+
+        :param weightsFilePath: Path to the model weights
+        :param modelParameters: Dictionary of model parameters
+        :return: Tuple of (absolute path, parameters, modification time)
+        """
+        return (
+            os.path.abspath(weightsFilePath),
+            tuple(sorted(modelParameters.items())),
+            os.path.getmtime(weightsFilePath)
+        )
+
+    def getModels(self, weightsFilePath: str, modelParameters: dict = None) -> tuple:
+        """
+        Returns the models for the given weights, building them on a cache miss. Models built here
+        are not compiled since they are only used for inference.
+
+        :param weightsFilePath: Path to the model weights
+        :param modelParameters: Dictionary of model parameters. Read from the sidecar if not given
+        :return: Full model, encoder model, decoder model
+        """
+        if modelParameters is None:
+            modelParameters = self.loadParameters(weightsFilePath=weightsFilePath)
+
+        key = self.getKey(weightsFilePath=weightsFilePath, modelParameters=modelParameters)
+
+        with self.lock:
+            if key in self.models:
+                self.hits += 1
+                self.models.move_to_end(key)
+
+                return self.models[key]
+
+            building = self.building.get(key)
+            isBuilder = building is None
+
+            if isBuilder:
+                self.misses += 1
+                building = self.building[key] = Future()
+            else:
+                self.hits += 1
+
+        # Another caller is already building these weights; wait for its result rather than the lock
+        if not isBuilder:
+            return building.result()
+
+        try:
+            # Deferred so that importing this module does not pull in TensorFlow
+            from ModelGenerator import ModelGenerator
+
+            modelGenerator = ModelGenerator.fromParameters(modelParameters=modelParameters)
+
+            models = modelGenerator.getModel(compileModel=False)
+            models[0].load_weights(filepath=weightsFilePath)
+            modelBytes = sum(weight.nbytes for weight in models[0].get_weights())
+        except BaseException as error:
+            with self.lock:
+                del self.building[key]
+
+            building.set_exception(error)
+            raise
+
+        with self.lock:
+            del self.building[key]
+
+            # Weights that changed on disk make older entries for the same path stale
+            for staleKey in [cachedKey for cachedKey in self.models if cachedKey[0] == key[0]]:
+                self.evict(staleKey)
+
+            self.models[key] = models
+            self.modelBytes[key] = modelBytes
+
+            while len(self.models) > 1 and (
+                    len(self.models) > self.maxInstances or
+                    (self.maxBytes is not None and self.totalBytes() > self.maxBytes)
+            ):
+                self.evict(next(iter(self.models)))
+
+        building.set_result(models)
+
+        return models
+
+    def evict(self, key: tuple) -> None:
+        """
+        Removes an entry from the registry
+
+        :param key: Key of the entry to remove
+        """
+        del self.models[key]
+        del self.modelBytes[key]
+
+    def totalBytes(self) -> int:
+        """
+        :return: Total size of the weights of every loaded model
+        """
+        return sum(self.modelBytes.values())
+
+    def clear(self) -> None:
+        """
+        Removes every entry from the registry
+        """
+        with self.lock:
+            self.models.clear()
+            self.modelBytes.clear()
+
+    def stats(self) -> dict:
+        """
+        :return: Dictionary holding the number of loaded models, their total size, and the hit/miss counts
+        """
+        with self.lock:
+            return {
+                "instances": len(self.models),
+                "bytes": self.totalBytes(),
+                "hits": self.hits,
+                "misses": self.misses
+            }
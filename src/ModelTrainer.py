@@ -1,10 +1,29 @@
+import json
+import os
 import pickle
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import tensorflow as tf
 
+from collections import deque
 from ModelGenerator import ModelGenerator
 from DataGenerator import DataGenerator
+from CarrierStore import CarrierStore
+from CheckpointManager import BackgroundCheckpoint
+from CheckpointManager import loadManifest
+from CheckpointManager import restoreCheckpoint
 from tensorflow.keras.callbacks import ModelCheckpoint
 from tensorflow.keras.callbacks import Callback
 
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where peak RSS is not recorded
+    resource = None
+
 
 class ModelTrainer(object):
     def __init__(self,
@@ -13,7 +32,14 @@ class ModelTrainer(object):
                  greyScale: bool = True,
                  dictionaryLength: int = 200,
                  batchSize: int = 32,
-                 loadExistingModel: bool = False):
+                 loadExistingModel: bool = False,
+                 seed: int = None,
+                 sparseTargets: bool = False,
+                 mixedPrecision: bool = False,
+                 jitCompile: bool = False,
+                 sentenceLength: int = None,
+                 decoderUnits: int = None,
+                 carrierStorePath: str = None):
         """
         This class is responsible for training a model to encrypt/decrypt
         string information within an image. This method will save the parameters
@@ -25,9 +51,21 @@ class ModelTrainer(object):
         :param dictionaryLength: Number of distinct characters to use within sentences
         :param batchSize: Number of images used per batch when training
         :param loadExistingModel: Whether or not to load an existing model
+        :param seed: Seed for the random images and sentences trained on
+        :param sparseTargets: Whether or not to train against integer sentence labels with a sparse
+                              categorical loss instead of one-hot encoded targets
+        :param mixedPrecision: Whether or not to train with a mixed precision policy (bfloat16 on CPUs)
+        :param jitCompile: Whether or not to compile the training step with XLA
+        :param sentenceLength: Number of characters embedded per image. Must divide imageSize ** 2.
+                               Defaults to imageSize
+        :param decoderUnits: Width of the decoder's optional hidden layer. See ModelGenerator
+        :param carrierStorePath: Optional directory written by CarrierStore.ingestImages to train on
+                                 real carrier images instead of noise
         """
         self.modelSavePath = modelSavePath
+        self.carrierStorePath = carrierStorePath
         self.loadExistingModel = loadExistingModel
+        self.seed = seed
 
         if self.loadExistingModel:
             file = open(f"{self.modelSavePath}.p", "rb")
@@ -39,6 +77,8 @@ class ModelTrainer(object):
             self.sentenceLength = modelParameters["sentenceLength"]
             self.dictionaryLength = modelParameters["dictionaryLength"]
             self.batchSize = modelParameters["batchSize"]
+            self.sparseTargets = modelParameters.get("sparseTargets", False)
+            self.decoderUnits = modelParameters.get("decoderUnits")
 
             if self.greyScale:
                 self.imageSize = (self.imageSize, self.imageSize, 1)
@@ -52,73 +92,419 @@ class ModelTrainer(object):
                 self.imageSize = (imageSize, imageSize, 3)
 
             self.greyScale = greyScale
-            self.sentenceLength = imageSize
+            self.sentenceLength = sentenceLength if sentenceLength is not None else imageSize
             self.dictionaryLength = dictionaryLength
             self.batchSize = batchSize
+            self.sparseTargets = sparseTargets
+            self.decoderUnits = decoderUnits
 
             modelParameters = {
                 "imageSize": imageSize,
                 "greyScale": greyScale,
-                "sentenceLength": imageSize,
+                "sentenceLength": self.sentenceLength,
                 "dictionaryLength": dictionaryLength,
-                "batchSize": batchSize
+                "batchSize": batchSize,
+                "sparseTargets": sparseTargets,
+                "decoderUnits": decoderUnits
             }
 
-            file = open(f"{modelSavePath}.p", "wb")
-            pickle.dump(obj=modelParameters, file=file)
-            file.close()
+            if self.isChief():
+                file = open(f"{modelSavePath}.p", "wb")
+                pickle.dump(obj=modelParameters, file=file)
+                file.close()
 
+        self.modelParameters = modelParameters
         self.modelGenerator = ModelGenerator(
             imageSize=self.imageSize[0],
             greyScale=self.greyScale,
-            dictionaryLength=self.dictionaryLength
+            dictionaryLength=self.dictionaryLength,
+            sparseTargets=self.sparseTargets,
+            mixedPrecision=mixedPrecision,
+            jitCompile=jitCompile,
+            sentenceLength=self.sentenceLength,
+            decoderUnits=self.decoderUnits
         )
 
         self.dataGenerator = DataGenerator(
             imageSize=self.imageSize[0],
             greyScale=self.greyScale,
-            dictionaryLength=self.dictionaryLength
+            dictionaryLength=self.dictionaryLength,
+            seed=self.seed,
+            sparseTargets=self.sparseTargets,
+            sentenceLength=self.sentenceLength,
+            imageSource=self.getImageSource()
         )
 
         self.model = None,
         self.encoder = None,
         self.decoder = None
+        self.instrumentation = None
+        self.initialEpoch = 0
+
+    @staticmethod
+    def isChief() -> bool:
+        """
+        Determines from the TF_CONFIG environment variable whether this process is the chief of a
+        multi-worker cluster. A process without TF_CONFIG is its own chief.
+
+        :return: Whether or not this process is the chief
+        """
+        tfConfig = json.loads(os.environ.get("TF_CONFIG", "{}"))
+        task = tfConfig.get("task", {})
+
+        if not task:
+            return True
+
+        if "chief" in tfConfig.get("cluster", {}):
+            return task.get("type") == "chief"
+
+        return task.get("type") == "worker" and task.get("index", 0) == 0
+
+    def getImageSource(self) -> CarrierStore:
+        """
+        Opens the carrier store, if any. Each caller gets its own memory maps, so shards running
+        on different threads do not share state
+
+        :return: CarrierStore, or None to train on noise
+        """
+        if self.carrierStorePath is None:
+            return None
+
+        return CarrierStore(storeDirectory=self.carrierStorePath)
+
+    def getDataset(self,
+                   numShards: int = 4,
+                   cacheEpoch: bool = False,
+                   stepsPerEpoch: int = None,
+                   batchSize: int = None,
+                   pipelineId: int = 0,
+                   numPipelines: int = 1) -> tf.data.Dataset:
+        """
+        This method builds a tf.data input pipeline on top of DataGenerator. numShards generators,
+        each with an independent seed, run as Python generators whose batches are interleaved in
+        shard order and prefetched so that data generation overlaps with the training step. The
+        pipeline yields the same batches, in the same order, for the same seed. The generators run
+        Python code and so hold the GIL for part of every batch.
+
+        :param numShards: Number of DataGenerator shards to run in parallel
+        :param cacheEpoch: Whether or not to generate a single epoch of data, cache it in memory and
+                           repeat it
+        :param stepsPerEpoch: Number of batches in the cached epoch. Required when cacheEpoch is True
+        :param batchSize: Number of images and sentences per batch. Defaults to the trainer's batchSize
+        :param pipelineId: Index of this pipeline when several workers each build one
+        :param numPipelines: Total number of pipelines. Each gets an independent set of seeds
+        :return: Dataset yielding ((images, sentences), (images, sentence targets)) batches
+        """
+        if numShards < 1:
+            raise ValueError("Parameter numShards must be at least 1.")
+
+        if cacheEpoch and stepsPerEpoch is None:
+            raise ValueError("Parameter stepsPerEpoch must be specified when caching an epoch.")
+
+        if batchSize is None:
+            batchSize = self.batchSize
+
+        imageSpec = tf.TensorSpec(shape=(batchSize, *self.imageSize), dtype=tf.float32)
+        sentenceSpec = tf.TensorSpec(shape=(batchSize, self.sentenceLength), dtype=tf.int32)
+
+        if self.sparseTargets:
+            sentenceTargetSpec = sentenceSpec
+        else:
+            sentenceTargetSpec = tf.TensorSpec(
+                shape=(batchSize, self.sentenceLength, self.dictionaryLength),
+                dtype=tf.float32
+            )
+
+        # A resumed run draws fresh seeds rather than replaying the data seen before the interruption
+        spawnKey = (self.initialEpoch, ) if self.initialEpoch else ()
+        seeds = np.random.SeedSequence(self.seed, spawn_key=spawnKey).spawn(numPipelines)[pipelineId].spawn(numShards)
+
+        def shardGenerator(shardIndex):
+            dataGenerator = DataGenerator(
+                imageSize=self.imageSize[0],
+                greyScale=self.greyScale,
+                dictionaryLength=self.dictionaryLength,
+                seed=seeds[int(shardIndex)],
+                sparseTargets=self.sparseTargets,
+                sentenceLength=self.sentenceLength,
+                imageSource=self.getImageSource()
+            )
+
+            while True:
+                Ximage, Xsentence, Ysentence = dataGenerator.generateBatch(batchSize=batchSize)
+
+                yield (Ximage, Xsentence), (Ximage, Ysentence)
+
+        dataset = tf.data.Dataset.range(numShards).interleave(
+            lambda shardIndex: tf.data.Dataset.from_generator(
+                shardGenerator,
+                output_signature=((imageSpec, sentenceSpec), (imageSpec, sentenceTargetSpec)),
+                args=(shardIndex, )
+            ),
+            cycle_length=numShards,
+            block_length=1,
+            num_parallel_calls=numShards,
+            deterministic=True
+        )
+
+        if cacheEpoch:
+            dataset = dataset.take(stepsPerEpoch).cache().repeat()
+
+        if self.instrumentation is not None:
+            dataset = self.instrumentation.markDatasetReady(dataset)
+
+        return dataset.prefetch(tf.data.AUTOTUNE)
 
-    def trainModels(self, epochs: int, stepsPerEpoch: int, verbose: int = 1, threshold: float = 0.01) -> None:
+    def trainModels(self,
+                    epochs: int,
+                    stepsPerEpoch: int,
+                    verbose: int = 1,
+                    threshold: float = 0.01,
+                    useDataset: bool = False,
+                    numShards: int = 4,
+                    cacheEpoch: bool = False,
+                    distributed: bool = False,
+                    instrumentationLogPath: str = None,
+                    profileSteps: tuple = None,
+                    checkpointDirectory: str = None,
+                    keepCheckpoints: int = 3,
+                    resume: bool = False):
         """
         This method is responsible for training the models
 
         :param epochs: Number of epochs to use when training
         :param stepsPerEpoch: Number of steps per epoch
         :param verbose: Whether or not to be verbose while training
-        :return:
+        :param threshold: Image reconstruction loss below which training is stopped
+        :param useDataset: Whether or not to feed the model through the parallel tf.data pipeline
+        :param numShards: Number of parallel generator shards when useDataset is True
+        :param cacheEpoch: Whether or not to cache one fixed epoch of data when useDataset is True
+        :param distributed: Whether or not to train data parallel across the workers described by
+                            the TF_CONFIG environment variable. Each worker generates batchSize samples
+                            per step, so the global batch size scales with the number of workers
+        :param instrumentationLogPath: Optional path of a JSON lines file to record per step timings,
+                                       time spent waiting for input, checkpoint save time, and peak RSS to
+        :param profileSteps: Optional (first, last) global steps to capture a TensorFlow profiler trace of.
+                             Requires instrumentationLogPath
+        :param checkpointDirectory: Optional directory to write background checkpoints of the weights,
+                                    optimizer state, epoch, and RNG state to. See BackgroundCheckpoint.
+                                    Workers other than the chief write to a temporary directory instead
+        :param keepCheckpoints: Number of background checkpoints to keep
+        :param resume: Whether or not to resume from the latest checkpoint in checkpointDirectory. The
+                       trainer must be built with the parameters recorded in the checkpoint. Resuming
+                       restores DataGenerator's random state as of the checkpoint. The tf.data pipeline
+                       is not checkpointed, so with useDataset or distributed the resumed run draws
+                       fresh seeds derived from seed and the epoch instead: reproducible when seed is
+                       given, but not the data an uninterrupted run would have seen
+        :return: Keras History of the epochs trained
         """
-        dataGenerator = self.dataGenerator.generateData(batchSize=self.batchSize)
-        self.model, self.encoder, self.decoder = self.modelGenerator.getModel()
+        if resume:
+            if checkpointDirectory is None:
+                raise ValueError("Parameter checkpointDirectory must be specified when resuming.")
 
-        if self.loadExistingModel:
-            self.model.load_weights(filepath=self.modelSavePath)
+            # The epoch and RNG state are restored before any data is generated; the weights and
+            # optimizer state once the model is built
+            manifest = loadManifest(checkpointDirectory=checkpointDirectory)
+            resume = manifest is not None and len(manifest["checkpoints"]) > 0
+
+            if resume:
+                mismatched = sorted(
+                    name for name in set(manifest["modelParameters"]) & set(self.modelParameters)
+                    if manifest["modelParameters"][name] != self.modelParameters[name]
+                )
+
+                if mismatched:
+                    raise ValueError(
+                        f"Cannot resume from {checkpointDirectory}: its checkpoints were trained with " +
+                        ", ".join(f"{name}={manifest['modelParameters'][name]!r}" for name in mismatched) +
+                        " but this trainer has " +
+                        ", ".join(f"{name}={self.modelParameters[name]!r}" for name in mismatched) + "."
+                    )
+
+                latest = manifest["checkpoints"][-1]
+                self.initialEpoch = latest["epoch"] + 1
+
+                if latest["rngState"] is not None:
+                    self.dataGenerator.rng.bit_generator.state = latest["rngState"]
+
+        if instrumentationLogPath is not None:
+            self.instrumentation = InstrumentationCallback(
+                logFilePath=instrumentationLogPath,
+                batchSize=self.batchSize,
+                profileSteps=profileSteps
+            )
 
-        self.model.fit(
-            x=dataGenerator,
-            steps_per_epoch=stepsPerEpoch,
-            epochs=epochs,
-            callbacks=[
-                ModelCheckpoint(
-                    filepath=self.modelSavePath,
-                    monitor="imageReconstruction_loss",
-                    verbose=verbose,
-                    save_weights_only=True,
-                    save_best_only=True
-                ),
-                EarlyStoppingThreshold(
-                    monitor="imageReconstruction_loss",
-                    mode="min",
-                    threshold=threshold
+        if distributed:
+            strategy = tf.distribute.MultiWorkerMirroredStrategy()
+            globalBatchSize = self.batchSize * strategy.num_replicas_in_sync
+
+            def datasetFunction(inputContext):
+                return self.getDataset(
+                    numShards=numShards,
+                    cacheEpoch=cacheEpoch,
+                    stepsPerEpoch=stepsPerEpoch,
+                    batchSize=inputContext.get_per_replica_batch_size(globalBatchSize),
+                    pipelineId=inputContext.input_pipeline_id,
+                    numPipelines=inputContext.num_input_pipelines
                 )
-            ]
+
+            dataGenerator = strategy.distribute_datasets_from_function(datasetFunction)
+
+            with strategy.scope():
+                self.model, self.encoder, self.decoder = self.modelGenerator.getModel()
+
+                if resume:
+                    restoreCheckpoint(model=self.model, checkpointDirectory=checkpointDirectory)
+        else:
+            if useDataset:
+                dataGenerator = self.getDataset(numShards=numShards, cacheEpoch=cacheEpoch, stepsPerEpoch=stepsPerEpoch)
+            else:
+                dataGenerator = self.dataGenerator.generateData(batchSize=self.batchSize, vectorized=True)
+
+                if self.instrumentation is not None:
+                    dataGenerator = self.instrumentation.markGeneratorReady(dataGenerator)
+
+            self.model, self.encoder, self.decoder = self.modelGenerator.getModel()
+
+            if resume:
+                restoreCheckpoint(model=self.model, checkpointDirectory=checkpointDirectory)
+
+        if self.loadExistingModel and not resume:
+            self.model.load_weights(filepath=self.modelSavePath)
+
+        callbacks = []
+        temporaryDirectory = None
+
+        # Every worker checkpoints, since saving may involve collectives across the workers, but
+        # only the chief writes to the real paths. Early stopping runs on every worker too: the
+        # logged metrics are reduced across workers, so all of them reach the same decision
+        if checkpointDirectory is not None:
+            bestWeightsPath = self.modelSavePath
+
+            if not self.isChief():
+                temporaryDirectory = tempfile.mkdtemp(prefix="ModelTrainerWorker")
+                checkpointDirectory = os.path.join(temporaryDirectory, "checkpoints")
+                bestWeightsPath = os.path.join(temporaryDirectory, os.path.basename(self.modelSavePath))
+
+            checkpoint = BackgroundCheckpoint(
+                checkpointDirectory=checkpointDirectory,
+                modelParameters=self.modelParameters,
+                bestWeightsPath=bestWeightsPath,
+                keep=keepCheckpoints,
+                monitor="imageReconstruction_loss",
+                getRngState=None if useDataset or distributed else lambda: self.dataGenerator.rng.bit_generator.state
+            )
+        else:
+            # ModelCheckpoint sends the saves of workers other than the chief to temporary paths itself
+            checkpoint = ModelCheckpoint(
+                filepath=self.modelSavePath,
+                monitor="imageReconstruction_loss",
+                verbose=verbose if self.isChief() else 0,
+                save_weights_only=True,
+                save_best_only=True
+            )
+
+        if self.instrumentation is not None:
+            self.instrumentation.timeCheckpoint(checkpoint)
+
+        callbacks.append(checkpoint)
+
+        callbacks.append(
+            EarlyStoppingThreshold(
+                monitor="imageReconstruction_loss",
+                mode="min",
+                threshold=threshold
+            )
         )
 
+        # Last, so that checkpoint save time is known by the time the epoch is recorded
+        if self.instrumentation is not None:
+            callbacks.append(self.instrumentation)
+
+        try:
+            return self.model.fit(
+                x=dataGenerator,
+                steps_per_epoch=stepsPerEpoch,
+                epochs=epochs,
+                initial_epoch=self.initialEpoch,
+                verbose=verbose if self.isChief() else 0,
+                callbacks=callbacks
+            )
+        finally:
+            if temporaryDirectory is not None:
+                shutil.rmtree(temporaryDirectory, ignore_errors=True)
+
+    def measureStepsPerSecond(self, steps: int = 20, warmupSteps: int = 3) -> float:
+        """
+        This method measures training throughput on a freshly built model, excluding data
+        generation. The same batch is trained on repeatedly after warm up steps that absorb
+        tracing and compilation.
+
+        :param steps: Number of timed training steps
+        :param warmupSteps: Number of untimed training steps run first
+        :return: Training steps per second
+        """
+        model, _, _ = self.modelGenerator.getModel()
+        Ximage, Xsentence, Ysentence = self.dataGenerator.generateBatch(batchSize=self.batchSize)
+
+        for _ in range(warmupSteps):
+            model.train_on_batch(x=[Ximage, Xsentence], y=[Ximage, Ysentence])
+
+        start = time.perf_counter()
+        for _ in range(steps):
+            model.train_on_batch(x=[Ximage, Xsentence], y=[Ximage, Ysentence])
+
+        return steps / (time.perf_counter() - start)
+
+
+def compareTrainingModes(modelSavePath: str, configurations: tuple = ((300, 32), (2000, 4)), steps: int = 20) -> list:
+    """
+    Measures training steps per second with and without mixed precision and XLA for each
+    (imageSize, batchSize) configuration
+
+    Measured on a single CPU core with 5GB of RAM and the default steps=20, in steps per second.
+    (2000, 1) is not a default configuration: it was added because fp32 runs out of memory at
+    (2000, 4):
+
+        (imageSize, batchSize)   fp32   XLA    mixed   mixed + XLA
+        (300, 32)                0.90   0.94   0.83    0.54
+        (2000, 4)                OOM    OOM    0.135   0.098
+        (2000, 1)                0.69   0.47   0.54    0.45
+
+    Mixed precision halves the activation memory, which is what lets (2000, 4) fit, but it is not
+    faster, as the stock TensorFlow build does not use native bfloat16 instructions. XLA only
+    helps fp32 at (300, 32), and only slightly.
+
+    :param modelSavePath: Scratch location for the parameters file each ModelTrainer writes
+    :param configurations: Tuple of (imageSize, batchSize) pairs to measure
+    :param steps: Number of timed training steps per measurement
+    :return: List of dictionaries holding the configuration, mode, and steps per second
+    """
+    results = []
+
+    for imageSize, batchSize in configurations:
+        for mixedPrecision, jitCompile in ((False, False), (False, True), (True, False), (True, True)):
+            trainer = ModelTrainer(
+                modelSavePath=modelSavePath,
+                imageSize=imageSize,
+                greyScale=False,
+                dictionaryLength=1000,
+                batchSize=batchSize,
+                sparseTargets=True,
+                mixedPrecision=mixedPrecision,
+                jitCompile=jitCompile
+            )
+
+            results.append({
+                "imageSize": imageSize,
+                "batchSize": batchSize,
+                "mixedPrecision": mixedPrecision,
+                "jitCompile": jitCompile,
+                "stepsPerSecond": trainer.measureStepsPerSecond(steps=steps)
+            })
+
+    return results
+
 
 class EarlyStoppingThreshold(Callback):
     def __init__(self, monitor: str, mode: str, threshold: float,):
@@ -157,6 +543,164 @@ class EarlyStoppingThreshold(Callback):
                 self.model.stop_training = True
 
 
+class InstrumentationCallback(Callback):
+    def __init__(self, logFilePath: str, batchSize: int, profileSteps: tuple = None):
+        """
+        This class is a Keras callback recording where training time goes. A JSON line is written
+        for every step (wall time, samples per second, time the step waited for its input, peak RSS)
+        and for every epoch (checkpoint save time). Summarize the log with
+        TrainingLog.summarizeTrainingLog.
+
+        The input wait is measured on the consumer side: the input pipeline records when each batch
+        becomes ready, and a step whose batch was ready before it began waited for nothing. Time
+        spent generating data in parallel with earlier steps is therefore not counted.
+
+        :param logFilePath: Path of the JSON lines file to write
+        :param batchSize: Number of samples per step
+        :param profileSteps: Optional (first, last) global steps to capture a TensorFlow profiler trace of.
+                             The trace is written next to the log file
+        """
+        super(InstrumentationCallback, self).__init__()
+
+        self.logFilePath = logFilePath
+        self.batchSize = batchSize
+        self.profileSteps = profileSteps
+        self.profileDirectory = f"{os.path.splitext(logFilePath)[0]}_profile"
+        self.logFile = None
+        self.readyTimes = deque()
+        self.checkpointSeconds = 0.0
+        self.globalStep = 0
+        self.epoch = 0
+        self.stepStart = None
+
+    @staticmethod
+    def getPeakRss() -> int:
+        """
+        :return: Peak resident set size of this process in bytes, or None where it is not available
+        """
+        if resource is None:
+            return None
+
+        peakRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        # Linux reports kilobytes, macOS reports bytes
+        return peakRss if sys.platform == "darwin" else peakRss * 1024
+
+    def markReady(self) -> None:
+        """
+        Records that the next batch in the input pipeline is ready. Batches are consumed in the
+        order they are marked, so the n-th mark belongs to the n-th training step.
+        """
+        self.readyTimes.append(time.perf_counter())
+
+    def markGeneratorReady(self, generator):
+        """
+        Wraps the generator fed to the model, marking each batch as ready when it is yielded
+
+        :param generator: Generator to wrap
+        :return: Generator yielding the same items
+        """
+        for item in generator:
+            self.markReady()
+
+            yield item
+
+    def markDatasetReady(self, dataset: tf.data.Dataset) -> tf.data.Dataset:
+        """
+        Marks each batch of the dataset fed to the model as ready once every stage before this one
+        has produced it. Apply it last, after any interleaving or caching.
+
+        :param dataset: Dataset to mark
+        :return: Dataset yielding the same batches
+        """
+        def markBatch(inputs, targets):
+            tf.py_function(func=self.markReady, inp=[], Tout=[])
+
+            return inputs, targets
+
+        return dataset.map(markBatch)
+
+    def timeCheckpoint(self, checkpoint: Callback) -> None:
+        """
+        Wraps a checkpoint callback's on_epoch_end, accumulating the time it takes
+
+        :param checkpoint: Checkpoint callback to time
+        """
+        onEpochEnd = checkpoint.on_epoch_end
+
+        def timedOnEpochEnd(epoch, logs=None):
+            start = time.perf_counter()
+            onEpochEnd(epoch, logs)
+            self.checkpointSeconds += time.perf_counter() - start
+
+        checkpoint.on_epoch_end = timedOnEpochEnd
+
+    def writeRecord(self, record: dict) -> None:
+        """
+        Writes a single JSON line to the log
+
+        :param record: Dictionary to write
+        """
+        self.logFile.write(json.dumps(record) + "\n")
+
+    def on_train_begin(self, logs=None):
+        self.logFile = open(self.logFilePath, "a")
+        self.writeRecord({"type": "start", "time": time.time(), "batchSize": self.batchSize})
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch = epoch
+
+    def on_train_batch_begin(self, batch, logs=None):
+        if self.profileSteps is not None and self.globalStep == self.profileSteps[0]:
+            tf.profiler.experimental.start(self.profileDirectory)
+
+        self.stepStart = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        stepSeconds = time.perf_counter() - self.stepStart
+
+        # Unmarked input, such as a distributed dataset with several replicas per worker, is not measured
+        readyTime = self.readyTimes.popleft() if self.readyTimes else None
+        inputWaitSeconds = max(0.0, readyTime - self.stepStart) if readyTime is not None else None
+
+        if self.profileSteps is not None and self.globalStep == self.profileSteps[1]:
+            tf.profiler.experimental.stop()
+
+        self.writeRecord({
+            "type": "step",
+            "epoch": self.epoch,
+            "step": batch,
+            "globalStep": self.globalStep,
+            "stepSeconds": stepSeconds,
+            "samplesPerSecond": self.batchSize / stepSeconds if stepSeconds > 0 else None,
+            "inputWaitSeconds": inputWaitSeconds,
+            "peakRssBytes": self.getPeakRss()
+        })
+        self.globalStep += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.writeRecord({
+            "type": "epoch",
+            "epoch": epoch,
+            "checkpointSeconds": self.checkpointSeconds,
+            "peakRssBytes": self.getPeakRss()
+        })
+        self.checkpointSeconds = 0.0
+        self.logFile.flush()
+
+    def on_train_end(self, logs=None):
+        if self.profileSteps is not None and self.profileSteps[0] < self.globalStep <= self.profileSteps[1]:
+            tf.profiler.experimental.stop()
+
+        self.writeRecord({
+            "type": "end",
+            "time": time.time(),
+            "checkpointSeconds": self.checkpointSeconds,
+            "peakRssBytes": self.getPeakRss()
+        })
+        self.logFile.close()
+
+
 if __name__ == "__main__":
     trainer = ModelTrainer(
         modelSavePath="../data/ModelWeights/alternativeModel.h5",
@@ -0,0 +1,229 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+import numpy as np
+import tensorflow as tf
+
+try:
+    from ai_edge_litert.interpreter import Interpreter
+except ImportError:
+    # tf.lite.Interpreter is deprecated in favour of LiteRT, but still works where it is not installed
+    Interpreter = tf.lite.Interpreter
+
+
+ENCODER_FILE_NAME = "encoder.tflite"
+DECODER_FILE_NAME = "decoder.tflite"
+
+
+def isQuantizedModel(path: str) -> bool:
+    """
+    :param path: Path passed to CryptoNet as weightsFilePath
+    :return: Whether or not the path is a directory written by exportQuantized
+    """
+    return os.path.isfile(os.path.join(path, ENCODER_FILE_NAME)) and os.path.isfile(os.path.join(path, DECODER_FILE_NAME))
+
+
+def exportQuantized(cryptoNet, quantizedModelPath: str) -> None:
+    """
+    Exports the encoder and decoder of a CryptoNet as TensorFlow Lite models with dynamic range
+    quantization: weights are stored as int8 and activations are quantized on the fly, so no
+    calibration data is needed. The parameters file is written alongside, as with exportSavedModel,
+    so that CryptoNet(quantizedModelPath) loads the quantized models.
+
+    :param cryptoNet: CryptoNet built from float weights
+    :param quantizedModelPath: Directory to write encoder.tflite and decoder.tflite to
+    """
+    from InferenceEngine import InferenceEngine
+
+    engine = InferenceEngine.fromModels(
+        encoder=cryptoNet.encoder,
+        decoder=cryptoNet.decoder,
+        imageSize=cryptoNet.imageSize,
+        sentenceLength=cryptoNet.sentenceLength
+    )
+
+    os.makedirs(quantizedModelPath, exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as savedModelPath:
+        engine.export(savedModelPath=savedModelPath)
+
+        for signature, fileName in (("encode", ENCODER_FILE_NAME), ("decode", DECODER_FILE_NAME)):
+            converter = tf.lite.TFLiteConverter.from_saved_model(savedModelPath, signature_keys=[signature])
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+            with open(os.path.join(quantizedModelPath, fileName), "wb") as file:
+                file.write(converter.convert())
+
+    with open(f"{quantizedModelPath}.p", "wb") as file:
+        pickle.dump(obj=cryptoNet.modelParameters, file=file)
+
+
+class QuantizedEngine(object):
+    def __init__(self, quantizedModelPath: str, numThreads: int = None):
+        """
+        This class runs the quantized models written by exportQuantized with the LiteRT interpreter,
+        or TensorFlow Lite's where LiteRT is not installed. It has the same encode and decode methods as InferenceEngine, so CryptoNet uses
+        either interchangeably.
+
+        :param quantizedModelPath: Directory holding encoder.tflite and decoder.tflite
+        :param numThreads: Number of threads each interpreter may use. Defaults to TensorFlow Lite's choice
+        """
+        self.quantizedModelPath = quantizedModelPath
+        self.encoderInterpreter = Interpreter(
+            model_path=os.path.join(quantizedModelPath, ENCODER_FILE_NAME),
+            num_threads=numThreads
+        )
+        self.decoderInterpreter = Interpreter(
+            model_path=os.path.join(quantizedModelPath, DECODER_FILE_NAME),
+            num_threads=numThreads
+        )
+
+        # Signature runners resize their inputs to each batch size they are called with
+        self.encodeRunner = self.encoderInterpreter.get_signature_runner("encode")
+        self.decodeRunner = self.decoderInterpreter.get_signature_runner("decode")
+
+        # Interpreters are not thread safe
+        self.lock = threading.Lock()
+
+    def encode(self, images: np.array, sentences: np.array) -> np.array:
+        """
+        :param images: Pre-processed images stacked along the first axis
+        :param sentences: Pre-processed sentences stacked along the first axis
+        :return: The images with the sentences embedded within them
+        """
+        with self.lock:
+            outputs = self.encodeRunner(
+                images=np.asarray(images, dtype=np.float32),
+                sentences=np.asarray(sentences, dtype=np.int32)
+            )
+
+        return next(iter(outputs.values()))
+
+    def decode(self, images: np.array) -> np.array:
+        """
+        :param images: Images with embedded text stacked along the first axis
+        :return: Int32 array of the character codes decoded from each image
+        """
+        with self.lock:
+            outputs = self.decodeRunner(images=np.asarray(images, dtype=np.float32))
+
+        return next(iter(outputs.values()))
+
+    def sizeBytes(self) -> int:
+        """
+        :return: Combined size of the encoder and decoder files
+        """
+        return sum(
+            os.path.getsize(os.path.join(self.quantizedModelPath, fileName))
+            for fileName in (ENCODER_FILE_NAME, DECODER_FILE_NAME)
+        )
+
+
+def compareQuantized(weightsFilePath: str,
+                     quantizedModelPath: str,
+                     imageFilePath: str,
+                     sentences: list,
+                     proportionsToCorrupt: tuple = (0.0, 0.1, 0.2, 0.3),
+                     fillModes: tuple = ("black", "random"),
+                     trials: int = 4,
+                     batchSize: int = None,
+                     repeats: int = 20,
+                     seed: int = 0) -> list:
+    """
+    Compares the float model with its quantized export. For each, reports the median encoder and
+    decoder latency on one batch, the size of the model on disk, and the mean Levenshtein distance
+    and ratio of the recovered sentences at each corruption proportion (0 being the embedded images
+    themselves), measured with CorruptionEvaluator.
+
+    :param weightsFilePath: Path to the float model weights
+    :param quantizedModelPath: Directory written by exportQuantized. Exported first if it does not exist
+    :param imageFilePath: File path to the carrier image
+    :param sentences: Sentences to embed
+    :param proportionsToCorrupt: Proportions of pixels to corrupt
+    :param fillModes: Fill modes to corrupt with
+    :param trials: Number of independently corrupted copies per sentence, fill mode and proportion
+    :param batchSize: Batch size the latency is measured at. Defaults to the model's batchSize
+    :param repeats: Number of timed calls per latency measurement, after one warm up call
+    :param seed: Seed for the pepper and the pixels corrupted, shared by both models
+    :return: List of dictionaries, one per model, fill mode and proportion
+    """
+    from CorruptionEvaluator import CorruptionEvaluator
+    from CryptoNet import CryptoNet
+
+    floatCryptoNet = CryptoNet(weightsFilePath=weightsFilePath, seed=seed)
+
+    if not isQuantizedModel(quantizedModelPath):
+        exportQuantized(cryptoNet=floatCryptoNet, quantizedModelPath=quantizedModelPath)
+
+    quantizedCryptoNet = CryptoNet(weightsFilePath=quantizedModelPath, seed=seed)
+
+    if batchSize is None:
+        batchSize = floatCryptoNet.batchSize
+
+    rng = np.random.default_rng(seed)
+    images = rng.random(size=(batchSize, *floatCryptoNet.imageSize), dtype=np.float32)
+    encodedSentences = floatCryptoNet.preprocessSentences(sentences=[sentences[0]] * batchSize)
+
+    def medianLatency(function) -> float:
+        function()
+        timings = []
+
+        for _ in range(repeats):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+
+        return float(np.median(timings))
+
+    rows = []
+    models = (
+        ("float32", floatCryptoNet, os.path.getsize(weightsFilePath)),
+        ("int8", quantizedCryptoNet, quantizedCryptoNet.engine.sizeBytes())
+    )
+
+    for modelName, cryptoNet, sizeBytes in models:
+        encodeLatency = medianLatency(lambda: cryptoNet.encodeBatch(images=images, sentences=encodedSentences))
+        decodeLatency = medianLatency(lambda: cryptoNet.decodeCodes(images=images))
+
+        results = CorruptionEvaluator(cryptoNet=cryptoNet, seed=seed).evaluate(
+            imageFilePath=imageFilePath,
+            sentences=sentences,
+            proportionsToCorrupt=np.array(proportionsToCorrupt),
+            fillModes=fillModes,
+            trials=trials
+        )
+
+        for fillMode in fillModes:
+            for proportionToCorrupt in proportionsToCorrupt:
+                matching = [
+                    row for row in results
+                    if row["fillMode"] == fillMode and row["proportionToCorrupt"] == float(proportionToCorrupt)
+                ]
+
+                rows.append({
+                    "model": modelName,
+                    "sizeBytes": sizeBytes,
+                    "batchSize": batchSize,
+                    "encodeLatency": encodeLatency,
+                    "decodeLatency": decodeLatency,
+                    "fillMode": fillMode,
+                    "proportionToCorrupt": float(proportionToCorrupt),
+                    "levenshteinDistance": float(np.mean([row["levenshteinDistance"] for row in matching])),
+                    "levenshteinRatio": float(np.mean([row["levenshteinRatio"] for row in matching]))
+                })
+
+    return rows
+
+
+if __name__ == "__main__":
+    testSentence = "Hello there - General Kenobi"
+
+    for result in compareQuantized(
+        weightsFilePath="../data/ModelWeights/pickup.h5",
+        quantizedModelPath="../data/ModelWeights/pickupQuantized",
+        imageFilePath="../img/Raw/twister.png",
+        sentences=[testSentence]
+    ):
+        print(", ".join(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}" for key, value in result.items()))
@@ -0,0 +1,206 @@
+import bisect
+import threading
+import time
+
+from contextlib import contextmanager
+from contextlib import nullcontext
+
+
+# Histogram bucket upper bounds in seconds, from 10 microseconds to 10 seconds
+DEFAULT_BUCKET_BOUNDS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Returned by stage when profiling is disabled, so uninstrumented calls only pay for a no-op with block
+NULL_STAGE = nullcontext()
+
+
+class StageTimings(object):
+    def __init__(self, bucketBounds: tuple):
+        """
+        This class accumulates the count, total, maximum, and histogram of the durations of one stage
+
+        :param bucketBounds: Histogram bucket upper bounds in seconds
+        """
+        self.count = 0
+        self.totalSeconds = 0.0
+        self.maxSeconds = 0.0
+        self.bucketCounts = [0] * (len(bucketBounds) + 1)
+
+
+class StageProfiler(object):
+    def __init__(self, bucketBounds: tuple = DEFAULT_BUCKET_BOUNDS, traceModelCalls: bool = False):
+        """
+        This class times named pipeline stages. Each measurement costs two perf_counter calls and a
+        bisect into fixed histogram buckets under a lock, so it can stay enabled in production.
+        Results are available as a dictionary from stats, or as Prometheus histograms from
+        prometheusText.
+
+        :param bucketBounds: Histogram bucket upper bounds in seconds, in increasing order
+        :param traceModelCalls: Whether or not model calls timed with modelStage are also annotated
+                                in TensorFlow profiler traces. See startTrace
+        """
+        self.bucketBounds = tuple(bucketBounds)
+        self.traceModelCalls = traceModelCalls
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        """
+        Records one duration of a stage
+
+        :param name: Stage name
+        :param seconds: Duration in seconds
+        """
+        bucket = bisect.bisect_left(self.bucketBounds, seconds)
+
+        with self.lock:
+            timings = self.stages.get(name)
+
+            if timings is None:
+                timings = self.stages[name] = StageTimings(bucketBounds=self.bucketBounds)
+
+            timings.count += 1
+            timings.totalSeconds += seconds
+            timings.maxSeconds = max(timings.maxSeconds, seconds)
+            timings.bucketCounts[bucket] += 1
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Times the body of a with block as one occurrence of a stage
+
+        :param name: Stage name
+        """
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.record(name=name, seconds=time.perf_counter() - start)
+
+    @contextmanager
+    def modelStage(self, name: str):
+        """
+        Times a model call as one occurrence of a stage, annotating it in TensorFlow profiler traces
+        when traceModelCalls is set
+
+        :param name: Stage name
+        """
+        if not self.traceModelCalls:
+            with self.stage(name=name):
+                yield
+            return
+
+        import tensorflow as tf
+
+        with self.stage(name=name), tf.profiler.experimental.Trace(name):
+            yield
+
+    @staticmethod
+    def startTrace(logDirectory: str) -> None:
+        """
+        Starts capturing a TensorFlow profiler trace, viewable in TensorBoard
+
+        :param logDirectory: Directory to write the trace to
+        """
+        import tensorflow as tf
+
+        tf.profiler.experimental.start(logDirectory)
+
+    @staticmethod
+    def stopTrace() -> None:
+        """
+        Stops the trace started by startTrace and writes it out
+        """
+        import tensorflow as tf
+
+        tf.profiler.experimental.stop()
+
+    def estimatePercentile(self, bucketCounts: list, maxSeconds: float, quantile: float) -> float:
+        """
+        Estimates a percentile from a histogram as the upper bound of the bucket it falls in
+
+        :param bucketCounts: Histogram of a stage
+        :param maxSeconds: Longest duration of the stage, bounding the estimate
+        :param quantile: Quantile between 0 and 1
+        :return: Estimated duration in seconds
+        """
+        target = quantile * sum(bucketCounts)
+        cumulative = 0
+
+        for bound, count in zip(self.bucketBounds, bucketCounts):
+            cumulative += count
+
+            if cumulative >= target:
+                return min(bound, maxSeconds)
+
+        return maxSeconds
+
+    def stats(self) -> dict:
+        """
+        :return: Dictionary holding, for each stage, its count, total, mean, and maximum duration, the
+                 estimated p50 and p99 durations, and the histogram as {upper bound: count}
+        """
+        with self.lock:
+            stages = {
+                name: (timings.count, timings.totalSeconds, timings.maxSeconds, list(timings.bucketCounts))
+                for name, timings in self.stages.items()
+            }
+
+        stats = {}
+
+        for name, (count, totalSeconds, maxSeconds, bucketCounts) in stages.items():
+            stats[name] = {
+                "count": count,
+                "totalSeconds": totalSeconds,
+                "meanSeconds": totalSeconds / count if count else None,
+                "maxSeconds": maxSeconds,
+                "p50Seconds": self.estimatePercentile(bucketCounts=bucketCounts, maxSeconds=maxSeconds, quantile=0.5),
+                "p99Seconds": self.estimatePercentile(bucketCounts=bucketCounts, maxSeconds=maxSeconds, quantile=0.99),
+                "histogram": {
+                    str(bound): bucketCount
+                    for bound, bucketCount in zip(list(self.bucketBounds) + ["+Inf"], bucketCounts)
+                }
+            }
+
+        return stats
+
+    def prometheusText(self, metricName: str = "cryptonet_stage_seconds") -> str:
+        """
+        Formats the timings in the Prometheus text exposition format, as one histogram labelled by stage
+
+        :param metricName: Name of the histogram metric
+        :return: Text to serve from a metrics endpoint
+        """
+        with self.lock:
+            stages = {
+                name: (timings.count, timings.totalSeconds, list(timings.bucketCounts))
+                for name, timings in sorted(self.stages.items())
+            }
+
+        lines = [
+            f"# HELP {metricName} Duration of each pipeline stage in seconds.",
+            f"# TYPE {metricName} histogram"
+        ]
+
+        for name, (count, totalSeconds, bucketCounts) in stages.items():
+            cumulative = 0
+
+            for bound, bucketCount in zip(self.bucketBounds, bucketCounts):
+                cumulative += bucketCount
+                lines.append(f'{metricName}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+
+            lines.append(f'{metricName}_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'{metricName}_sum{{stage="{name}"}} {totalSeconds}')
+            lines.append(f'{metricName}_count{{stage="{name}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """
+        Discards every timing recorded so far
+        """
+        with self.lock:
+            self.stages = {}
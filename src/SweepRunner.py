@@ -0,0 +1,297 @@
+import csv
+import itertools
+import math
+import multiprocessing
+import os
+import time
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Parameters a sweep may vary. threshold is passed to trainModels, the rest to ModelTrainer
+SWEEP_PARAMETERS = ("imageSize", "greyScale", "dictionaryLength", "batchSize", "sentenceLength", "decoderUnits", "threshold")
+
+
+def initializeWorker(intraOpThreads: int, interOpThreads: int) -> None:
+    """
+    Limits the threads TensorFlow uses in a worker process. Runs before TensorFlow executes
+    anything in the process, which is the only time the thread pools can be sized.
+
+    :param intraOpThreads: Threads used within a single op
+    :param interOpThreads: Threads used to run independent ops concurrently
+    """
+    os.environ["OMP_NUM_THREADS"] = str(intraOpThreads)
+
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(intraOpThreads)
+    tf.config.threading.set_inter_op_parallelism_threads(interOpThreads)
+
+
+def getSentenceAccuracy(logs: dict) -> float:
+    """
+    :param logs: Logs of a training epoch
+    :return: The sentence reconstruction accuracy, whichever accuracy metric the model was compiled with
+    """
+    for name, value in logs.items():
+        if name.startswith("sentenceReconstruction_") and name.endswith("accuracy"):
+            return float(value)
+
+    return None
+
+
+def runTrial(trial: dict, epochs: int, stepsPerEpoch: int, useDataset: bool) -> dict:
+    """
+    Trains a trial up to a total number of epochs, resuming from its own checkpoints so that a
+    promoted trial carries on where the previous rung left it. Defined at module level so that it
+    can be shipped to worker processes.
+
+    :param trial: Dictionary holding the trialId, directory, seed and parameters of the trial
+    :param epochs: Total number of epochs the trial should have trained for once this call returns
+    :param stepsPerEpoch: Number of steps per epoch
+    :param useDataset: Whether or not to feed the model through the parallel tf.data pipeline
+    :return: Dictionary of the metrics of the last epoch trained and the time taken
+    """
+    import tensorflow as tf
+    from ModelTrainer import ModelTrainer
+
+    # Worker processes run many trials; drop the graph of the previous one
+    tf.keras.backend.clear_session()
+
+    parameters = dict(trial["parameters"])
+    threshold = parameters.pop("threshold", 0.01)
+    checkpointDirectory = os.path.join(trial["directory"], "checkpoints")
+    start = time.perf_counter()
+
+    trainer = ModelTrainer(
+        modelSavePath=os.path.join(trial["directory"], "weights.h5"),
+        loadExistingModel=False,
+        seed=trial["seed"],
+        **parameters
+    )
+    history = trainer.trainModels(
+        epochs=epochs,
+        stepsPerEpoch=stepsPerEpoch,
+        verbose=0,
+        threshold=threshold,
+        useDataset=useDataset,
+        numShards=1,
+        checkpointDirectory=checkpointDirectory,
+        keepCheckpoints=1,
+        resume=True
+    )
+
+    logs = {name: values[-1] for name, values in history.history.items() if values}
+
+    return {
+        "epochs": trainer.initialEpoch + len(history.epoch),
+        "imageReconstructionLoss": float(logs["imageReconstruction_loss"]) if "imageReconstruction_loss" in logs else None,
+        "sentenceAccuracy": getSentenceAccuracy(logs=logs),
+        "seconds": time.perf_counter() - start
+    }
+
+
+class SweepRunner(object):
+    def __init__(self,
+                 sweepDirectory: str,
+                 grid: dict,
+                 stepsPerEpoch: int,
+                 minEpochs: int = 1,
+                 maxEpochs: int = 9,
+                 reductionFactor: int = 3,
+                 numProcesses: int = None,
+                 interOpThreads: int = 1,
+                 useDataset: bool = False,
+                 seed: int = 0):
+        """
+        This class searches a grid of ModelTrainer configurations with successive halving. Every
+        configuration first trains for minEpochs; the best 1 / reductionFactor of them, ranked on
+        imageReconstruction_loss and sentence accuracy, train reductionFactor times as long, and so
+        on until maxEpochs. Trials run in a pool of spawned processes, and the CPU cores are split
+        evenly between the processes through TensorFlow's thread pool sizes so that trials do not
+        oversubscribe the machine.
+
+        :param sweepDirectory: Directory to write each trial's weights and checkpoints, and the results table, to
+        :param grid: Dictionary mapping parameter names to the values to try. See SWEEP_PARAMETERS
+        :param stepsPerEpoch: Number of steps per epoch
+        :param minEpochs: Number of epochs every configuration trains for
+        :param maxEpochs: Number of epochs the surviving configurations train for
+        :param reductionFactor: Factor by which the number of trials shrinks and the epochs grow per rung
+        :param numProcesses: Number of trials trained at once. Defaults to a quarter of the CPU count
+        :param interOpThreads: Number of inter-op threads per process
+        :param useDataset: Whether or not to feed the models through the parallel tf.data pipeline
+        :param seed: Seed for the data each trial trains on
+        """
+        for name in grid:
+            if name not in SWEEP_PARAMETERS:
+                raise ValueError(f"Cannot sweep {name}. Parameters must be among {', '.join(SWEEP_PARAMETERS)}.")
+
+        if reductionFactor < 2:
+            raise ValueError("Parameter reductionFactor must be at least 2.")
+
+        if not 1 <= minEpochs <= maxEpochs:
+            raise ValueError("Parameters must satisfy 1 <= minEpochs <= maxEpochs.")
+
+        self.sweepDirectory = sweepDirectory
+        self.grid = grid
+        self.stepsPerEpoch = stepsPerEpoch
+        self.minEpochs = minEpochs
+        self.maxEpochs = maxEpochs
+        self.reductionFactor = reductionFactor
+        self.numProcesses = numProcesses if numProcesses is not None else max(1, (os.cpu_count() or 1) // 4)
+        self.interOpThreads = interOpThreads
+        self.intraOpThreads = max(1, (os.cpu_count() or 1) // self.numProcesses)
+        self.useDataset = useDataset
+        self.seed = seed
+
+    def getTrials(self) -> list:
+        """
+        :return: List of trials, one per combination of the grid's values
+        """
+        names = list(self.grid)
+        seeds = np.random.SeedSequence(self.seed).generate_state(int(np.prod([len(self.grid[name]) for name in names])))
+
+        return [
+            {
+                "trialId": idx,
+                "directory": os.path.join(self.sweepDirectory, f"trial{idx:04d}"),
+                "seed": int(seeds[idx]),
+                "parameters": dict(zip(names, values))
+            }
+            for idx, values in enumerate(itertools.product(*(self.grid[name] for name in names)))
+        ]
+
+    def getRungEpochs(self) -> list:
+        """
+        :return: Total number of epochs trained by the end of each rung
+        """
+        rungEpochs = [self.minEpochs]
+
+        while rungEpochs[-1] < self.maxEpochs:
+            rungEpochs.append(min(rungEpochs[-1] * self.reductionFactor, self.maxEpochs))
+
+        return rungEpochs
+
+    @staticmethod
+    def rankTrials(results: list) -> list:
+        """
+        Orders trial results from best to worst by the sum of their rank on image reconstruction
+        loss (lower is better) and on sentence accuracy (higher is better). Ties are broken by loss.
+
+        :param results: List of result rows of the same rung, each with an image reconstruction loss
+        :return: The rows, best first
+        """
+        if any(row["imageReconstructionLoss"] is None for row in results):
+            raise ValueError("Cannot rank trials without an image reconstruction loss.")
+
+        losses = np.array([row["imageReconstructionLoss"] for row in results], dtype=np.float64)
+        accuracies = np.array([
+            row["sentenceAccuracy"] if row["sentenceAccuracy"] is not None else -np.inf
+            for row in results
+        ], dtype=np.float64)
+
+        lossRanks = losses.argsort().argsort()
+        accuracyRanks = (-accuracies).argsort().argsort()
+        order = np.lexsort((losses, lossRanks + accuracyRanks))
+
+        return [results[idx] for idx in order]
+
+    def run(self) -> list:
+        """
+        Runs the sweep and writes the results table to results.csv in the sweep directory
+
+        :return: List of result rows, one per trial and rung it trained in
+        """
+        os.makedirs(self.sweepDirectory, exist_ok=True)
+
+        trials = self.getTrials()
+        rows = []
+        previousResults = {}
+
+        with ProcessPoolExecutor(
+            max_workers=self.numProcesses,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initializeWorker,
+            initargs=(self.intraOpThreads, self.interOpThreads)
+        ) as pool:
+            rungEpochs = self.getRungEpochs()
+
+            for rung, epochs in enumerate(rungEpochs):
+                futures = [
+                    pool.submit(runTrial, trial, epochs, self.stepsPerEpoch, self.useDataset)
+                    for trial in trials
+                ]
+
+                rungRows = []
+                for trial, future in zip(trials, futures):
+                    row = {"trialId": trial["trialId"], **trial["parameters"], "rung": rung}
+
+                    try:
+                        result = future.result()
+
+                        # A trial that already met its threshold trains no further epochs; keep its metrics
+                        if result["imageReconstructionLoss"] is None and trial["trialId"] in previousResults:
+                            result = {**previousResults[trial["trialId"]], "seconds": result["seconds"]}
+
+                        previousResults[trial["trialId"]] = result
+                        row.update(result)
+                        row["status"] = "trained"
+                    except Exception as error:
+                        row.update({"epochs": None, "imageReconstructionLoss": None, "sentenceAccuracy": None, "seconds": None})
+                        row["status"] = f"failed: {error}"
+
+                    rungRows.append(row)
+
+                # A trial that trained no epochs in any rung has no loss to rank on, so it goes no further
+                for row in rungRows:
+                    if row["status"] == "trained" and row["imageReconstructionLoss"] is None:
+                        row["status"] = "unscored"
+
+                rows.extend(rungRows)
+                ranked = self.rankTrials([row for row in rungRows if row["status"] == "trained"])
+
+                if rung == len(rungEpochs) - 1:
+                    for position, row in enumerate(ranked):
+                        row["status"] = "best" if position == 0 else "final"
+                    break
+
+                keep = max(1, math.ceil(len(trials) / self.reductionFactor))
+                promoted = {row["trialId"] for row in ranked[:keep]}
+
+                for row in ranked:
+                    row["status"] = "promoted" if row["trialId"] in promoted else "pruned"
+
+                trials = [trial for trial in trials if trial["trialId"] in promoted]
+
+                if not trials:
+                    break
+
+        self.writeResults(rows=rows)
+
+        return rows
+
+    def writeResults(self, rows: list, fileName: str = "results.csv") -> None:
+        """
+        Writes every result row to a single CSV table in the sweep directory
+
+        :param rows: Result rows returned by run
+        :param fileName: Name of the table
+        """
+        fieldNames = ["trialId", *self.grid, "rung", "epochs", "imageReconstructionLoss", "sentenceAccuracy", "seconds", "status"]
+
+        with open(os.path.join(self.sweepDirectory, fileName), "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=fieldNames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    runner = SweepRunner(
+        sweepDirectory="../data/Sweep",
+        grid={"imageSize": [50, 100], "dictionaryLength": [100, 200], "batchSize": [16, 32], "threshold": [0.01]},
+        stepsPerEpoch=100
+    )
+
+    for row in runner.run():
+        print(row)
@@ -0,0 +1,115 @@
+import numpy as np
+
+
+def encodeMessages(messages: list) -> tuple:
+    """
+    Converts many strings to character codes at once by encoding their concatenation as UTF-32 and
+    viewing the bytes as integers, rather than calling ord on each character. Lone surrogates are
+    encoded as their code points, as ord would
+
+    :param messages: Strings to encode
+    :return: Tuple of (int32 array holding the codes of every message back to back, int64 array of
+             the length of each message)
+    """
+    lengths = np.fromiter((len(message) for message in messages), dtype=np.int64, count=len(messages))
+    codes = np.frombuffer("".join(messages).encode("utf-32-le", errors="surrogatepass"), dtype="<u4").astype(np.int32)
+
+    return codes, lengths
+
+
+def decodeMessages(codes: np.array, lengths: np.array) -> list:
+    """
+    Converts character codes stored back to back into strings with a single UTF-32 decode. Codes
+    that are not valid code points decode to U+FFFD, so every code still maps to one character.
+
+    :param codes: Integer array holding the codes of every message back to back
+    :param lengths: Length of each message
+    :return: List of strings
+    """
+    text = np.asarray(codes, dtype="<u4").tobytes().decode("utf-32-le", errors="replace")
+    ends = np.cumsum(lengths)
+
+    return [text[end - length:end] for end, length in zip(ends.tolist(), np.asarray(lengths).tolist())]
+
+
+def encodeMessage(message: str) -> np.array:
+    """
+    Converts a single string to character codes
+
+    :param message: String to encode
+    :return: Int32 array of the string's character codes
+    """
+    return encodeMessages([message])[0]
+
+
+def decodeMessage(codes: np.array) -> str:
+    """
+    Converts a single array of character codes back into a string
+
+    :param codes: Integer array of character codes
+    :return: The string they represent
+    """
+    return decodeMessages(codes, [len(codes)])[0]
+
+
+class TextCodec(object):
+    def __init__(self, dictionaryLength: int, pepperStart: int = None):
+        """
+        This class converts between batches of sentences and the character code matrices the models
+        work with. The codes from pepperStart up to dictionaryLength are pepper: they pad sentences
+        when encoding and are dropped when decoding, through a lookup table rather than a per
+        character membership test.
+
+        :param dictionaryLength: Number of distinct character codes
+        :param pepperStart: First code reserved for pepper. Defaults to the final 20% of the dictionary
+        """
+        self.dictionaryLength = dictionaryLength
+        self.pepperStart = pepperStart if pepperStart is not None else int(0.8 * dictionaryLength)
+        self.isMessageCode = np.arange(self.dictionaryLength) < self.pepperStart
+
+    def encodeBatch(self, sentences: list, maxLength: int) -> tuple:
+        """
+        Encodes sentences and checks that they fit and contain no pepper characters
+
+        :param sentences: Strings to encode
+        :param maxLength: Maximum number of characters per sentence
+        :return: Tuple of (int32 array of every sentence's codes back to back, length of each sentence)
+        """
+        codes, lengths = encodeMessages(sentences)
+
+        if not np.all((0 < lengths) & (lengths <= maxLength)):
+            raise ValueError(f"Length of string must be between 0 and {maxLength + 1}.")
+
+        if np.any(codes >= self.pepperStart):
+            raise ValueError(f"String contains invalid characters.")
+
+        return codes, lengths
+
+    def encodePadded(self, sentences: list, maxLength: int, padValue: int = 0) -> np.array:
+        """
+        Encodes sentences into a matrix with one left aligned sentence per row
+
+        :param sentences: Strings to encode
+        :param maxLength: Number of columns
+        :param padValue: Code filling the columns after each sentence
+        :return: Int32 matrix of shape (len(sentences), maxLength)
+        """
+        codes, lengths = self.encodeBatch(sentences=sentences, maxLength=maxLength)
+
+        padded = np.full(shape=(len(sentences), maxLength), fill_value=padValue, dtype=np.int32)
+        padded[np.arange(maxLength) < lengths[:, np.newaxis]] = codes
+
+        return padded
+
+    def decodeBatch(self, codes: np.array) -> list:
+        """
+        Decodes a batch of character code rows, such as the argmax of the decoder output, dropping
+        every pepper code
+
+        :param codes: Integer matrix of shape (batch, sentenceLength) with values below dictionaryLength
+        :return: List of the sentence held by each row
+        """
+        codes = np.asarray(codes)
+        mask = self.isMessageCode[codes]
+
+        return decodeMessages(codes[mask], mask.sum(axis=1))
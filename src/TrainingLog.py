@@ -0,0 +1,78 @@
+import json
+import numpy as np
+
+
+def summarizeTrainingLog(logFilePath: str) -> dict:
+    """
+    Summarizes a JSON lines log written by ModelTrainer's InstrumentationCallback, breaking the
+    wall time down into training steps, time the steps waited for input, and checkpointing
+
+    :param logFilePath: Path to the log
+    :return: Dictionary summarizing the run
+    """
+    steps, epochs, ends = [], [], []
+
+    with open(logFilePath, "r") as file:
+        for line in file:
+            record = json.loads(line)
+
+            if record["type"] == "step":
+                steps.append(record)
+            elif record["type"] == "epoch":
+                epochs.append(record)
+            elif record["type"] == "end":
+                ends.append(record)
+
+    stepSeconds = np.array([step["stepSeconds"] for step in steps])
+    inputWaitSeconds = float(sum(step["inputWaitSeconds"] or 0.0 for step in steps))
+    checkpointSeconds = float(sum(record["checkpointSeconds"] for record in epochs + ends))
+    peakRssBytes = max(
+        (record["peakRssBytes"] for record in steps + epochs + ends if record["peakRssBytes"] is not None),
+        default=None
+    )
+    totalStepSeconds = float(stepSeconds.sum())
+    totalSeconds = totalStepSeconds + checkpointSeconds
+
+    return {
+        "steps": len(steps),
+        "epochs": len(epochs),
+        "totalStepSeconds": totalStepSeconds,
+        "meanStepSeconds": float(stepSeconds.mean()) if steps else None,
+        "p50StepSeconds": float(np.percentile(stepSeconds, 50)) if steps else None,
+        "p99StepSeconds": float(np.percentile(stepSeconds, 99)) if steps else None,
+        "samplesPerSecond": float(np.mean([step["samplesPerSecond"] for step in steps if step["samplesPerSecond"]])) if steps else None,
+        "inputWaitSeconds": inputWaitSeconds,
+        "checkpointSeconds": checkpointSeconds,
+        "inputWaitFraction": inputWaitSeconds / totalSeconds if totalSeconds > 0 else None,
+        "checkpointFraction": checkpointSeconds / totalSeconds if totalSeconds > 0 else None,
+        "peakRssBytes": peakRssBytes
+    }
+
+
+def formatSummary(summary: dict) -> str:
+    """
+    Formats a summary returned by summarizeTrainingLog for printing
+
+    :param summary: Summary to format
+    :return: Human readable summary
+    """
+    def seconds(value):
+        return "n/a" if value is None else f"{value:.4f}s"
+
+    def fraction(value):
+        return "n/a" if value is None else f"{100 * value:.1f}%"
+
+    samplesPerSecond = "n/a" if summary["samplesPerSecond"] is None else f"{summary['samplesPerSecond']:.2f}"
+    peakRss = "n/a" if summary["peakRssBytes"] is None else f"{summary['peakRssBytes'] / 2 ** 20:.1f} MiB"
+
+    lines = [
+        f"Steps: {summary['steps']} over {summary['epochs']} epochs",
+        f"Step time: total {seconds(summary['totalStepSeconds'])}, mean {seconds(summary['meanStepSeconds'])}, "
+        f"p50 {seconds(summary['p50StepSeconds'])}, p99 {seconds(summary['p99StepSeconds'])}",
+        f"Samples per second: {samplesPerSecond}",
+        f"Waiting for input: {seconds(summary['inputWaitSeconds'])} ({fraction(summary['inputWaitFraction'])} of step and checkpoint time)",
+        f"Checkpointing: {seconds(summary['checkpointSeconds'])} ({fraction(summary['checkpointFraction'])})",
+        f"Peak RSS: {peakRss}"
+    ]
+
+    return "\n".join(lines)
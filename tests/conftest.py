@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The modules in src import each other by name, as when run from within src
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# The models use the tf.keras 2 API (h5 weights); newer TensorFlow releases need tf_keras for it
+os.environ.setdefault("TF_USE_LEGACY_KERAS", "1")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
@@ -0,0 +1,14 @@
+import pytest
+
+
+def test_runBenchmarksOnTinyModel():
+    pytest.importorskip("tensorflow")
+    from BenchmarkSuite import compareBenchmarks
+    from BenchmarkSuite import runBenchmarks
+
+    benchmarks = runBenchmarks(imageSizes=(8,), batchSizes=(2,), proportionsToCorrupt=(0.1,), repeats=1)
+
+    assert "preprocessSentence[imageSize=8]" in benchmarks["results"]
+    assert "encryptDecrypt[imageSize=8]" in benchmarks["results"]
+    assert all(timing["seconds"] >= 0 for timing in benchmarks["results"].values())
+    assert {row["status"] for row in compareBenchmarks(benchmarks, benchmarks)} == {"ok"}
@@ -0,0 +1,31 @@
+import os
+import numpy as np
+
+from CarrierStore import CarrierStore
+from CarrierStore import ingestImages
+from ImageIO import writeImage
+
+
+def test_ingestImagesPacksTrimmedShards(tmp_path):
+    sourceDirectory, storeDirectory = os.path.join(tmp_path, "source"), os.path.join(tmp_path, "store")
+    os.makedirs(sourceDirectory)
+    rng = np.random.default_rng(0)
+
+    for idx in range(5):
+        writeImage(imageFilePath=os.path.join(sourceDirectory, f"image{idx}.png"), image=rng.random(size=(12, 10, 3)))
+
+    with open(os.path.join(sourceDirectory, "image5.png"), "wb") as file:
+        file.write(b"not an image")
+
+    index = ingestImages(sourceDirectory=sourceDirectory, storeDirectory=storeDirectory, imageSize=8, shardSize=2, numWorkers=2)
+
+    assert index["count"] == 5
+    assert [entry["count"] for entry in index["shards"]] == [2, 2, 1]
+    assert index["skipped"] == [os.path.join(sourceDirectory, "image5.png")]
+    assert np.load(os.path.join(storeDirectory, index["shards"][-1]["file"]), mmap_mode="r").shape == (1, 8, 8, 3)
+
+    store = CarrierStore(storeDirectory=storeDirectory)
+    batch = store.sampleBatch(rng=rng, out=np.empty(shape=(6, 8, 8, 3), dtype=np.float32))
+
+    assert len(store) == 5
+    assert 0.0 <= batch.min() and batch.max() <= 1.0
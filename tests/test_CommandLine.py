@@ -0,0 +1,11 @@
+import CommandLine
+
+
+def test_localWorkersForwardTheArgumentsGivenToMain(monkeypatch):
+    launches = []
+    monkeypatch.setattr(CommandLine, "launchLocalWorkers", lambda **kwargs: launches.append(kwargs))
+
+    CommandLine.main(["train", "--save-path", "weights.h5", "--epochs", "3", "--steps-per-epoch", "5", "--local-workers", "2"])
+
+    assert launches[0]["argv"] == ["train", "--save-path", "weights.h5", "--epochs", "3", "--steps-per-epoch", "5", "--distributed"]
+    assert launches[0]["numWorkers"] == 2
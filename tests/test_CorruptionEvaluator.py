@@ -0,0 +1,52 @@
+import os
+import numpy as np
+import pytest
+
+
+def test_evaluateDecodesFullBatches(tmp_path):
+    pytest.importorskip("tensorflow")
+    pytest.importorskip("Levenshtein")
+    from BenchmarkSuite import createRandomModel
+    from CorruptionEvaluator import CorruptionEvaluator
+    from CryptoNet import CryptoNet
+    from ImageIO import writeImage
+
+    cryptoNet = CryptoNet(weightsFilePath=createRandomModel(directory=str(tmp_path), imageSize=8, batchSize=4), seed=0)
+    imageFilePath = os.path.join(tmp_path, "carrier.png")
+    writeImage(imageFilePath=imageFilePath, image=np.full(shape=(8, 8, 3), fill_value=0.5))
+
+    batchSizes = []
+    decodeBatch = cryptoNet.decodeBatch
+
+    def recordingDecodeBatch(images):
+        batchSizes.append(len(images))
+        return decodeBatch(images)
+
+    cryptoNet.decodeBatch = recordingDecodeBatch
+
+    rows = CorruptionEvaluator(cryptoNet=cryptoNet, seed=0, numProcesses=1).evaluate(
+        imageFilePath=imageFilePath,
+        sentences=["Hi", "there"],
+        proportionsToCorrupt=np.array([0.0, 0.5, 1.0]),
+        fillModes=("black", ),
+        trials=1
+    )
+
+    assert batchSizes == [4, 2]
+    assert [(row["sentenceIndex"], row["proportionToCorrupt"]) for row in rows] == [
+        (0, 0.0), (0, 0.5), (0, 1.0), (1, 0.0), (1, 0.5), (1, 1.0)
+    ]
+    assert all(0.0 <= row["levenshteinRatio"] <= 1.0 for row in rows)
+
+
+def test_writeResultsAcceptsNoRows(tmp_path):
+    pytest.importorskip("Levenshtein")
+    from CorruptionEvaluator import CorruptionEvaluator
+    from CorruptionEvaluator import RESULT_FIELDS
+
+    CorruptionEvaluator.writeResults(rows=[], outputDirectory=str(tmp_path))
+
+    with open(os.path.join(tmp_path, "LevenshteinResults.csv"), "r", encoding="utf-8") as file:
+        assert file.read().strip() == ",".join(RESULT_FIELDS)
+
+    assert CorruptionEvaluator.loadResults(os.path.join(tmp_path, "LevenshteinResults.json")) == []
@@ -0,0 +1,120 @@
+import os
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def cryptoNet(tmp_path):
+    pytest.importorskip("tensorflow")
+    from BenchmarkSuite import createRandomModel
+    from CryptoNet import CryptoNet
+
+    return CryptoNet(weightsFilePath=createRandomModel(directory=str(tmp_path), imageSize=16), seed=0)
+
+
+def test_preprocessSentencesPreservesOrder(cryptoNet):
+    sentences = ["Hello there", "General Kenobi", "a"]
+    pepperedSentences = cryptoNet.preprocessSentences(sentences=sentences)
+
+    assert pepperedSentences.shape == (3, 16)
+    assert cryptoNet.codec.decodeBatch(codes=pepperedSentences) == sentences
+
+
+def test_preprocessSentencesAcceptsNoSentences(cryptoNet):
+    pepperedSentences = cryptoNet.preprocessSentences(sentences=[])
+
+    assert pepperedSentences.shape == (0, 16)
+    assert pepperedSentences.dtype == np.int32
+
+
+def test_encryptTiledKeepsOriginalSize(cryptoNet):
+    img = np.random.default_rng(0).random(size=(40, 37, 3), dtype=np.float32)
+    original, imageWithEmbeddedText = cryptoNet.encryptTiled(imageFilePath=img, sentence="x" * 48)
+
+    assert original.shape == imageWithEmbeddedText.shape == img.shape
+    np.testing.assert_array_equal(imageWithEmbeddedText[32:], img[32:])
+    np.testing.assert_array_equal(imageWithEmbeddedText[:, 32:], img[:, 32:])
+
+    with pytest.raises(ValueError):
+        cryptoNet.encryptTiled(imageFilePath=img, sentence="x" * 49)
+
+
+def test_pepperPadsSentences(cryptoNet):
+    pepperedSentence = cryptoNet.preprocessSentences(sentences=["hi"])[0]
+    padding = [chr(code) for code in pepperedSentence if chr(code) not in "hi"]
+
+    assert len(padding) == 14
+    assert set(padding) <= set(cryptoNet.pepper)
+    assert len(cryptoNet.pepper) == cryptoNet.dictionaryLength - cryptoNet.pepperStart
+
+
+def test_decryptStreamReadsPathsWithGlobCharacters(cryptoNet, tmp_path):
+    from ImageIO import writeImage
+
+    imageFilePath = str(tmp_path / "carrier[1].png")
+    writeImage(imageFilePath=imageFilePath, image=np.zeros(shape=(16, 16, 3), dtype=np.float32))
+
+    assert [path for path, _ in cryptoNet.decryptStream(source=imageFilePath)] == [imageFilePath]
+
+
+def test_tiledRejectsImagesSmallerThanOneTile(cryptoNet):
+    img = np.zeros(shape=(12, 40, 3), dtype=np.float32)
+
+    with pytest.raises(ValueError, match="smaller than one"):
+        cryptoNet.encryptTiled(imageFilePath=img, sentence="hi")
+
+    with pytest.raises(ValueError, match="smaller than one"):
+        cryptoNet.decryptTiled(img=img)
+
+
+def test_encryptBatchEncodesInBatchesAndSavesInOrder(cryptoNet, tmp_path):
+    images = [np.full(shape=(16, 16, 3), fill_value=idx / 10, dtype=np.float32) for idx in range(5)]
+    outputPaths = [(str(tmp_path / f"embedded{idx}.png"), str(tmp_path / f"preprocessed{idx}.png")) for idx in range(5)]
+
+    batchSizes = []
+    encodeBatch = cryptoNet.encodeBatch
+
+    def recordingEncodeBatch(images, sentences):
+        batchSizes.append(len(images))
+        return encodeBatch(images=images, sentences=sentences)
+
+    cryptoNet.encodeBatch = recordingEncodeBatch
+    results = list(cryptoNet.encryptBatch(
+        pairs=[(image, f"message {idx}") for idx, image in enumerate(images)],
+        saveOutput=True,
+        outputPaths=outputPaths,
+        batchSize=2
+    ))
+
+    assert batchSizes == [2, 2, 1]
+    assert len(results) == 5
+
+    for image, (preProcessedImage, imageWithEmbeddedText) in zip(images, results):
+        np.testing.assert_allclose(preProcessedImage, image)
+        assert imageWithEmbeddedText.shape == (16, 16, 3)
+
+    assert all(os.path.isfile(path) for paths in outputPaths for path in paths)
+
+
+def test_decryptStreamMatchesDecodeBatchInInputOrder(cryptoNet):
+    rng = np.random.default_rng(0)
+    images = [rng.random(size=(16, 16, 3), dtype=np.float32) for _ in range(5)]
+
+    streamed = list(cryptoNet.decryptStream(source=iter(images), batchSize=2, numWorkers=2))
+
+    assert [source for source, _ in streamed] == list(range(5))
+    assert [sentence for _, sentence in streamed] == cryptoNet.decodeBatch(np.stack(images))
+
+
+def test_sentenceLengthIsIndependentOfImageSize(tmp_path):
+    pytest.importorskip("tensorflow")
+    from BenchmarkSuite import createRandomModel
+    from CryptoNet import CryptoNet
+
+    cryptoNet = CryptoNet(weightsFilePath=createRandomModel(directory=str(tmp_path), imageSize=16, sentenceLength=64), seed=0)
+    sentences = cryptoNet.preprocessSentences(sentences=["x" * 60])
+    imageWithEmbeddedText = cryptoNet.encodeBatch(images=np.zeros(shape=(1, 16, 16, 3), dtype=np.float32), sentences=sentences)
+
+    assert sentences.shape == (1, 64)
+    assert imageWithEmbeddedText.shape == (1, 16, 16, 3)
+    assert cryptoNet.decodeCodes(images=imageWithEmbeddedText).shape == (1, 64)
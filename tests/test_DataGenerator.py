@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from DataGenerator import DataGenerator
+
+
+def test_generateDataYieldsIndependentBatches():
+    generator = DataGenerator(imageSize=4, greyScale=False, dictionaryLength=10, seed=0).generateData(batchSize=2, vectorized=True)
+
+    (firstImages, firstSentences), (_, firstTargets) = next(generator)
+    firstImagesCopy, firstSentencesCopy = firstImages.copy(), firstSentences.copy()
+    (secondImages, secondSentences), _ = next(generator)
+
+    assert not np.shares_memory(firstImages, secondImages)
+    assert not np.shares_memory(firstSentences, secondSentences)
+    np.testing.assert_array_equal(firstImages, firstImagesCopy)
+    np.testing.assert_array_equal(firstSentences, firstSentencesCopy)
+    np.testing.assert_array_equal(firstTargets.argmax(axis=-1), firstSentences)
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_sparseTargetsAreTheSentences(vectorized):
+    generator = DataGenerator(imageSize=4, greyScale=False, dictionaryLength=10, seed=0, sparseTargets=True).generateData(batchSize=2, vectorized=vectorized)
+
+    (_, sentences), (_, targets) = next(generator)
+
+    assert targets.shape == (2, 4)
+    assert np.issubdtype(targets.dtype, np.integer)
+    np.testing.assert_array_equal(targets, sentences)
+
+
+def test_sparseModelTrainsOnIntegerTargets():
+    pytest.importorskip("tensorflow")
+    from ModelGenerator import ModelGenerator
+
+    model, _, _ = ModelGenerator(imageSize=8, greyScale=False, dictionaryLength=10, sparseTargets=True).getModel()
+    (images, sentences), targets = next(DataGenerator(imageSize=8, greyScale=False, dictionaryLength=10, seed=0, sparseTargets=True).generateData(batchSize=2, vectorized=True))
+
+    logs = model.train_on_batch(x=[images, sentences], y=targets, return_dict=True)
+
+    assert any("sparse_categorical_accuracy" in name for name in logs)
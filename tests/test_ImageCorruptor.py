@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from ImageCorruptor import ImageCorruptor
+
+
+@pytest.mark.parametrize("proportionToCorrupt", [0.0, 0.29, 0.5, 1.0])
+def test_corruptImagesChangesExactlyTheProportionOfPixels(proportionToCorrupt):
+    images = np.full(shape=(3, 10, 10, 3), fill_value=0.5)
+    corruptImages = ImageCorruptor(greyScale=False, seed=0).corruptImages(images=images, proportionToCorrupt=proportionToCorrupt)
+
+    changedPixels = np.any(corruptImages != images, axis=-1).sum(axis=(1, 2))
+
+    assert changedPixels.tolist() == [round(proportionToCorrupt * 100)] * 3
+
+
+def test_corruptImagesWritesBackToNonContiguousInput():
+    storage = np.full(shape=(2, 10, 20), fill_value=0.5)
+    images = storage[:, :, ::2]
+
+    corruptImages = ImageCorruptor(greyScale=True, seed=0).corruptImages(images=images, proportionToCorrupt=0.25, inPlace=True)
+
+    assert corruptImages is images
+    assert (storage[:, :, ::2] == 0).sum(axis=(1, 2)).tolist() == [25, 25]
+    assert np.all(storage[:, :, 1::2] == 0.5)
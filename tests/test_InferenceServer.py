@@ -0,0 +1,97 @@
+import asyncio
+import os
+import numpy as np
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+from InferenceServer import MicroBatcher
+
+
+def test_microBatcherIsolatesFailedRequests():
+    def processBatch(payloads):
+        return [ValueError("bad request") if payload < 0 else 2 * payload for payload in payloads]
+
+    async def submitAll():
+        batcher = MicroBatcher(processBatch, maxBatchSize=4, maxWait=0.05, executor=ThreadPoolExecutor(max_workers=1))
+        task = asyncio.create_task(batcher.run())
+
+        try:
+            return batcher, await asyncio.gather(*(batcher.submit(payload) for payload in (1, -1, 3)), return_exceptions=True)
+        finally:
+            task.cancel()
+
+    batcher, results = asyncio.run(submitAll())
+
+    assert results[0] == 2 and results[2] == 6
+    assert isinstance(results[1], ValueError)
+    assert batcher.stats()["batchSizes"] == {"3": 1}
+
+
+def test_decryptBatchRejectsWrongSizedImages(tmp_path):
+    pytest.importorskip("tensorflow")
+    from BenchmarkSuite import createRandomModel
+    from CryptoNet import CryptoNet
+    from ImageIO import writeImage
+    from InferenceServer import InferenceServer
+
+    cryptoNet = CryptoNet(weightsFilePath=createRandomModel(directory=str(tmp_path), imageSize=8), seed=0)
+    server = InferenceServer(cryptoNet=cryptoNet)
+
+    goodPath, badPath = os.path.join(tmp_path, "good.png"), os.path.join(tmp_path, "bad.png")
+    writeImage(imageFilePath=goodPath, image=np.zeros(shape=(8, 8, 3), dtype=np.float32))
+    writeImage(imageFilePath=badPath, image=np.zeros(shape=(9, 8, 3), dtype=np.float32))
+
+    results = server.decryptBatch([{"image": goodPath}, {"image": badPath}, {"image": goodPath}])
+
+    assert isinstance(results[0]["sentence"], str) and isinstance(results[2]["sentence"], str)
+    assert isinstance(results[1], ValueError)
+
+
+def test_microBatcherResolvesFutureResults():
+    writeExecutor = ThreadPoolExecutor(max_workers=1)
+
+    def processBatch(payloads):
+        return [writeExecutor.submit(lambda value=payload: 2 * value) for payload in payloads]
+
+    async def submitAll():
+        batcher = MicroBatcher(processBatch, maxBatchSize=4, maxWait=0.05, executor=ThreadPoolExecutor(max_workers=1))
+        task = asyncio.create_task(batcher.run())
+
+        try:
+            return await asyncio.gather(*(batcher.submit(payload) for payload in (1, 2)))
+        finally:
+            task.cancel()
+
+    assert asyncio.run(submitAll()) == [2, 4]
+
+
+def test_encryptBatchWritesOffTheModelThread(tmp_path):
+    pytest.importorskip("tensorflow")
+    from BenchmarkSuite import createRandomModel
+    from CryptoNet import CryptoNet
+    from ImageIO import writeImage
+    from InferenceServer import InferenceServer
+
+    cryptoNet = CryptoNet(weightsFilePath=createRandomModel(directory=str(tmp_path), imageSize=8), seed=0)
+    server = InferenceServer(cryptoNet=cryptoNet)
+
+    imagePath = os.path.join(tmp_path, "carrier.png")
+    writeImage(imageFilePath=imagePath, image=np.zeros(shape=(8, 8, 3), dtype=np.float32))
+    outputPaths = [os.path.join(tmp_path, f"output{idx}.png") for idx in range(2)]
+
+    results = server.encryptBatch([{"image": imagePath, "sentence": "hi", "output": path} for path in outputPaths])
+
+    assert [result.result() for result in results] == [{"output": path} for path in outputPaths]
+    assert all(os.path.isfile(path) for path in outputPaths)
+
+
+def test_routeRejectsBodiesThatAreNotObjects():
+    from InferenceServer import InferenceServer
+
+    server = InferenceServer(cryptoNet=None, maxBatchSize=1)
+    server.batchers = {"decrypt": None}
+
+    status, response = asyncio.run(server.route(method="POST", path="/decrypt", body=b'["image.png"]'))
+
+    assert status == 400
+    assert "JSON object" in response["error"]
@@ -0,0 +1,91 @@
+import os
+import threading
+import pytest
+
+
+@pytest.fixture
+def weightsFilePaths(tmp_path):
+    pytest.importorskip("tensorflow")
+    from BenchmarkSuite import createRandomModel
+
+    weightsFilePaths = []
+
+    for idx in range(3):
+        directory = tmp_path / f"model{idx}"
+        directory.mkdir()
+        weightsFilePaths.append(createRandomModel(directory=str(directory), imageSize=8))
+
+    return weightsFilePaths
+
+
+def test_getModelsHitsOnTheSameKey(weightsFilePaths):
+    from ModelRegistry import ModelRegistry
+
+    registry = ModelRegistry()
+    models = registry.getModels(weightsFilePath=weightsFilePaths[0])
+
+    assert registry.getModels(weightsFilePath=weightsFilePaths[0]) is models
+    assert registry.stats()["hits"] == 1
+    assert registry.stats()["misses"] == 1
+
+
+def test_getModelsRebuildsAfterTheWeightsChange(weightsFilePaths):
+    from ModelRegistry import ModelRegistry
+
+    registry = ModelRegistry()
+    models = registry.getModels(weightsFilePath=weightsFilePaths[0])
+    modifiedTime = os.path.getmtime(weightsFilePaths[0]) + 10
+    os.utime(weightsFilePaths[0], (modifiedTime, modifiedTime))
+
+    assert registry.getModels(weightsFilePath=weightsFilePaths[0]) is not models
+    assert registry.stats()["misses"] == 2
+    assert registry.stats()["instances"] == 1
+
+
+def test_getModelsEvictsTheLeastRecentlyUsed(weightsFilePaths):
+    from ModelRegistry import ModelRegistry
+
+    registry = ModelRegistry(maxInstances=2)
+    first = registry.getModels(weightsFilePath=weightsFilePaths[0])
+    registry.getModels(weightsFilePath=weightsFilePaths[1])
+    registry.getModels(weightsFilePath=weightsFilePaths[0])
+    registry.getModels(weightsFilePath=weightsFilePaths[2])
+
+    assert registry.stats()["instances"] == 2
+    assert registry.getModels(weightsFilePath=weightsFilePaths[0]) is first
+    assert registry.stats()["misses"] == 3
+
+
+def test_getModelsEvictsBeyondMaxBytes(weightsFilePaths):
+    from ModelRegistry import ModelRegistry
+
+    probe = ModelRegistry()
+    probe.getModels(weightsFilePath=weightsFilePaths[0])
+    modelBytes = probe.stats()["bytes"]
+
+    registry = ModelRegistry(maxInstances=3, maxBytes=modelBytes * 3 // 2)
+    registry.getModels(weightsFilePath=weightsFilePaths[0])
+    registry.getModels(weightsFilePath=weightsFilePaths[1])
+
+    assert registry.stats()["instances"] == 1
+    assert registry.stats()["bytes"] == modelBytes
+
+
+def test_concurrentMissesBuildOnce(weightsFilePaths):
+    from ModelRegistry import ModelRegistry
+
+    registry = ModelRegistry()
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.getModels(weightsFilePath=weightsFilePaths[0])))
+        for _ in range(3)
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert registry.stats()["misses"] == 1
+    assert all(models is results[0] for models in results)
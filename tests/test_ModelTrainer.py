@@ -0,0 +1,95 @@
+import os
+import pytest
+
+
+def test_resumeContinuesFromCheckpoint(tmp_path):
+    pytest.importorskip("tensorflow")
+    from ModelTrainer import ModelTrainer
+
+    checkpointDirectory = os.path.join(tmp_path, "checkpoints")
+
+    def train(epochs, **kwargs):
+        trainer = ModelTrainer(modelSavePath=os.path.join(tmp_path, "weights.h5"), imageSize=8, greyScale=False, batchSize=2, seed=0, **kwargs)
+        history = trainer.trainModels(
+            epochs=epochs,
+            stepsPerEpoch=2,
+            verbose=0,
+            threshold=0.0,
+            checkpointDirectory=checkpointDirectory,
+            resume=True
+        )
+
+        return trainer, history
+
+    train(epochs=1)
+    trainer, history = train(epochs=2)
+
+    assert trainer.initialEpoch == 1
+    assert history.epoch == [1]
+
+    with pytest.raises(ValueError, match="dictionaryLength"):
+        train(epochs=3, dictionaryLength=100)
+
+
+def test_getDatasetInterleavesShardsReproducibly(tmp_path):
+    pytest.importorskip("tensorflow")
+    import numpy as np
+    from ModelTrainer import ModelTrainer
+
+    trainer = ModelTrainer(modelSavePath=os.path.join(tmp_path, "weights.h5"), imageSize=8, greyScale=False, batchSize=2, seed=0)
+    batches = list(trainer.getDataset(numShards=2).take(3).as_numpy_iterator())
+    repeated = list(trainer.getDataset(numShards=2).take(3).as_numpy_iterator())
+
+    for (images, sentences), (targetImages, sentenceTargets) in batches:
+        assert images.shape == (2, 8, 8, 3) and images.dtype == np.float32
+        assert 0.0 <= images.min() and images.max() <= 1.0
+        np.testing.assert_array_equal(images, targetImages)
+        np.testing.assert_array_equal(sentenceTargets.argmax(axis=-1), sentences)
+        assert sentences.max() < trainer.dictionaryLength
+
+    assert not np.array_equal(batches[0][0][0], batches[1][0][0])
+
+    for batch, repeatedBatch in zip(batches, repeated):
+        for array, repeatedArray in zip(batch[0] + batch[1], repeatedBatch[0] + repeatedBatch[1]):
+            np.testing.assert_array_equal(array, repeatedArray)
+
+
+@pytest.mark.parametrize("tfConfig, isChief", [
+    (None, True),
+    ({"cluster": {"chief": ["a:1"], "worker": ["b:1"]}, "task": {"type": "chief", "index": 0}}, True),
+    ({"cluster": {"chief": ["a:1"], "worker": ["b:1"]}, "task": {"type": "worker", "index": 0}}, False),
+    ({"cluster": {"worker": ["a:1", "b:1"]}, "task": {"type": "worker", "index": 0}}, True),
+    ({"cluster": {"worker": ["a:1", "b:1"]}, "task": {"type": "worker", "index": 1}}, False)
+])
+def test_isChief(monkeypatch, tfConfig, isChief):
+    pytest.importorskip("tensorflow")
+    import json
+    from ModelTrainer import ModelTrainer
+
+    if tfConfig is None:
+        monkeypatch.delenv("TF_CONFIG", raising=False)
+    else:
+        monkeypatch.setenv("TF_CONFIG", json.dumps(tfConfig))
+
+    assert ModelTrainer.isChief() == isChief
+
+
+def test_nonChiefWorkersCheckpointToATemporaryDirectory(tmp_path, monkeypatch):
+    pytest.importorskip("tensorflow")
+    import json
+    import tempfile
+    from ModelTrainer import ModelTrainer
+
+    modelSavePath = os.path.join(tmp_path, "weights.h5")
+    monkeypatch.setenv("TF_CONFIG", json.dumps({"cluster": {"worker": ["a:1", "b:1"]}, "task": {"type": "worker", "index": 1}}))
+    temporaryDirectories = []
+    mkdtemp = tempfile.mkdtemp
+    monkeypatch.setattr(tempfile, "mkdtemp", lambda **kwargs: temporaryDirectories.append(mkdtemp(**kwargs)) or temporaryDirectories[-1])
+
+    checkpointDirectory = os.path.join(tmp_path, "checkpoints")
+    trainer = ModelTrainer(modelSavePath=modelSavePath, imageSize=8, greyScale=False, batchSize=2, seed=0)
+    trainer.trainModels(epochs=1, stepsPerEpoch=2, verbose=0, threshold=0.0, checkpointDirectory=checkpointDirectory)
+
+    assert len(temporaryDirectories) == 1
+    assert not os.path.exists(temporaryDirectories[0])
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+
+def test_exportQuantizedMatchesFloatShapes(tmp_path):
+    pytest.importorskip("tensorflow")
+    from BenchmarkSuite import createRandomModel
+    from CryptoNet import CryptoNet
+    from QuantizedEngine import QuantizedEngine
+    from QuantizedEngine import isQuantizedModel
+
+    cryptoNet = CryptoNet(weightsFilePath=createRandomModel(directory=str(tmp_path), imageSize=16), seed=0)
+    quantizedModelPath = str(tmp_path / "quantized")
+    cryptoNet.exportQuantized(quantizedModelPath=quantizedModelPath)
+
+    assert isQuantizedModel(path=quantizedModelPath)
+
+    quantizedCryptoNet = CryptoNet(weightsFilePath=quantizedModelPath, seed=0)
+    assert isinstance(quantizedCryptoNet.engine, QuantizedEngine)
+
+    images = np.random.default_rng(0).random(size=(3, 16, 16, 3), dtype=np.float32)
+    sentences = cryptoNet.preprocessSentences(sentences=["a", "bc", "def"])
+
+    assert quantizedCryptoNet.encodeBatch(images=images, sentences=sentences).shape == cryptoNet.encodeBatch(images=images, sentences=sentences).shape
+    assert quantizedCryptoNet.decodeCodes(images=images).shape == cryptoNet.decodeCodes(images=images).shape == (3, 16)
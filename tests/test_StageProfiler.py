@@ -0,0 +1,37 @@
+import numpy as np
+
+from StageProfiler import StageProfiler
+
+
+def test_statsAndPrometheusText():
+    profiler = StageProfiler(bucketBounds=(0.1, 1.0))
+
+    for seconds in (0.05, 0.5, 0.5, 2.0):
+        profiler.record(name="decode", seconds=seconds)
+
+    stats = profiler.stats()["decode"]
+
+    assert stats["count"] == 4
+    assert stats["maxSeconds"] == 2.0
+    assert stats["histogram"] == {"0.1": 1, "1.0": 2, "+Inf": 1}
+    assert stats["p50Seconds"] == 1.0
+    assert stats["p99Seconds"] == 2.0
+
+    text = profiler.prometheusText(metricName="stage_seconds")
+
+    assert 'stage_seconds_bucket{stage="decode",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="decode",le="1.0"} 3' in text
+    assert 'stage_seconds_bucket{stage="decode",le="+Inf"} 4' in text
+    assert 'stage_seconds_count{stage="decode"} 4' in text
+
+
+def test_asyncImageWriterTimesWritesOnItsThreads(tmp_path):
+    from ImageIO import AsyncImageWriter
+
+    profiler = StageProfiler()
+
+    with AsyncImageWriter(maxPending=2) as writer:
+        for idx in range(3):
+            writer.submit(imageFilePath=str(tmp_path / f"{idx}.png"), image=np.zeros(shape=(8, 8, 3)), profiler=profiler)
+
+    assert profiler.stats()["writeImage"]["count"] == 3
@@ -0,0 +1,24 @@
+import pytest
+
+from SweepRunner import SweepRunner
+
+
+def test_getRungEpochs(tmp_path):
+    runner = SweepRunner(sweepDirectory=str(tmp_path), grid={"batchSize": [8]}, stepsPerEpoch=1, minEpochs=1, maxEpochs=10, reductionFactor=3)
+
+    assert runner.getRungEpochs() == [1, 3, 9, 10]
+
+
+def test_rankTrials():
+    results = [
+        {"trialId": 0, "imageReconstructionLoss": 0.3, "sentenceAccuracy": 0.9},
+        {"trialId": 1, "imageReconstructionLoss": 0.1, "sentenceAccuracy": 0.8},
+        {"trialId": 2, "imageReconstructionLoss": 0.2, "sentenceAccuracy": None}
+    ]
+
+    assert [row["trialId"] for row in SweepRunner.rankTrials(results)] == [1, 0, 2]
+
+
+def test_rankTrialsRejectsMissingLoss():
+    with pytest.raises(ValueError):
+        SweepRunner.rankTrials([{"trialId": 0, "imageReconstructionLoss": None, "sentenceAccuracy": 0.5}])
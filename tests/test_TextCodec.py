@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from TextCodec import TextCodec
+
+
+def test_encodePaddedRoundTrips():
+    codec = TextCodec(dictionaryLength=200)
+    sentences = ["Hello there", "General Kenobi", "a"]
+    codes = codec.encodePadded(sentences=sentences, maxLength=16, padValue=codec.pepperStart)
+
+    assert codes.shape == (3, 16)
+    assert codec.decodeBatch(codes=codes) == sentences
+
+
+def test_encodeBatchRejectsInvalidSentences():
+    codec = TextCodec(dictionaryLength=200)
+
+    with pytest.raises(ValueError):
+        codec.encodeBatch(sentences=["too long"], maxLength=4)
+
+    with pytest.raises(ValueError):
+        codec.encodeBatch(sentences=[""], maxLength=4)
+
+    with pytest.raises(ValueError):
+        codec.encodeBatch(sentences=[chr(codec.pepperStart)], maxLength=4)
+
+
+def test_decodeBatchDropsPepper():
+    codec = TextCodec(dictionaryLength=200)
+    codes = np.array([[codec.pepperStart, ord("h"), 199, ord("i")]])
+
+    assert codec.decodeBatch(codes=codes) == ["hi"]
+
+
+def test_encodeMessageAcceptsLoneSurrogates():
+    from TextCodec import encodeMessage
+
+    assert encodeMessage("a\ud800b").tolist() == [ord("a"), 0xD800, ord("b")]
@@ -0,0 +1,22 @@
+import json
+
+from TrainingLog import formatSummary
+from TrainingLog import summarizeTrainingLog
+
+
+def test_summarizeTrainingLogBoundsInputWait(tmp_path):
+    logFilePath = tmp_path / "training.jsonl"
+    records = [
+        {"type": "step", "stepSeconds": 0.5, "samplesPerSecond": 8.0, "inputWaitSeconds": 0.25, "peakRssBytes": None},
+        {"type": "step", "stepSeconds": 0.5, "samplesPerSecond": 8.0, "inputWaitSeconds": None, "peakRssBytes": 2048},
+        {"type": "epoch", "checkpointSeconds": 0.0, "peakRssBytes": None},
+        {"type": "end", "checkpointSeconds": 0.0, "peakRssBytes": None}
+    ]
+    logFilePath.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    summary = summarizeTrainingLog(logFilePath=str(logFilePath))
+
+    assert summary["inputWaitSeconds"] == 0.25
+    assert summary["inputWaitFraction"] == 0.25
+    assert summary["peakRssBytes"] == 2048
+    assert "Waiting for input" in formatSummary(summary)